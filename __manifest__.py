@@ -44,6 +44,8 @@ Enterprise modules like Sales, Accounting, or Website.
         # Data
         'data/property_data.xml',
         'data/sequences.xml',
+        'data/ir_cron_data.xml',
+        'data/bill_extraction_rules.xml',
         
         # Views - Dashboard
         'views/dashboard_views.xml',
@@ -56,14 +58,34 @@ Enterprise modules like Sales, Accounting, or Website.
         # Views - Tenant Management
         'views/tenant_views.xml',
         'views/agreement_views.xml',
+        'views/deposit_views.xml',
         
         # Views - Daily Operations
         'views/collection_views.xml',
+        'views/collection_round_views.xml',
         'views/expense_views.xml',
         'views/invoice_views.xml',
+        'views/bank_transfer_views.xml',
+        'views/landlord_payment_views.xml',
+        'views/staff_salary_views.xml',
+        
+        # Views - Reporting
+        'views/pnl_report_views.xml',
+        'views/perf_views.xml',
+        'views/storage_views.xml',
+        'views/collection_archive_views.xml',
+        
+        # Wizards
+        'wizards/bank_statement_import_views.xml',
+        'wizards/agreement_renewal_views.xml',
+        'wizards/tenant_exit_bulk_views.xml',
+        'wizards/deposit_liability_views.xml',
+        'wizards/landlord_payout_views.xml',
+        'wizards/payroll_run_views.xml',
         
         # Reports (must come before email templates that reference them)
         'reports/invoice_reports.xml',
+        'reports/landlord_statement_reports.xml',
         
         # Email Templates (must come after reports)
         'data/email_templates.xml',
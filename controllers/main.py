@@ -1,10 +1,13 @@
 from odoo import http
 from odoo.http import request
 
+from ..models.property_perf import instrument
+
 
 class PropertyManagementController(http.Controller):
 
     @http.route('/property/dashboard', type='http', auth='user', website=True)
+    @instrument('controller.property_dashboard', category='controller')
     def property_dashboard(self, **kwargs):
         """Property management dashboard"""
         # Get summary statistics
@@ -29,6 +32,7 @@ class PropertyManagementController(http.Controller):
         return request.render('property_management_lite.dashboard_template', values)
 
     @http.route('/property/api/collections', type='json', auth='user')
+    @instrument('controller.api_collections', category='controller')
     def api_collections(self, **kwargs):
         """API endpoint for collections data"""
         collections = request.env['property.collection'].search([])
@@ -45,16 +49,20 @@ class PropertyManagementController(http.Controller):
         return data
 
     @http.route('/property/api/rooms/available', type='json', auth='user')
-    def api_available_rooms(self, **kwargs):
-        """API endpoint for available rooms"""
-        rooms = request.env['property.room'].search([('status', 'in', ['vacant', 'booked'])])
-        data = []
-        for room in rooms:
-            data.append({
-                'id': room.id,
-                'name': room.name,
-                'property': room.property_id.name,
-                'rent': room.rent_amount,
-                'status': room.status,
-            })
-        return data
+    @instrument('controller.api_available_rooms', category='controller')
+    def api_available_rooms(self, property_ids=None, room_type_ids=None, rent_min=None, rent_max=None,
+                            amenities=None, min_occupancy=None, available_by=None,
+                            sort='rent', limit=80, offset=0, **kwargs):
+        """API endpoint for available rooms, filtered and paginated server-side"""
+        return request.env['property.room'].search_available(
+            property_ids=property_ids,
+            room_type_ids=room_type_ids,
+            rent_min=rent_min,
+            rent_max=rent_max,
+            amenities=amenities,
+            min_occupancy=min_occupancy,
+            available_by=available_by,
+            sort=sort,
+            limit=limit,
+            offset=offset,
+        )
@@ -1,69 +1,224 @@
-from odoo import http, _
-from odoo.http import request
+import csv
+import io
+from urllib.parse import urlencode
+
+from odoo import api, fields, http, _
+from odoo.http import content_disposition, request
+from odoo.tools.lru import LRU
 from odoo.addons.portal.controllers.portal import CustomerPortal
 
+from ..models.property_perf import instrument
+
+
+# Per-worker cache of tenant counters and first pages, keyed by
+# (dbname, tenant_id, entry) and validated against the tenant's
+# portal_cache_version, which is bumped when its collections or agreements change
+TENANT_PORTAL_CACHE = LRU(8192)
+
+# Rows fetched per query while streaming a CSV statement
+STATEMENT_BATCH_SIZE = 500
+
 
 class PropertyPortal(CustomerPortal):
 
+    def _get_portal_tenant(self):
+        tenant_id = request.env['property.tenant']._get_portal_tenant_id(request.env.uid)
+        return request.env['property.tenant'].browse(tenant_id)
+
+    def _get_tenant_cached(self, tenant, entry, loader):
+        """Return ``loader()`` for the tenant, cached until its data changes"""
+        key = (request.env.cr.dbname, tenant.id, entry)
+        version = tenant.portal_cache_version
+        cached = TENANT_PORTAL_CACHE.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+        value = loader()
+        TENANT_PORTAL_CACHE[key] = (version, value)
+        return value
+
+    def _get_tenant_count(self, tenant, model, domain):
+        return self._get_tenant_cached(
+            tenant, (model, 'count'),
+            lambda: request.env[model].search_count(domain),
+        )
+
+    def _get_tenant_first_page(self, tenant, model, domain, order):
+        """First page of the tenant's records plus one, which tells whether a next page exists"""
+        ids = self._get_tenant_cached(
+            tenant, (model, 'first_page', order),
+            lambda: tuple(request.env[model].search(domain, order=order, limit=self._items_per_page + 1).ids),
+        )
+        return request.env[model].browse(ids)
+
+    @instrument('portal._prepare_home_portal_values', category='controller')
     def _prepare_home_portal_values(self, counters):
         values = super()._prepare_home_portal_values(counters)
-        partner = request.env.user.partner_id
+        tenant = self._get_portal_tenant()
         
         if 'agreement_count' in counters:
-            if partner.tenant_id:
-                agreement_count = request.env['property.agreement'].search_count([
-                    ('tenant_id', '=', partner.tenant_id.id)
-                ])
+            if tenant:
+                agreement_count = self._get_tenant_count(
+                    tenant, 'property.agreement', [('tenant_id', '=', tenant.id)])
             else:
                 agreement_count = 0
             values['agreement_count'] = agreement_count
             
         if 'collection_count' in counters:
-            if partner.tenant_id:
-                collection_count = request.env['property.collection'].search_count([
-                    ('tenant_id', '=', partner.tenant_id.id)
-                ])
+            if tenant:
+                collection_count = self._get_tenant_count(
+                    tenant, 'property.collection', [('tenant_id', '=', tenant.id)])
             else:
                 collection_count = 0
             values['collection_count'] = collection_count
             
         return values
 
+    def _get_date_domain(self, date_field, date_begin, date_end):
+        domain = []
+        for operator, value in (('>=', date_begin), ('<=', date_end)):
+            try:
+                value = fields.Date.to_date(value) if value else None
+            except ValueError:
+                value = None
+            if value:
+                domain.append((date_field, operator, value))
+        return domain
+
+    def _parse_keyset_cursor(self, cursor):
+        """``cursor`` is '<date>:<id>' of the row a page starts after (or ends before)"""
+        try:
+            date_value, record_id = (cursor or '').split(':')
+            return fields.Date.to_date(date_value), int(record_id)
+        except ValueError:
+            return None
+
+    def _keyset_cursor(self, record, date_field):
+        return f'{record[date_field]}:{record.id}'
+
+    def _keyset_page(self, records, date_field, has_next, has_previous):
+        """The page out of ``records`` (one row more than a page when ``has_next``), with its cursors"""
+        records = records[:self._items_per_page]
+        next_cursor = self._keyset_cursor(records[-1], date_field) if records and has_next else False
+        previous_cursor = self._keyset_cursor(records[0], date_field) if records and has_previous else False
+        return records, next_cursor, previous_cursor
+
+    def _keyset_search(self, model, domain, date_field, after=None, before=None):
+        """Fetch one page ordered by (date desc, id desc), after or before the given cursor.
+
+        One row more than a page is read to tell whether the page has a
+        neighbour in the reading direction. Returns the page and the cursors of
+        the next and previous pages (False when there is none).
+        """
+        Model = request.env[model]
+        before_cursor = self._parse_keyset_cursor(before)
+        if before_cursor:
+            # Read backwards from the first row of the following page
+            records = Model.search(domain + [
+                '|', (date_field, '>', before_cursor[0]),
+                '&', (date_field, '=', before_cursor[0]), ('id', '>', before_cursor[1]),
+            ], order=f'{date_field} asc, id asc', limit=self._items_per_page + 1)
+            has_previous = len(records) > self._items_per_page
+            records = records[:self._items_per_page].sorted(lambda r: (r[date_field], r.id), reverse=True)
+            return self._keyset_page(records, date_field, True, has_previous)
+        after_cursor = self._parse_keyset_cursor(after)
+        if after_cursor:
+            domain = domain + [
+                '|', (date_field, '<', after_cursor[0]),
+                '&', (date_field, '=', after_cursor[0]), ('id', '<', after_cursor[1]),
+            ]
+        records = Model.search(domain, order=f'{date_field} desc, id desc', limit=self._items_per_page + 1)
+        return self._keyset_page(records, date_field, len(records) > self._items_per_page, bool(after_cursor))
+
+    def _cursor_args(self, after, before):
+        """Query string arguments locating the current page"""
+        if self._parse_keyset_cursor(before):
+            return {'before': before}
+        if self._parse_keyset_cursor(after):
+            return {'after': after}
+        return {}
+
+    def _keyset_pager(self, url, url_args, page, cursor_args, next_cursor, previous_cursor):
+        """Pager values for keyset pagination: previous, current and next page.
+
+        Pages carry their number in the URL and the cursor of their neighbour
+        in the query string, so Previous goes one page back, not to the first.
+        """
+        url_args = {key: value for key, value in url_args.items() if value}
+
+        def page_values(num, **cursor):
+            path = f"{url}/page/{num}" if num > 1 else url
+            args = dict(url_args, **cursor) if num > 1 else url_args
+            return {'url': f"{path}?{urlencode(args)}" if args else path, 'num': num}
+
+        page = page if cursor_args and page > 1 else 1
+        first = page_values(1)
+        current = page_values(page, **cursor_args)
+        previous = page_values(page - 1, before=previous_cursor) if previous_cursor and page > 2 else first
+        following = page_values(page + 1, after=next_cursor) if next_cursor else current
+        pages = ([previous] if page > 1 else []) + [current] + ([following] if next_cursor else [])
+        return {
+            'page_count': following['num'],
+            'offset': 0,
+            'page': current,
+            'page_first': first,
+            'page_start': pages[0],
+            'page_previous': previous if page > 1 else current,
+            'page_next': following,
+            'page_end': following,
+            'page_last': following,
+            'pages': pages,
+        }
+
     @http.route(['/my/agreements', '/my/agreements/page/<int:page>'], type='http', auth="user", website=True)
-    def portal_my_agreements(self, page=1, date_begin=None, date_end=None, sortby=None, **kw):
+    @instrument('portal.portal_my_agreements', category='controller')
+    def portal_my_agreements(self, page=1, date_begin=None, date_end=None, sortby=None, after=None, before=None,
+                             **kw):
         values = self._prepare_portal_layout_values()
-        partner = request.env.user.partner_id
+        tenant = self._get_portal_tenant()
         
-        if not partner.tenant_id:
+        if not tenant:
             return request.render('property_management_lite.portal_no_tenant')
             
         Agreement = request.env['property.agreement']
         
-        domain = [('tenant_id', '=', partner.tenant_id.id)]
+        domain = [('tenant_id', '=', tenant.id)]
+        date_domain = self._get_date_domain('start_date', date_begin, date_end)
         
         searchbar_sortings = {
-            'date': {'label': _('Newest'), 'order': 'start_date desc'},
+            'date': {'label': _('Newest'), 'order': 'start_date desc, id desc'},
             'name': {'label': _('Name'), 'order': 'name'},
         }
         
-        if not sortby:
+        if sortby not in searchbar_sortings:
             sortby = 'date'
         order = searchbar_sortings[sortby]['order']
+        url_args = {'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby}
         
-        # Count for pager
-        agreement_count = Agreement.search_count(domain)
-        
-        # Pager
-        pager = request.website.pager(
-            url="/my/agreements",
-            url_args={'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby},
-            total=agreement_count,
-            page=page,
-            step=self._items_per_page
-        )
-        
-        # Content
-        agreements = Agreement.search(domain, order=order, limit=self._items_per_page, offset=pager['offset'])
+        if sortby == 'date':
+            # Keyset pagination on the (tenant_id, start_date) index, no count needed
+            if not date_domain and not after and not before:
+                agreements = self._get_tenant_first_page(tenant, 'property.agreement', domain, order)
+                agreements, next_cursor, previous_cursor = self._keyset_page(
+                    agreements, 'start_date', len(agreements) > self._items_per_page, False)
+            else:
+                agreements, next_cursor, previous_cursor = self._keyset_search(
+                    'property.agreement', domain + date_domain, 'start_date', after, before)
+            pager = self._keyset_pager("/my/agreements", url_args, page, self._cursor_args(after, before),
+                                       next_cursor, previous_cursor)
+        else:
+            domain += date_domain
+            if date_domain:
+                agreement_count = Agreement.search_count(domain)
+            else:
+                agreement_count = self._get_tenant_count(tenant, 'property.agreement', domain)
+            pager = request.website.pager(
+                url="/my/agreements",
+                url_args=url_args,
+                total=agreement_count,
+                page=page,
+                step=self._items_per_page
+            )
+            agreements = Agreement.search(domain, order=order, limit=self._items_per_page, offset=pager['offset'])
         
         values.update({
             'date': date_begin,
@@ -80,11 +235,12 @@ class PropertyPortal(CustomerPortal):
         return request.render("property_management_lite.portal_my_agreements", values)
 
     @http.route(['/my/agreement/<int:agreement_id>'], type='http', auth="user", website=True)
+    @instrument('portal.portal_agreement_detail', category='controller')
     def portal_agreement_detail(self, agreement_id, **kw):
         agreement = request.env['property.agreement'].browse(agreement_id)
         
         # Check access rights
-        if not agreement.exists() or agreement.tenant_id != request.env.user.partner_id.tenant_id:
+        if not agreement.exists() or agreement.tenant_id != self._get_portal_tenant():
             return request.not_found()
             
         values = {
@@ -95,40 +251,55 @@ class PropertyPortal(CustomerPortal):
         return request.render("property_management_lite.portal_agreement_detail", values)
 
     @http.route(['/my/collections', '/my/collections/page/<int:page>'], type='http', auth="user", website=True)
-    def portal_my_collections(self, page=1, date_begin=None, date_end=None, sortby=None, **kw):
+    @instrument('portal.portal_my_collections', category='controller')
+    def portal_my_collections(self, page=1, date_begin=None, date_end=None, sortby=None, after=None, before=None,
+                              **kw):
         values = self._prepare_portal_layout_values()
-        partner = request.env.user.partner_id
+        tenant = self._get_portal_tenant()
         
-        if not partner.tenant_id:
+        if not tenant:
             return request.render('property_management_lite.portal_no_tenant')
             
         Collection = request.env['property.collection']
         
-        domain = [('tenant_id', '=', partner.tenant_id.id)]
+        domain = [('tenant_id', '=', tenant.id)]
+        date_domain = self._get_date_domain('date', date_begin, date_end)
         
         searchbar_sortings = {
-            'date': {'label': _('Newest'), 'order': 'date desc'},
+            'date': {'label': _('Newest'), 'order': 'date desc, id desc'},
             'amount': {'label': _('Amount'), 'order': 'amount_collected desc'},
         }
         
-        if not sortby:
+        if sortby not in searchbar_sortings:
             sortby = 'date'
         order = searchbar_sortings[sortby]['order']
+        url_args = {'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby}
         
-        # Count for pager
-        collection_count = Collection.search_count(domain)
-        
-        # Pager
-        pager = request.website.pager(
-            url="/my/collections",
-            url_args={'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby},
-            total=collection_count,
-            page=page,
-            step=self._items_per_page
-        )
-        
-        # Content
-        collections = Collection.search(domain, order=order, limit=self._items_per_page, offset=pager['offset'])
+        if sortby == 'date':
+            # Keyset pagination on the (tenant_id, date) index, no count needed
+            if not date_domain and not after and not before:
+                collections = self._get_tenant_first_page(tenant, 'property.collection', domain, order)
+                collections, next_cursor, previous_cursor = self._keyset_page(
+                    collections, 'date', len(collections) > self._items_per_page, False)
+            else:
+                collections, next_cursor, previous_cursor = self._keyset_search(
+                    'property.collection', domain + date_domain, 'date', after, before)
+            pager = self._keyset_pager("/my/collections", url_args, page, self._cursor_args(after, before),
+                                       next_cursor, previous_cursor)
+        else:
+            domain += date_domain
+            if date_domain:
+                collection_count = Collection.search_count(domain)
+            else:
+                collection_count = self._get_tenant_count(tenant, 'property.collection', domain)
+            pager = request.website.pager(
+                url="/my/collections",
+                url_args=url_args,
+                total=collection_count,
+                page=page,
+                step=self._items_per_page
+            )
+            collections = Collection.search(domain, order=order, limit=self._items_per_page, offset=pager['offset'])
         
         values.update({
             'date': date_begin,
@@ -139,7 +310,64 @@ class PropertyPortal(CustomerPortal):
             'default_url': '/my/collections',
             'pager': pager,
             'searchbar_sortings': searchbar_sortings,
-            'sortby': sortby
+            'sortby': sortby,
+            'statement_url': f"/my/collections/statement.csv?{urlencode({k: v for k, v in url_args.items() if v and k != 'sortby'})}",
         })
         
         return request.render("property_management_lite.portal_my_collections", values)
+
+    @http.route(['/my/collections/statement.csv'], type='http', auth="user", website=True)
+    @instrument('portal.portal_collections_statement', category='controller')
+    def portal_collections_statement(self, date_begin=None, date_end=None, **kw):
+        """Stream the tenant's collections as CSV, one keyset batch at a time.
+
+        Collections of closed years moved to the archive follow the live ones,
+        so the statement keeps the tenant's whole history; the portal list only
+        shows live collections.
+        """
+        tenant = self._get_portal_tenant()
+        if not tenant:
+            return request.not_found()
+
+        domain = [('tenant_id', '=', tenant.id)] + self._get_date_domain('date', date_begin, date_end)
+        registry = request.env.registry
+        uid = request.env.uid
+        context = dict(request.env.context)
+        columns = ['date', 'name', 'receipt_number', 'collection_type', 'payment_method',
+                   'amount_collected', 'status']
+
+        def generate():
+            # The request cursor is closed once the response starts streaming
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                Collection = env['property.collection']
+                writer.writerow([Collection._fields[column].string for column in columns])
+                labels = {column: dict(Collection._fields[column]._description_selection(env))
+                          for column in columns if Collection._fields[column].type == 'selection'}
+                for model in ('property.collection', 'property.collection.archive'):
+                    batch_domain = domain
+                    while True:
+                        rows = env[model].search_read(
+                            batch_domain, columns, order='date desc, id desc', limit=STATEMENT_BATCH_SIZE)
+                        for row in rows:
+                            writer.writerow([labels[column].get(row[column]) or '' if column in labels
+                                             else row[column] or '' for column in columns])
+                        yield buffer.getvalue().encode()
+                        buffer.seek(0)
+                        buffer.truncate()
+                        if len(rows) < STATEMENT_BATCH_SIZE:
+                            break
+                        last = rows[-1]
+                        batch_domain = domain + [
+                            '|', ('date', '<', last['date']),
+                            '&', ('date', '=', last['date']), ('id', '<', last['id']),
+                        ]
+                        env.invalidate_all()
+
+        filename = f"statement-{tenant.id}-{fields.Date.today()}.csv"
+        return request.make_response(generate(), headers=[
+            ('Content-Type', 'text/csv; charset=utf-8'),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
@@ -0,0 +1,151 @@
+import gzip
+import json
+from datetime import timedelta
+
+from psycopg2 import IntegrityError
+
+from odoo import fields, http, _
+from odoo.exceptions import AccessError, ValidationError
+from odoo.http import request
+from odoo.tools import SQL
+
+from ..models.property_bulk import bulk_mode, post_batch_summary
+from ..models.property_perf import instrument
+from ..models.property_sync import SYNC_TOMBSTONE_RETENTION
+
+
+# Records committed just before the watermark was taken may carry an older
+# write_date, so every pull rescans a short overlap window
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# Entity name -> (model, columns, domain applied on the first full download)
+SYNC_ENTITIES = {
+    'rooms': ('property.room', [
+        'id', 'name', 'room_number', 'property_id', 'flat_id', 'rent_amount', 'status',
+        'current_tenant_id', 'current_agreement_id',
+    ], []),
+    'tenants': ('property.tenant', [
+        'id', 'name', 'mobile', 'current_room_id', 'payment_method', 'status',
+    ], [('status', '!=', 'inactive')]),
+    'agreements': ('property.agreement', [
+        'id', 'name', 'tenant_id', 'room_id', 'start_date', 'end_date', 'rent_amount',
+        'payment_method', 'payment_day', 'state',
+    ], [('state', '=', 'active')]),
+    'dues': ('property.due.tracker', [
+        'id', 'tenant_id', 'room_id', 'agreement_id', 'due_date', 'due_type', 'amount_due',
+        'amount_paid', 'outstanding_amount', 'status',
+    ], [('status', 'in', ['pending', 'overdue', 'partially_paid'])]),
+}
+
+SYNC_COLLECTION_FIELDS = {
+    'room_id', 'tenant_id', 'agreement_id', 'date', 'amount_collected', 'payment_method',
+    'collection_type', 'reference_number', 'notes',
+}
+
+
+class PropertySyncController(http.Controller):
+    """Delta download and batched upload for offline collectors"""
+
+    def _check_collector(self):
+        if not request.env.user.has_group('property_management_lite.group_property_user'):
+            raise AccessError(_('Only property users can synchronise collections.'))
+
+    def _json_response(self, payload, status=200):
+        body = json.dumps(payload, default=str, separators=(',', ':')).encode()
+        headers = [('Content-Type', 'application/json'), ('Cache-Control', 'no-store')]
+        if 'gzip' in request.httprequest.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=5)
+            headers.append(('Content-Encoding', 'gzip'))
+        return request.make_response(body, headers=headers, status=status)
+
+    def _read_json_body(self):
+        data = request.httprequest.get_data()
+        if request.httprequest.headers.get('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return json.loads(data or b'{}')
+
+    def _fetch_rows(self, model, columns, domain):
+        """Rows of the given columns, with access rules applied, in a single query"""
+        Model = request.env[model]
+        Model.check_access('read')
+        query = Model._search(domain, order='id')
+        request.env.cr.execute(query.select(*[SQL.identifier(Model._table, column) for column in columns]))
+        return request.env.cr.fetchall()
+
+    @http.route('/property/sync/pull', type='http', auth='user', methods=['GET'])
+    @instrument('sync.pull', category='controller')
+    def sync_pull(self, since=None, **kwargs):
+        """Rooms, tenants, agreements and dues changed or deleted since the ``since`` watermark.
+
+        Devices that last synced before the deletions still on record get a
+        full download instead, flagged with ``full``.
+        """
+        self._check_collector()
+        request.env.cr.execute("SELECT now() at time zone 'UTC'")
+        watermark = request.env.cr.fetchone()[0]
+        since = fields.Datetime.to_datetime(since) if since else None
+        if since and since < watermark - SYNC_TOMBSTONE_RETENTION:
+            since = None
+
+        request.env.flush_all()
+        Tombstone = request.env['property.sync.tombstone']
+        payload = {'watermark': fields.Datetime.to_string(watermark), 'full': not since}
+        for entity, (model, columns, initial_domain) in SYNC_ENTITIES.items():
+            domain = [('write_date', '>', since - SYNC_OVERLAP)] if since else initial_domain
+            payload[entity] = {
+                'fields': columns,
+                'rows': self._fetch_rows(model, columns, domain),
+                'deleted': Tombstone._get_deleted_ids(model, since - SYNC_OVERLAP) if since else [],
+            }
+        return self._json_response(payload)
+
+    @http.route('/property/sync/push', type='http', auth='user', methods=['POST'], csrf=False)
+    @instrument('sync.push', category='controller')
+    def sync_push(self, **kwargs):
+        """Create offline collections in one batch, skipping already uploaded sync keys"""
+        self._check_collector()
+        try:
+            entries = self._read_json_body().get('collections', [])
+        except (OSError, ValueError):
+            return self._json_response({'error': _('Malformed payload.')}, status=400)
+
+        entries_by_key = {}
+        for entry in entries:
+            if not entry.get('sync_key'):
+                return self._json_response({'error': _('Every collection needs a sync_key.')}, status=400)
+            entries_by_key.setdefault(entry['sync_key'], entry)
+
+        request.env.cr.execute(
+            "SELECT sync_key, id FROM property_collection WHERE sync_key = ANY(%s)",
+            [list(entries_by_key)],
+        )
+        results = {sync_key: {'id': collection_id, 'status': 'duplicate'}
+                   for sync_key, collection_id in request.env.cr.fetchall()}
+        new_keys = [sync_key for sync_key in entries_by_key if sync_key not in results]
+
+        if new_keys:
+            vals_list = []
+            for sync_key in new_keys:
+                entry = entries_by_key[sync_key]
+                vals = {key: value for key, value in entry.items() if key in SYNC_COLLECTION_FIELDS}
+                vals.update({
+                    'sync_key': sync_key,
+                    'status': 'collected',
+                    'collected_by': request.env.uid,
+                })
+                vals_list.append(vals)
+            try:
+                with request.env.cr.savepoint():
+                    collections = bulk_mode(request.env['property.collection']).create(vals_list)
+                    collections._assign_receipt_numbers()
+                    post_batch_summary(collections, _('Collections synced from the collector app'),
+                                       'amount_collected')
+            except (ValidationError, IntegrityError, ValueError, KeyError) as e:
+                return self._json_response({'error': str(e)}, status=422)
+            for sync_key, collection in zip(new_keys, collections):
+                results[sync_key] = {
+                    'id': collection.id,
+                    'status': 'created',
+                    'receipt_number': collection.receipt_number,
+                }
+        return self._json_response({'results': results})
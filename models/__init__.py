@@ -1,17 +1,28 @@
+from . import property_sync
+from . import property_pnl
 from . import property_property
 from . import property_flat
 from . import property_room
 from . import property_room_type
 from . import property_tenant
+from . import property_tenant_duplicate
 from . import property_agreement
 from . import property_collection
+from . import property_collection_round
+from . import property_collection_archive
+from . import property_bill_extraction
 from . import property_expense
 from . import property_invoice
 from . import property_due_tracker
 from . import property_bank_transfer
 from . import property_deposit
+from . import property_deposit_ledger
 from . import property_landlord_payment
 from . import property_staff_salary
 from . import property_tenant_exit
+from . import property_perf
+from . import property_reminder
+from . import property_storage
 from . import property_dashboard
 from . import res_partner
+from . import ir_sequence
@@ -0,0 +1,119 @@
+import threading
+from collections import defaultdict, deque
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+POOL_SIZE_PARAM = 'property_management_lite.sequence_pool_size'
+
+# Per-worker pools of numbers drawn ahead from standard sequences, keyed by
+# (dbname, sequence id, sequence write_date) so a renumbered sequence starts a
+# fresh pool. Standard sequences already skip numbers on rollback, so numbers
+# left in a pool when the worker stops lose nothing a rollback would not.
+_sequence_pools = defaultdict(deque)
+_pool_lock = threading.Lock()
+
+
+def _reserve_nogap(counter, increment):
+    """Move ``number_next`` of a no-gap sequence or date range forward, returning the first number.
+
+    Odoo's ``_update_nogap`` locks the row with ``NOWAIT`` and fails at once
+    when another transaction holds it; here concurrent callers queue on the
+    row lock instead.
+    """
+    counter.flush_recordset(['number_next'])
+    cr = counter.env.cr
+    cr.execute(SQL("SELECT number_next FROM %s WHERE id = %s FOR UPDATE", SQL.identifier(counter._table), counter.id))
+    cr.execute(SQL(
+        "UPDATE %s SET number_next = number_next + %s WHERE id = %s RETURNING number_next - %s",
+        SQL.identifier(counter._table), increment, counter.id, increment,
+    ))
+    counter.invalidate_recordset(['number_next'])
+    return cr.fetchone()[0]
+
+
+class IrSequence(models.Model):
+    _inherit = 'ir.sequence'
+
+    def _reserve_numbers(self, count, sequence_date=None):
+        """Reserve ``count`` raw numbers with a single statement.
+
+        Standard sequences draw the block from the PostgreSQL sequence with one
+        ``nextval`` per row of a ``generate_series``; no-gap sequences move
+        ``number_next`` forward once for the whole block. Returns the numbers
+        and the sequence with the date context needed to format them.
+        """
+        self.ensure_one()
+        dt = sequence_date or self._context.get('ir_sequence_date') or fields.Date.today()
+        counter = self
+        pg_sequence = 'ir_sequence_%03d' % self.id
+        sequence = self.with_context(ir_sequence_date=dt)
+        if self.use_date_range:
+            counter = self.env['ir.sequence.date_range'].search([
+                ('sequence_id', '=', self.id),
+                ('date_from', '<=', dt),
+                ('date_to', '>=', dt),
+            ], limit=1) or self._create_date_range_seq(dt)
+            pg_sequence = 'ir_sequence_%03d_%03d' % (self.id, counter.id)
+            sequence = sequence.with_context(ir_sequence_date_range=counter.date_from)
+
+        if self.implementation == 'standard':
+            self.env.cr.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [pg_sequence, count])
+            numbers = sorted(row[0] for row in self.env.cr.fetchall())
+        else:
+            first = _reserve_nogap(counter, self.number_increment * count)
+            numbers = [first + index * self.number_increment for index in range(count)]
+        return numbers, sequence
+
+    def _reserve_block(self, count, sequence_date=None):
+        """Reserve ``count`` numbers with a single statement and return them formatted"""
+        self.ensure_one()
+        if count <= 0:
+            return []
+        numbers, sequence = self._reserve_numbers(count, sequence_date)
+        return [sequence.get_next_char(number) for number in numbers]
+
+    def _take_from_pool(self, count, sequence_date=None):
+        """Hand out ``count`` numbers from this worker's pool, refilled one block at a time.
+
+        Only standard sequences without date ranges are pooled; no-gap
+        sequences must stay gapless and go straight to ``_reserve_block``.
+        """
+        self.ensure_one()
+        pool_size = int(self.env['ir.config_parameter'].sudo().get_param(POOL_SIZE_PARAM, 50))
+        if count <= 0:
+            return []
+        if self.implementation != 'standard' or self.use_date_range or pool_size <= 1:
+            return self._reserve_block(count, sequence_date)
+
+        key = (self.env.cr.dbname, self.id, str(self.write_date))
+        with _pool_lock:
+            pool = _sequence_pools[key]
+            if len(pool) < count:
+                numbers, _sequence = self._reserve_numbers(max(pool_size, count - len(pool)), sequence_date)
+                pool.extend(numbers)
+            numbers = [pool.popleft() for _index in range(count)]
+        dt = sequence_date or self._context.get('ir_sequence_date') or fields.Date.today()
+        sequence = self.with_context(ir_sequence_date=dt)
+        return [sequence.get_next_char(number) for number in numbers]
+
+    @api.model
+    def next_block_by_code(self, sequence_code, count, sequence_date=None, pooled=False):
+        """Batch counterpart of ``next_by_code``: ``count`` numbers from one reservation.
+
+        With ``pooled`` the numbers come from this worker's pool, which is only
+        fit for sequences where order across workers does not matter and the
+        numbers a stopping worker leaves unused may be lost (receipts);
+        invoices and payments keep chronological numbers.
+        """
+        company_id = self.env.company.id
+        sequence = self.search([
+            ('code', '=', sequence_code),
+            ('company_id', 'in', [company_id, False]),
+        ], order='company_id', limit=1)
+        if not sequence:
+            return [False] * count
+        if pooled:
+            return sequence.sudo()._take_from_pool(count, sequence_date)
+        return sequence.sudo()._reserve_block(count, sequence_date)
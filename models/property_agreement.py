@@ -1,12 +1,49 @@
-from odoo import models, fields, api, _
+from collections import defaultdict
+
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
 from datetime import datetime, timedelta
 
+from .property_perf import instrument
+from .property_reminder import Reminder
+
+# Fields the cached portal pages of a tenant depend on; writing any other
+# field leaves the tenant's portal cache version alone
+PORTAL_FIELDS = {'tenant_id', 'start_date', 'end_date', 'rent_amount', 'state'}
+
+
+def _write_references(records, fnames, values):
+    """Give each record its own many2one values with a single UPDATE.
+
+    ``values`` maps a record id to the ids to store in ``fnames``, in order.
+    Only meant for untracked reference fields: dependent stored fields are
+    marked for recomputation, but no tracking message is written.
+    """
+    if not values:
+        return
+    ids = list(values)
+    records.flush_recordset(fnames)
+    records.env.cr.execute(SQL(
+        "UPDATE %s t SET %s, write_uid = %s, write_date = now() at time zone 'UTC' "
+        "FROM unnest(%s::int[], %s) AS v (id, %s) WHERE t.id = v.id",
+        SQL.identifier(records._table),
+        SQL(', ').join(SQL('%s = v.%s', SQL.identifier(fname), SQL.identifier(fname)) for fname in fnames),
+        records.env.uid,
+        ids,
+        SQL(', ').join(SQL('%s::int[]', [values[id_][index] or None for id_ in ids])
+                       for index in range(len(fnames))),
+        SQL(', ').join(SQL.identifier(fname) for fname in fnames),
+    ))
+    updated = records.browse(ids)
+    updated.invalidate_recordset([*fnames, 'write_uid', 'write_date'])
+    updated.modified(fnames)
+
 
 class PropertyAgreement(models.Model):
     _name = 'property.agreement'
     _description = 'Rental Agreement'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'property.sync.mixin']
     _order = 'start_date desc'
 
     name = fields.Char('Agreement Reference', compute='_compute_name', store=True)
@@ -85,6 +122,8 @@ class PropertyAgreement(models.Model):
     
     # Relations
     collection_ids = fields.One2many('property.collection', 'agreement_id', 'Collections')
+    renewal_of_id = fields.Many2one('property.agreement', 'Renewal Of', readonly=True, copy=False, index=True)
+    renewal_ids = fields.One2many('property.agreement', 'renewal_of_id', 'Renewals')
     
     # Computed Fields
     duration_months = fields.Integer('Duration (Months)', compute='_compute_duration')
@@ -92,6 +131,8 @@ class PropertyAgreement(models.Model):
     total_collected = fields.Monetary('Total Collected', compute='_compute_payment_stats', currency_field='currency_id')
     pending_amount = fields.Monetary('Pending Amount', compute='_compute_payment_stats', currency_field='currency_id')
     last_payment_date = fields.Date('Last Payment', compute='_compute_payment_stats')
+    last_rent_collection_date = fields.Date('Last Rent Collection', compute='_compute_last_rent_collection_date',
+                                            store=True, help="Date of the last rent collected, verified or deposited")
     
     # Financial
     currency_id = fields.Many2one('res.currency', 'Currency', 
@@ -101,6 +142,35 @@ class PropertyAgreement(models.Model):
     agreement_document = fields.Binary('Agreement Document')
     agreement_filename = fields.Char('Agreement Filename')
     
+    def init(self):
+        # Portal listings filter by tenant and page by (start_date, id) descending
+        tools.create_index(self.env.cr, 'property_agreement_tenant_start_date_idx',
+                           self._table, ['tenant_id', 'start_date DESC', 'id DESC'])
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        agreements = super().create(vals_list)
+        self.env['property.tenant']._bump_portal_cache_version(agreements.tenant_id.ids)
+        return agreements
+    
+    def write(self, vals):
+        tenant_ids = self.tenant_id.ids
+        res = super().write(vals)
+        if 'end_date' in vals or 'state' in vals:
+            self.env['property.room']._invalidate_availability_index()
+        if not PORTAL_FIELDS.intersection(vals):
+            return res
+        if 'tenant_id' in vals:
+            tenant_ids += self.tenant_id.ids
+        self.env['property.tenant']._bump_portal_cache_version(tenant_ids)
+        return res
+    
+    def unlink(self):
+        tenant_ids = self.tenant_id.ids
+        res = super().unlink()
+        self.env['property.tenant']._bump_portal_cache_version(tenant_ids)
+        return res
+    
     @api.depends('tenant_id', 'room_id', 'start_date')
     def _compute_name(self):
         for record in self:
@@ -128,11 +198,37 @@ class PropertyAgreement(models.Model):
             else:
                 record.days_remaining = 0
     
+    def _get_last_collection_dates(self, collection_type='rent'):
+        """Last collected, verified or deposited collection date of each agreement, in one query"""
+        if not self.ids:
+            return {}
+        self.env['property.collection'].flush_model(['agreement_id', 'collection_type', 'status', 'date'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (agreement_id) agreement_id, date
+              FROM property_collection
+             WHERE agreement_id = ANY(%s)
+               AND collection_type = %s
+               AND status IN ('collected', 'verified', 'deposited')
+          ORDER BY agreement_id, date DESC
+        """, [self.ids, collection_type])
+        return dict(self.env.cr.fetchall())
+    
+    @api.depends('collection_ids.date', 'collection_ids.status', 'collection_ids.collection_type')
+    def _compute_last_rent_collection_date(self):
+        last_dates = self._get_last_collection_dates()
+        for record in self:
+            record.last_rent_collection_date = last_dates.get(record.id, False)
+    
     @api.depends('collection_ids.amount_collected')
+    @instrument('property.agreement._compute_payment_stats', category='compute')
     def _compute_payment_stats(self):
+        archived = self.env['property.collection.summary']._get_archived_stats(
+            'agreement_id', [id_ for id_ in self._origin.ids if id_])
         for record in self:
-            record.total_collected = sum(record.collection_ids.mapped('amount_collected'))
-            record.last_payment_date = max(record.collection_ids.mapped('date')) if record.collection_ids else False
+            archived_amount, archived_date = archived.get(record._origin.id, (0.0, False))
+            record.total_collected = sum(record.collection_ids.mapped('amount_collected')) + archived_amount
+            record.last_payment_date = (max(record.collection_ids.mapped('date')) if record.collection_ids
+                                        else archived_date)
             
             # Calculate pending amount (simplified logic)
             if record.state == 'active':
@@ -150,21 +246,33 @@ class PropertyAgreement(models.Model):
                 if record.end_date <= record.start_date:
                     raise ValidationError(_('End date must be after start date!'))
     
+    @api.model
+    def _find_room_overlaps(self, periods, states=('active', 'draft')):
+        """Keys of the ``(key, room_id, start_date, end_date, exclude_id)`` periods that
+        overlap an agreement of their room in one of ``states``, checked in one query"""
+        if not periods:
+            return set()
+        self.flush_model(['room_id', 'state', 'start_date', 'end_date'])
+        keys, room_ids, starts, ends, exclude_ids = zip(*periods)
+        self.env.cr.execute("""
+            SELECT DISTINCT p.key
+              FROM unnest(%s::int[], %s::int[], %s::date[], %s::date[], %s::int[])
+                   AS p (key, room_id, start_date, end_date, exclude_id)
+              JOIN property_agreement a ON a.room_id = p.room_id
+             WHERE a.state = ANY(%s)
+               AND a.id != p.exclude_id
+               AND a.start_date <= p.end_date
+               AND a.end_date >= p.start_date
+        """, [list(keys), list(room_ids), list(starts), list(ends), list(exclude_ids), list(states)])
+        return {row[0] for row in self.env.cr.fetchall()}
+    
     @api.constrains('room_id', 'start_date', 'end_date')
     def _check_room_availability(self):
-        for record in self:
-            if record.room_id and record.start_date and record.end_date:
-                # Check for overlapping agreements
-                overlapping = self.search([
-                    ('room_id', '=', record.room_id.id),
-                    ('state', 'in', ['active', 'draft']),
-                    ('id', '!=', record.id),
-                    '|',
-                    '&', ('start_date', '<=', record.start_date), ('end_date', '>=', record.start_date),
-                    '&', ('start_date', '<=', record.end_date), ('end_date', '>=', record.end_date),
-                ])
-                if overlapping:
-                    raise ValidationError(_('Room is already rented during this period!'))
+        records = self.filtered(lambda r: r.room_id and r.start_date and r.end_date)
+        if self._find_room_overlaps([
+            (record.id, record.room_id.id, record.start_date, record.end_date, record.id) for record in records
+        ]):
+            raise ValidationError(_('Room is already rented during this period!'))
     
     @api.onchange('room_id')
     def _onchange_room_id(self):
@@ -178,41 +286,90 @@ class PropertyAgreement(models.Model):
         if self.tenant_id:
             self.payment_method = self.tenant_id.payment_method
     
+    def _lock_rooms(self):
+        """Lock the rooms of the agreements in id order until the transaction ends.
+
+        Concurrent transitions on the same room wait here instead of both
+        passing their checks; under repeatable read the waiting one then
+        fails with a serialization error and is retried on fresh data.
+        """
+        room_ids = sorted(set(self.room_id.ids))
+        self.env.cr.execute(
+            "SELECT id FROM property_room WHERE id = ANY(%s) ORDER BY id FOR UPDATE", [room_ids])
+    
     def action_activate(self):
-        for record in self:
-            # Update room status
-            record.room_id.write({
-                'status': 'occupied',
-                'current_tenant_id': record.tenant_id.id,
-                'current_agreement_id': record.id,
-            })
-            
-            # Update tenant status
-            record.tenant_id.write({
-                'status': 'active',
-                'current_room_id': record.room_id.id,
-            })
-            
-            record.write({'state': 'active'})
-            
-            # Create invoice reference if needed
-            record._create_monthly_invoice_reference()
+        agreements = self.filtered(lambda a: a.state == 'draft')
+        if not agreements:
+            return
+        agreements._lock_rooms()
+        if self._find_room_overlaps([
+            (agreement.id, agreement.room_id.id, agreement.start_date, agreement.end_date, agreement.id)
+            for agreement in agreements
+        ], states=('active',)):
+            raise ValidationError(_('Room is already rented during this period!'))
+        # Nor may the batch rent out a room twice for the same days
+        by_room = defaultdict(list)
+        for agreement in agreements:
+            by_room[agreement.room_id.id].append((agreement.start_date, agreement.end_date))
+        for periods in by_room.values():
+            periods.sort()
+            if any(start <= previous_end for (__, previous_end), (start, __) in zip(periods, periods[1:])):
+                raise ValidationError(_('Room is already rented during this period!'))
+        
+        agreements.write({'state': 'active'})
+        today = fields.Date.context_today(self)
+        started = agreements.filtered(lambda a: a.start_date <= today)
+        started._hand_over_rooms()
+        # Renewals and bookings starting later leave the room to its current agreement
+        # until _cron_start_agreements hands it over on their start date
+        (agreements - started).room_id.filtered(lambda r: r.status == 'vacant').write({'status': 'booked'})
+        self.env['property.room']._invalidate_availability_index()
+    
+    def _hand_over_rooms(self):
+        """Make the agreements the current ones of their rooms and tenants"""
+        # A room handed over twice in one batch (e.g. with its renewal) shows the latest agreement
+        latest = {}
+        for agreement in self.sorted('start_date'):
+            latest[agreement.room_id.id] = agreement
+        rooms = self.room_id
+        rooms.write({'status': 'occupied'})
+        _write_references(rooms, ['current_tenant_id', 'current_agreement_id'], {
+            room_id: (agreement.tenant_id.id, agreement.id) for room_id, agreement in latest.items()
+        })
+        self.tenant_id.write({'status': 'active'})
+        _write_references(self.tenant_id, ['current_room_id'], {
+            agreement.tenant_id.id: (room_id,) for room_id, agreement in latest.items()
+        })
+    
+    @api.model
+    def _cron_start_agreements(self):
+        """Cron job handing the rooms over to the active agreements that started since the last run"""
+        today = fields.Date.context_today(self)
+        agreements = self.search([
+            ('state', '=', 'active'),
+            ('start_date', '<=', today),
+            ('end_date', '>=', today),
+        ]).filtered(lambda a: a.room_id.current_agreement_id != a)
+        if agreements:
+            agreements._lock_rooms()
+            agreements._hand_over_rooms()
+            self.env['property.room']._invalidate_availability_index()
     
     def action_terminate(self):
-        for record in self:
-            # Update room status
-            record.room_id.write({
-                'status': 'vacant',
-                'current_tenant_id': False,
-                'current_agreement_id': False,
-            })
-            
-            # Update tenant status
-            record.tenant_id.write({
-                'current_room_id': False,
-            })
-            
-            record.write({'state': 'terminated'})
+        agreements = self.filtered(lambda a: a.state == 'active')
+        if not agreements:
+            return
+        agreements._lock_rooms()
+        agreements.write({'state': 'terminated'})
+        # Rooms already handed over to a renewal or another agreement stay occupied
+        rooms = agreements.room_id.filtered(
+            lambda r: not r.current_agreement_id or r.current_agreement_id in agreements)
+        rooms.write({
+            'status': 'vacant',
+            'current_tenant_id': False,
+            'current_agreement_id': False,
+        })
+        agreements.tenant_id.filtered(lambda t: t.current_room_id in rooms).write({'current_room_id': False})
     
     def action_renew(self):
         return {
@@ -228,6 +385,7 @@ class PropertyAgreement(models.Model):
                 'default_deposit_amount': self.deposit_amount,
                 'default_start_date': self.end_date + timedelta(days=1),
                 'default_end_date': self.end_date + timedelta(days=365),
+                'default_renewal_of_id': self.id,
             }
         }
     
@@ -244,19 +402,23 @@ class PropertyAgreement(models.Model):
         return invoice_ref
     
     @api.model
-    def _cron_check_expiring_agreements(self):
-        """Cron job to check for expiring agreements"""
+    def _prepare_expiring_reminders(self):
+        """Reminders for the managers of active agreements expiring within 30 days"""
         expiring_date = fields.Date.today() + timedelta(days=30)
         expiring_agreements = self.search([
             ('state', '=', 'active'),
             ('end_date', '<=', expiring_date),
         ])
-        
-        for agreement in expiring_agreements:
-            # Send notification or create activity
-            agreement.activity_schedule(
-                'mail.mail_activity_data_todo',
-                summary=f'Agreement expiring for {agreement.tenant_id.name}',
-                note=f'Agreement for room {agreement.room_id.name} expires on {agreement.end_date}',
-                user_id=agreement.room_id.property_id.manager_id.id,
-            )
+        return [Reminder(
+            agreement,
+            agreement.room_id.property_id.manager_id.id,
+            f'Agreement expiring for {agreement.tenant_id.name}',
+            f'Agreement for room {agreement.room_id.name} expires on {agreement.end_date}',
+            None,
+        ) for agreement in expiring_agreements]
+    
+    @api.model
+    @instrument('property.agreement._cron_check_expiring_agreements', category='cron')
+    def _cron_check_expiring_agreements(self):
+        """Cron job to check for expiring agreements"""
+        self.env['property.reminder']._schedule(self._prepare_expiring_reminders())
@@ -1,4 +1,117 @@
+import bisect
+from collections import defaultdict
+from datetime import timedelta
+
 from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+
+from .property_bulk import bulk_mode
+from .property_perf import instrument
+
+
+def _amount_key(amount):
+    """Amounts are hashed in cents so float noise never splits a bucket"""
+    return int(round((amount or 0.0) * 100))
+
+
+class OpenItemIndex:
+    """Hash index of open collections/invoices used by the transfer matcher.
+
+    Items are plain tuples ``(kind, id, amount, tenant_id, date_ordinal, refs)``
+    bucketed by (amount, tenant) and by amount alone. Buckets are kept sorted by
+    date so a transfer only looks at the items inside its date window.
+    """
+
+    def __init__(self, items):
+        self.by_tenant = defaultdict(list)
+        self.by_amount = defaultdict(list)
+        self.consumed = set()
+        for item in sorted(items, key=lambda i: i[4]):
+            key = _amount_key(item[2])
+            self.by_amount[key].append(item)
+            if item[3]:
+                self.by_tenant[(key, item[3])].append(item)
+        self._dates = {}
+
+    def _window(self, bucket_key, bucket, date_ordinal, window_days):
+        dates = self._dates.get(bucket_key)
+        if dates is None:
+            dates = self._dates[bucket_key] = [item[4] for item in bucket]
+        lo = bisect.bisect_left(dates, date_ordinal - window_days)
+        hi = bisect.bisect_right(dates, date_ordinal + window_days)
+        return bucket[lo:hi]
+
+    def candidates(self, amount, tenant_id, date_ordinal, window_days):
+        key = _amount_key(amount)
+        if tenant_id and (key, tenant_id) in self.by_tenant:
+            bucket_key = (key, tenant_id)
+            bucket = self.by_tenant[bucket_key]
+        else:
+            bucket_key = key
+            bucket = self.by_amount.get(key, [])
+        return [
+            item for item in self._window(bucket_key, bucket, date_ordinal, window_days)
+            if (item[0], item[1]) not in self.consumed
+        ]
+
+
+def score_candidate(item, tenant_id, date_ordinal, refs, window_days):
+    """Score an amount-equal candidate between 0.5 and 1.0"""
+    score = 0.5
+    if tenant_id and item[3] == tenant_id:
+        score += 0.25
+    if window_days:
+        score += 0.15 * (1 - abs(item[4] - date_ordinal) / (window_days + 1))
+    if refs and item[5] and refs & item[5]:
+        score += 0.25
+    return min(score, 1.0)
+
+
+def match_transfers(transfers, index, window_days, threshold, margin):
+    """Match transfer tuples ``(id, amount, tenant_id, date_ordinal, refs)``.
+
+    Returns ``(matched, ambiguous)`` where ``matched`` maps a transfer id to
+    ``(item, score)`` and ``ambiguous`` maps a transfer id to the scored
+    candidate list. Items are consumed greedily in transfer date order.
+    """
+    matched = {}
+    ambiguous = {}
+    for transfer_id, amount, tenant_id, date_ordinal, refs in sorted(transfers, key=lambda t: t[3]):
+        scored = sorted(
+            ((score_candidate(item, tenant_id, date_ordinal, refs, window_days), item)
+             for item in index.candidates(amount, tenant_id, date_ordinal, window_days)),
+            key=lambda pair: pair[0], reverse=True,
+        )
+        if not scored:
+            continue
+        best_score, best_item = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        if best_score >= threshold and best_score - runner_up >= margin:
+            matched[transfer_id] = (best_item, best_score)
+            index.consumed.add((best_item[0], best_item[1]))
+        else:
+            ambiguous[transfer_id] = scored
+    return matched, ambiguous
+
+
+def _date_ranges(dates, window_days):
+    """The ``date ± window_days`` intervals of ``dates``, merged where they overlap, as (from, to) pairs"""
+    ranges = []
+    for day in sorted(set(dates)):
+        date_from, date_to = day - timedelta(days=window_days), day + timedelta(days=window_days)
+        if ranges and date_from <= ranges[-1][1] + timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], date_to)
+        else:
+            ranges.append((date_from, date_to))
+    return ranges
+
+
+def _reference_tokens(*values):
+    tokens = set()
+    for value in values:
+        if value:
+            tokens.update(token.upper() for token in value.replace(',', ' ').split() if len(token) > 3)
+    return frozenset(tokens)
 
 
 class PropertyBankTransfer(models.Model):
@@ -6,22 +119,202 @@ class PropertyBankTransfer(models.Model):
     _description = 'Bank Transfer Record'
     _inherit = ['mail.thread', 'mail.activity.mixin']
 
+    # Only the best candidates of an ambiguous transfer are kept for review
+    MAX_CANDIDATES = 5
+
     name = fields.Char('Reference', required=True)
     date = fields.Date('Transfer Date', required=True, default=fields.Date.today)
     amount = fields.Monetary('Amount', required=True, currency_field='currency_id')
-    
+
     tenant_id = fields.Many2one('property.tenant', 'Tenant')
     collection_id = fields.Many2one('property.collection', 'Related Collection')
-    
+    invoice_id = fields.Many2one('property.invoice', 'Related Invoice')
+
     bank_name = fields.Char('Bank Name')
     account_number = fields.Char('Account Number')
     transaction_id = fields.Char('Transaction ID')
-    
+
     status = fields.Selection([
         ('pending', 'Pending'),
         ('verified', 'Verified'),
         ('reconciled', 'Reconciled'),
     ], default='pending')
-    
-    currency_id = fields.Many2one('res.currency', 'Currency', 
+
+    # Matching
+    match_state = fields.Selection([
+        ('unmatched', 'Unmatched'),
+        ('ambiguous', 'Needs Review'),
+        ('matched', 'Auto Matched'),
+        ('manual', 'Manually Matched'),
+    ], string='Match Status', default='unmatched', index=True, copy=False)
+    match_score = fields.Float('Match Score', digits=(3, 2), copy=False)
+    candidate_ids = fields.One2many('property.bank.transfer.candidate', 'transfer_id', 'Match Candidates')
+
+    currency_id = fields.Many2one('res.currency', 'Currency',
                                   default=lambda self: self.env.company.currency_id)
+
+    _sql_constraints = [
+        ('transaction_id_unique', 'unique(transaction_id)',
+         'A bank transfer with this transaction ID already exists!'),
+    ]
+
+    @api.constrains('transaction_id')
+    def _check_transaction_id_unique(self):
+        """Fallback for databases where the UNIQUE constraint could not be added because of
+        existing duplicates; only a transaction ID new to its group is refused"""
+        keys = [key for key in self.mapped('transaction_id') if key]
+        if len(keys) != len(set(keys)) or (keys and self._read_group(
+                [('transaction_id', 'in', keys), ('id', 'not in', self.ids)], ['transaction_id'])):
+            raise ValidationError(_('A bank transfer with this transaction ID already exists!'))
+
+    @api.model
+    def _get_match_settings(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return {
+            'window_days': int(ICP.get_param('property_management_lite.bank_match_window_days', 7)),
+            'threshold': float(ICP.get_param('property_management_lite.bank_match_threshold', 0.8)),
+            'margin': float(ICP.get_param('property_management_lite.bank_match_margin', 0.1)),
+        }
+
+    @api.model
+    def _fetch_open_items(self, date_ranges):
+        """Open collections and invoices dated in ``date_ranges`` not yet linked to a transfer, as index tuples"""
+        self.env.flush_all()
+        cr = self.env.cr
+        ranges = [[date_from for date_from, _date_to in date_ranges], [date_to for _date_from, date_to in date_ranges]]
+        cr.execute("""
+            SELECT c.id, c.amount_collected, c.tenant_id, c.date,
+                   c.receipt_number, c.reference_number, c.invoice_reference
+              FROM unnest(%s::date[], %s::date[]) AS r (date_from, date_to)
+              JOIN property_collection c ON c.date BETWEEN r.date_from AND r.date_to
+             WHERE c.status IN ('collected', 'verified')
+               AND c.payment_method = 'bank_transfer'
+               AND NOT EXISTS (SELECT 1 FROM property_bank_transfer t WHERE t.collection_id = c.id)
+        """, ranges)
+        items = [
+            ('collection', cid, amount, tenant_id, date.toordinal(), _reference_tokens(*refs))
+            for cid, amount, tenant_id, date, *refs in cr.fetchall()
+        ]
+        cr.execute("""
+            SELECT i.id, i.amount_residual, i.tenant_id, i.due_date, i.name
+              FROM unnest(%s::date[], %s::date[]) AS r (date_from, date_to)
+              JOIN property_invoice i ON i.due_date BETWEEN r.date_from AND r.date_to
+             WHERE i.state IN ('posted', 'partial')
+               AND i.amount_residual > 0
+               AND NOT EXISTS (SELECT 1 FROM property_bank_transfer t WHERE t.invoice_id = i.id)
+        """, ranges)
+        items += [
+            ('invoice', iid, amount, tenant_id, due_date.toordinal(), _reference_tokens(name))
+            for iid, amount, tenant_id, due_date, name in cr.fetchall()
+        ]
+        return items
+
+    def _auto_match(self):
+        """Match the pending transfers in self against open items in bulk"""
+        transfers = self.filtered(
+            lambda t: t.status != 'reconciled'
+            and t.match_state in ('unmatched', 'ambiguous')
+            and not t.collection_id and not t.invoice_id
+        )
+        if not transfers:
+            return {'matched': 0, 'ambiguous': 0}
+
+        settings = self._get_match_settings()
+        window = settings['window_days']
+        # Only the days around each transfer, not everything between the oldest and newest one
+        index = OpenItemIndex(self._fetch_open_items(_date_ranges(transfers.mapped('date'), window)))
+        matched, ambiguous = match_transfers(
+            [(t.id, t.amount, t.tenant_id.id, t.date.toordinal(), _reference_tokens(t.name, t.transaction_id))
+             for t in transfers],
+            index, window, settings['threshold'], settings['margin'],
+        )
+
+        transfers.candidate_ids.unlink()
+        for transfer in transfers.filtered(lambda t: t.id in matched):
+            (kind, item_id, *_rest), score = matched[transfer.id]
+            transfer.write({
+                'collection_id': item_id if kind == 'collection' else False,
+                'invoice_id': item_id if kind == 'invoice' else False,
+                'match_state': 'matched',
+                'match_score': score,
+                'status': 'reconciled',
+            })
+        transfers.filtered(lambda t: t.id in matched)._register_invoice_payments()
+
+        candidate_vals = []
+        for transfer_id, scored in ambiguous.items():
+            for score, (kind, item_id, *_rest) in scored[:self.MAX_CANDIDATES]:
+                candidate_vals.append({
+                    'transfer_id': transfer_id,
+                    'collection_id': item_id if kind == 'collection' else False,
+                    'invoice_id': item_id if kind == 'invoice' else False,
+                    'score': score,
+                })
+        self.env['property.bank.transfer.candidate'].create(candidate_vals)
+        transfers.browse(list(ambiguous)).write({'match_state': 'ambiguous'})
+        return {'matched': len(matched), 'ambiguous': len(ambiguous)}
+
+    def _register_invoice_payments(self):
+        """Pay the invoices matched by the transfers, up to what each still owes"""
+        vals_list = []
+        for transfer in self.filtered('invoice_id'):
+            amount = min(transfer.amount, transfer.invoice_id.amount_residual)
+            if transfer.currency_id.compare_amounts(amount, 0) <= 0:
+                continue
+            vals_list.append({
+                'invoice_id': transfer.invoice_id.id,
+                'amount': amount,
+                'date': transfer.date,
+                'payment_method': 'bank_transfer',
+                'reference': transfer.transaction_id or transfer.name,
+            })
+        for payment in self.env['property.payment'].create(vals_list):
+            payment.action_post()
+
+    def action_auto_match(self):
+        result = self._auto_match()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Bank Transfer Matching'),
+                'message': _('%(matched)s transfers matched, %(ambiguous)s need review.', **result),
+                'type': 'success',
+            }
+        }
+
+    @api.model
+    @instrument('property.bank.transfer._cron_auto_match', category='cron')
+    def _cron_auto_match(self):
+        """Cron job to match pending bank transfers"""
+        bulk_mode(self).search([
+            ('status', '!=', 'reconciled'),
+            ('match_state', 'in', ['unmatched', 'ambiguous']),
+            ('collection_id', '=', False),
+            ('invoice_id', '=', False),
+        ])._auto_match()
+
+
+class PropertyBankTransferCandidate(models.Model):
+    _name = 'property.bank.transfer.candidate'
+    _description = 'Bank Transfer Match Candidate'
+    _order = 'transfer_id, score desc'
+
+    transfer_id = fields.Many2one('property.bank.transfer', 'Transfer', required=True, ondelete='cascade', index=True)
+    collection_id = fields.Many2one('property.collection', 'Collection', ondelete='cascade')
+    invoice_id = fields.Many2one('property.invoice', 'Invoice', ondelete='cascade')
+    score = fields.Float('Score', digits=(3, 2))
+
+    def action_accept(self):
+        self.ensure_one()
+        if self.transfer_id.status == 'reconciled':
+            raise UserError(_('This transfer is already reconciled.'))
+        self.transfer_id.write({
+            'collection_id': self.collection_id.id,
+            'invoice_id': self.invoice_id.id,
+            'match_state': 'manual',
+            'match_score': self.score,
+            'status': 'reconciled',
+        })
+        self.transfer_id._register_invoice_payments()
+        self.transfer_id.candidate_ids.unlink()
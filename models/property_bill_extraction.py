@@ -0,0 +1,133 @@
+import io
+import logging
+import re
+from datetime import datetime
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+try:
+    from odoo.tools.pdf import PdfFileReader
+except ImportError:
+    PdfFileReader = None
+    _logger.warning("No PDF reader available, bill text extraction is disabled")
+
+BATCH_SIZE_PARAM = 'property_management_lite.bill_extraction_batch_size'
+
+EXTRACTION_FIELDS = [
+    ('vendor', 'Vendor'),
+    ('amount', 'Amount'),
+    ('date', 'Date'),
+    ('reference', 'Reference'),
+]
+
+
+def _page_text(page):
+    extract = getattr(page, 'extract_text', None) or page.extractText
+    return extract() or ''
+
+
+def extract_pdf_text(source):
+    """Text layer of a PDF given as a filestore path or raw bytes, '' when there is none"""
+    if PdfFileReader is None:
+        return ''
+    try:
+        stream = open(source, 'rb') if isinstance(source, str) else io.BytesIO(source)
+        with stream:
+            if stream.read(5) != b'%PDF-':
+                return ''
+            stream.seek(0)
+            reader = PdfFileReader(stream, strict=False)
+            return '\n'.join(_page_text(page) for page in reader.pages).strip()
+    except Exception:
+        # Damaged or encrypted bills are left for the clerk, like scans without a text layer
+        return ''
+
+
+def extract_texts(sources):
+    """Texts of the given PDFs, extracted in the calling worker.
+
+    No process pool is forked from the threaded server: children would
+    inherit held locks and open database sockets. Throughput comes from
+    the several extraction scheduled actions claiming separate batches instead.
+    """
+    return [extract_pdf_text(source) for source in sources]
+
+
+def _parse_amount(value):
+    try:
+        return float(re.sub(r'[^\d.]', '', value.replace(',', '')))
+    except ValueError:
+        return None
+
+
+def _parse_date(value, date_format):
+    try:
+        return datetime.strptime(value.strip(), date_format).date()
+    except ValueError:
+        return None
+
+
+def parse_bill_text(text, rules):
+    """Vendor, amount, date and reference found in ``text``.
+
+    ``rules`` are ``(field, pattern, vendor_id, date_format)`` tuples in
+    priority order; the first rule that matches and parses wins its field.
+    """
+    values = {}
+    for field, pattern, vendor_id, date_format in rules:
+        if field in values:
+            continue
+        match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+        if not match:
+            continue
+        if field == 'vendor':
+            values[field] = vendor_id
+            continue
+        raw = match.group(1) if match.groups() else match.group(0)
+        if field == 'amount':
+            value = _parse_amount(raw)
+        elif field == 'date':
+            value = _parse_date(raw, date_format or '%d/%m/%Y')
+        else:
+            value = raw.strip()
+        if value:
+            values[field] = value
+    return values
+
+
+class PropertyExpenseExtractionRule(models.Model):
+    _name = 'property.expense.extraction.rule'
+    _description = 'Bill Extraction Rule'
+    _order = 'sequence, id'
+
+    name = fields.Char('Rule Name', required=True)
+    sequence = fields.Integer('Sequence', default=10)
+    active = fields.Boolean('Active', default=True)
+
+    field = fields.Selection(EXTRACTION_FIELDS, string='Extracts', required=True, default='amount')
+    pattern = fields.Char('Pattern', required=True,
+                          help="Regular expression searched in the bill text, case-insensitive. "
+                               "The first group is the value; vendor rules only need to match.")
+    vendor_id = fields.Many2one('res.partner', 'Vendor', domain=[('supplier_rank', '>', 0)],
+                                help="Vendor set on the expense when the pattern matches")
+    date_format = fields.Char('Date Format', default='%d/%m/%Y',
+                              help="strptime format of the captured date, e.g. %d/%m/%Y or %d %b %Y")
+
+    @api.constrains('field', 'pattern', 'vendor_id')
+    def _check_pattern(self):
+        for rule in self:
+            try:
+                compiled = re.compile(rule.pattern)
+            except re.error as e:
+                raise ValidationError(_('Invalid pattern in rule %(rule)s: %(error)s', rule=rule.name, error=e))
+            if rule.field == 'vendor' and not rule.vendor_id:
+                raise ValidationError(_('Vendor rule %s needs a vendor.', rule.name))
+            if rule.field != 'vendor' and not compiled.groups:
+                raise ValidationError(_('Rule %s must capture the value in a group.', rule.name))
+
+    @api.model
+    def _get_parser_rules(self):
+        return [(rule.field, rule.pattern, rule.vendor_id.id, rule.date_format) for rule in self.search([])]
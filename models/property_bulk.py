@@ -0,0 +1,36 @@
+from collections import defaultdict
+
+# Records generated by crons, imports and batch wizards: no tracking values,
+# creation message, followers or auto-subscription on each record
+BULK_CONTEXT = {
+    'tracking_disable': True,
+    'mail_notrack': True,
+    'mail_create_nolog': True,
+    'mail_create_nosubscribe': True,
+    'mail_auto_subscribe_no_notify': True,
+}
+
+
+def bulk_mode(records):
+    """``records`` with the bulk context, for system-generated batches"""
+    return records.with_context(**BULK_CONTEXT)
+
+
+def post_batch_summary(records, summary, amount_field=None):
+    """Log one note per property summarizing a batch, in place of the per-record chatter.
+
+    ``summary`` names the operation, e.g. "Monthly invoices generated"; the
+    note adds the number of records and, with ``amount_field``, their total.
+    """
+    by_property = defaultdict(list)
+    for record in records:
+        by_property[record.property_id].append(record)
+    for prop, batch in by_property.items():
+        if not prop:
+            continue
+        if amount_field:
+            body = records.env._('%(summary)s: %(count)s, for a total of %(amount)s.',
+                                 summary=summary, count=len(batch), amount=sum(record[amount_field] for record in batch))
+        else:
+            body = records.env._('%(summary)s: %(count)s.', summary=summary, count=len(batch))
+        bulk_mode(prop.sudo()).message_post(body=body, subtype_xmlid='mail.mt_note')
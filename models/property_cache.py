@@ -0,0 +1,37 @@
+# Cached lookups are keyed by a version read from a PostgreSQL sequence;
+# bumping the sequence takes no row lock and leaves every other ormcache alone
+
+
+def create_version_sequence(cr, name):
+    cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {name}")
+
+
+def get_cache_version(cr, name):
+    cr.execute(f"SELECT last_value FROM {name}")
+    return cr.fetchone()[0]
+
+
+def has_pending_changes(env, name):
+    """Whether this transaction changed data cached under ``name``, not committed yet.
+
+    Such a transaction must read the data uncached: a value built from its
+    pending writes would outlive a rollback in the shared cache.
+    """
+    return bool(env.cr.postcommit.data.get(name))
+
+
+def bump_cache_version(env, name):
+    """Move the cache version forward once the transaction commits.
+
+    Until then the transaction reads around the cache (see
+    ``has_pending_changes``) and other workers keep the committed value.
+    """
+    postcommit = env.cr.postcommit
+    if not postcommit.data.get(name):
+        postcommit.data[name] = True
+        registry = env.registry
+
+        @postcommit.add
+        def bump_version():
+            with registry.cursor() as cr:
+                cr.execute("SELECT nextval(%s)", [name])
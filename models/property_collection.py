@@ -1,11 +1,20 @@
-from odoo import models, fields, api, _
+from collections import defaultdict
+
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
 
+from .property_perf import instrument
+from .property_reminder import Reminder
+
+# Fields the cached portal pages of a tenant depend on; writing any other
+# field leaves the tenant's portal cache version alone
+PORTAL_FIELDS = {'tenant_id', 'date', 'amount_collected', 'status', 'collection_type'}
+
 
 class PropertyCollection(models.Model):
     _name = 'property.collection'
     _description = 'Rent Collection'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'property.pnl.source.mixin']
     _order = 'date desc, id desc'
 
     name = fields.Char('Collection Reference', compute='_compute_name', store=True)
@@ -19,6 +28,8 @@ class PropertyCollection(models.Model):
     room_id = fields.Many2one('property.room', 'Room', required=True, tracking=True)
     property_id = fields.Many2one(related='room_id.property_id', string='Property', store=True)
     agreement_id = fields.Many2one('property.agreement', 'Agreement')
+    round_id = fields.Many2one('property.collection.round', 'Collection Round', readonly=True,
+                               index='btree_not_null', copy=False)
     
     # Payment Details
     payment_method = fields.Selection([
@@ -83,6 +94,48 @@ class PropertyCollection(models.Model):
     invoice_reference = fields.Char('Invoice Reference')
     payment_reference = fields.Char('Payment Reference')
     
+    # Offline Sync
+    sync_key = fields.Char('Sync Key', copy=False, readonly=True,
+                           help="Idempotency key sent by the collector app for offline collections")
+    
+    _sql_constraints = [
+        ('sync_key_unique', 'unique(sync_key)', 'A collection with this sync key was already uploaded!'),
+    ]
+    
+    def init(self):
+        # Portal listings filter by tenant and page by (date, id) descending
+        tools.create_index(self.env.cr, 'property_collection_tenant_date_idx',
+                           self._table, ['tenant_id', 'date DESC', 'id DESC'])
+        # Collection rounds look up the last collection of every room
+        tools.create_index(self.env.cr, 'property_collection_room_date_idx',
+                           self._table, ['room_id', 'date DESC', 'id DESC'])
+        # Agreements keep the date of their last rent collection
+        tools.create_index(self.env.cr, 'property_collection_agreement_rent_date_idx',
+                           self._table, ['agreement_id', 'date DESC'],
+                           where="collection_type = 'rent' AND status IN ('collected', 'verified', 'deposited')")
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        collections = super().create(vals_list)
+        self.env['property.tenant']._bump_portal_cache_version(collections.tenant_id.ids)
+        return collections
+    
+    def write(self, vals):
+        if not PORTAL_FIELDS.intersection(vals):
+            return super().write(vals)
+        tenant_ids = self.tenant_id.ids
+        res = super().write(vals)
+        if 'tenant_id' in vals:
+            tenant_ids += self.tenant_id.ids
+        self.env['property.tenant']._bump_portal_cache_version(tenant_ids)
+        return res
+    
+    def unlink(self):
+        tenant_ids = self.tenant_id.ids
+        res = super().unlink()
+        self.env['property.tenant']._bump_portal_cache_version(tenant_ids)
+        return res
+    
     @api.depends('tenant_id', 'room_id', 'date', 'collection_type')
     def _compute_name(self):
         for record in self:
@@ -134,10 +187,44 @@ class PropertyCollection(models.Model):
     
     def action_collect(self):
         self.write({'status': 'collected'})
-        # Generate receipt number
-        if not self.receipt_number:
-            sequence = self.env['ir.sequence'].next_by_code('property.collection') or '/'
-            self.receipt_number = sequence
+        self._assign_receipt_numbers()
+    
+    def _assign_receipt_numbers(self):
+        """Number the receipts of self with one reservation per sequence.
+
+        Properties with gapless receipts draw from their own no-gap sequence, so
+        only collectors of the same property wait on each other; all other
+        receipts come from the shared, pooled collection sequence. The numbers
+        are written back with a single UPDATE.
+        """
+        by_property = defaultdict(lambda: self.browse())
+        shared = self.browse()
+        for collection in self.filtered(lambda c: not c.receipt_number).sorted('id'):
+            if collection.property_id.gapless_receipts:
+                by_property[collection.property_id] |= collection
+            else:
+                shared |= collection
+        
+        batches = []
+        if shared:
+            batches.append((shared, self.env['ir.sequence'].next_block_by_code(
+                'property.collection', len(shared), pooled=True)))
+        for property_rec, collections in by_property.items():
+            batches.append((collections, property_rec._get_receipt_sequence()._reserve_block(len(collections))))
+        ids, numbers = [], []
+        for collections, receipt_numbers in batches:
+            ids += collections.ids
+            numbers += [receipt_number or '/' for receipt_number in receipt_numbers]
+        if not ids:
+            return
+        self.flush_recordset(['receipt_number'])
+        self.env.cr.execute("""
+            UPDATE property_collection c
+               SET receipt_number = n.receipt_number
+              FROM unnest(%s::int[], %s::varchar[]) AS n(id, receipt_number)
+             WHERE c.id = n.id
+        """, [ids, numbers])
+        self.browse(ids).invalidate_recordset(['receipt_number'])
     
     def action_verify(self):
         self.write({
@@ -163,36 +250,38 @@ class PropertyCollection(models.Model):
         }
     
     @api.model
-    def create_daily_collections_reminder(self):
-        """Cron job to create daily collection reminders"""
+    def _prepare_due_reminders(self):
+        """Rent collection reminders due today for the managers of active agreements"""
         today = fields.Date.today()
+        reminders = []
         
         # Find all active agreements
         active_agreements = self.env['property.agreement'].search([('state', '=', 'active')])
         
         for agreement in active_agreements:
             # Check if collection is due based on payment frequency
-            last_collection = self.search([
-                ('agreement_id', '=', agreement.id),
-                ('collection_type', '=', 'rent'),
-                ('status', 'in', ['collected', 'verified', 'deposited'])
-            ], order='date desc', limit=1)
-            
             if agreement.payment_frequency == 'monthly':
                 # Monthly payment due on specific day
                 if today.day == agreement.payment_day:
-                    self._create_due_reminder(agreement, today)
+                    reminders.append(self._prepare_due_reminder(agreement, today))
             elif agreement.payment_frequency == 'daily':
                 # Daily payment
-                if not last_collection or last_collection.date < today:
-                    self._create_due_reminder(agreement, today)
-    
-    def _create_due_reminder(self, agreement, due_date):
-        """Create a due reminder activity"""
-        agreement.activity_schedule(
-            'mail.mail_activity_data_todo',
-            summary=f'Rent Collection Due - {agreement.tenant_id.name}',
-            note=f'Monthly rent of {agreement.rent_amount} is due for room {agreement.room_id.name}',
-            date_deadline=due_date,
-            user_id=agreement.room_id.property_id.manager_id.id,
+                last_date = agreement.last_rent_collection_date
+                if not last_date or last_date < today:
+                    reminders.append(self._prepare_due_reminder(agreement, today))
+        return reminders
+    
+    @api.model
+    @instrument('property.collection.create_daily_collections_reminder', category='cron')
+    def create_daily_collections_reminder(self):
+        """Cron job to create daily collection reminders"""
+        self.env['property.reminder']._schedule(self._prepare_due_reminders())
+    
+    def _prepare_due_reminder(self, agreement, due_date):
+        return Reminder(
+            agreement,
+            agreement.room_id.property_id.manager_id.id,
+            f'Rent Collection Due - {agreement.tenant_id.name}',
+            f'Monthly rent of {agreement.rent_amount} is due for room {agreement.room_id.name}',
+            due_date,
         )
@@ -0,0 +1,326 @@
+import logging
+import time
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+YEARS_PARAM = 'property_management_lite.collection_archive_years'
+BATCH_SIZE_PARAM = 'property_management_lite.collection_archive_batch_size'
+
+# Columns copied from property_collection to the archive, unchanged: every
+# stored column of a collection, so nothing is lost when the row is deleted.
+# The receipt image is an attachment and follows its record in _repoint_records.
+ARCHIVE_COLUMNS = [
+    'name', 'date', 'amount_collected', 'tenant_id', 'room_id', 'property_id', 'agreement_id',
+    'round_id', 'payment_method', 'reference_number', 'collection_type', 'period_from', 'period_to',
+    'status', 'notes', 'collected_by', 'verified_by', 'verification_date', 'receipt_number',
+    'receipt_filename', 'currency_id', 'bank_id', 'bank_account', 'due_date', 'days_late', 'late_fee',
+    'invoice_reference', 'payment_reference', 'sync_key',
+]
+
+
+def _collection_selection(field):
+    return lambda self: self.env['property.collection']._fields[field].selection
+
+
+class PropertyCollectionArchive(models.Model):
+    _name = 'property.collection.archive'
+    _description = 'Archived Rent Collection'
+    _order = 'date desc, id desc'
+
+    original_id = fields.Integer('Original ID', readonly=True, index=True,
+                                 help="ID the collection had before it was archived")
+    name = fields.Char('Collection Reference', readonly=True)
+    date = fields.Date('Collection Date', readonly=True, index=True)
+    amount_collected = fields.Monetary('Amount Collected', currency_field='currency_id', readonly=True)
+
+    # Relations
+    tenant_id = fields.Many2one('property.tenant', 'Tenant', readonly=True, index=True)
+    room_id = fields.Many2one('property.room', 'Room', readonly=True, index=True)
+    property_id = fields.Many2one('property.property', 'Property', readonly=True)
+    agreement_id = fields.Many2one('property.agreement', 'Agreement', readonly=True)
+    round_id = fields.Many2one('property.collection.round', 'Collection Round', readonly=True)
+
+    # Payment Details
+    payment_method = fields.Selection(_collection_selection('payment_method'), string='Payment Method', readonly=True)
+    reference_number = fields.Char('Reference Number', readonly=True)
+    collection_type = fields.Selection(_collection_selection('collection_type'), string='Collection Type',
+                                       readonly=True)
+    period_from = fields.Date('Period From', readonly=True)
+    period_to = fields.Date('Period To', readonly=True)
+    status = fields.Selection(_collection_selection('status'), string='Status', readonly=True)
+
+    # Additional Information
+    notes = fields.Text('Notes', readonly=True)
+    collected_by = fields.Many2one('res.users', 'Collected By', readonly=True)
+    verified_by = fields.Many2one('res.users', 'Verified By', readonly=True)
+    verification_date = fields.Datetime('Verification Date', readonly=True)
+    receipt_number = fields.Char('Receipt Number', readonly=True)
+    receipt_image = fields.Binary('Receipt Image', readonly=True)
+    receipt_filename = fields.Char('Receipt Filename', readonly=True)
+    bank_id = fields.Many2one('res.bank', 'Bank', readonly=True)
+    bank_account = fields.Char('Bank Account', readonly=True)
+    due_date = fields.Date('Due Date', readonly=True)
+    days_late = fields.Integer('Days Late', readonly=True)
+    late_fee = fields.Monetary('Late Fee', currency_field='currency_id', readonly=True)
+    invoice_reference = fields.Char('Invoice Reference', readonly=True)
+    payment_reference = fields.Char('Payment Reference', readonly=True)
+    sync_key = fields.Char('Sync Key', readonly=True)
+    currency_id = fields.Many2one('res.currency', 'Currency', readonly=True)
+    archived_on = fields.Datetime('Archived On', readonly=True)
+
+
+class PropertyCollectionSummary(models.Model):
+    _name = 'property.collection.summary'
+    _description = 'Archived Collections Summary'
+    _order = 'month desc, property_id, room_id'
+    _rec_name = 'month'
+
+    month = fields.Date('Month', readonly=True, required=True)
+    property_id = fields.Many2one('property.property', 'Property', readonly=True, index=True)
+    room_id = fields.Many2one('property.room', 'Room', readonly=True, required=True, index=True)
+    tenant_id = fields.Many2one('property.tenant', 'Tenant', readonly=True, required=True, index=True)
+    agreement_id = fields.Many2one('property.agreement', 'Agreement', readonly=True, index='btree_not_null')
+    collected_by = fields.Many2one('res.users', 'Collected By', readonly=True)
+    collection_type = fields.Selection(_collection_selection('collection_type'), string='Collection Type',
+                                       readonly=True, required=True)
+    status = fields.Selection(_collection_selection('status'), string='Status', readonly=True, required=True)
+    amount_collected = fields.Monetary('Amount Collected', currency_field='currency_id', readonly=True)
+    late_fee = fields.Monetary('Late Fees', currency_field='currency_id', readonly=True)
+    record_count = fields.Integer('# Collections', readonly=True)
+    currency_id = fields.Many2one('res.currency', 'Currency', readonly=True)
+
+    def init(self):
+        # One row per month, room, tenant, agreement, collector, type and status (the
+        # collector keeps the record rules of collections applicable); collections
+        # without an agreement or collector share one row, which a plain UNIQUE would not enforce
+        self.env.cr.execute("DROP INDEX IF EXISTS property_collection_summary_key_idx")
+        tools.create_unique_index(self.env.cr, 'property_collection_summary_collector_key_idx', self._table, [
+            'month', 'room_id', 'tenant_id', 'COALESCE(agreement_id, 0)', 'COALESCE(collected_by, 0)',
+            'collection_type', 'status'])
+
+    @api.model
+    def _get_archived_stats(self, fname, ids):
+        """Archived amount and last archived date per room, tenant or agreement, as {id: (amount, date)}"""
+        if not ids:
+            return {}
+        totals = {record.id: amount for record, amount in self._read_group(
+            [(fname, 'in', ids)], [fname], ['amount_collected:sum'])}
+        last_dates = {record.id: date for record, date in self.env['property.collection.archive']._read_group(
+            [(fname, 'in', ids)], [fname], ['date:max'])}
+        return {id_: (totals.get(id_, 0.0), last_dates.get(id_, False)) for id_ in totals.keys() | last_dates.keys()}
+
+
+class PropertyCollectionArchiveRun(models.Model):
+    _name = 'property.collection.archive.run'
+    _description = 'Collection Archiving Run'
+    _order = 'date desc, id desc'
+    _rec_name = 'date'
+
+    date = fields.Datetime('Run Date', required=True, default=fields.Datetime.now, readonly=True)
+    cutoff_date = fields.Date('Archived Before', readonly=True)
+    rows_archived = fields.Integer('Collections Archived', readonly=True)
+    rows_kept = fields.Integer('Kept (Still Referenced)', readonly=True,
+                               help="Closed collections left in place because invoices, payments or transfers point to them")
+    summary_rows = fields.Integer('Summary Rows', readonly=True)
+    duration = fields.Float('Duration (s)', digits=(16, 2), readonly=True)
+    rows_per_second = fields.Float('Rows per Second', digits=(16, 1), readonly=True)
+    done = fields.Boolean('Completed', readonly=True,
+                          help="Nothing was left to archive before the cutoff after this run")
+
+    @api.model
+    def _default_cutoff(self):
+        """First day of the oldest calendar year kept live"""
+        years = int(self.env['ir.config_parameter'].sudo().get_param(YEARS_PARAM, 2))
+        today = fields.Date.context_today(self)
+        return today.replace(year=today.year - max(years - 1, 0), month=1, day=1)
+
+    @api.model
+    def _referencing_columns(self):
+        """(table, column) of the stored references to collections that do not cascade"""
+        return sorted({
+            (model._table, field.name)
+            for model in self.env.registry.values()
+            if not model._abstract and not model._transient and model._auto
+            for field in model._fields.values()
+            if field.type == 'many2one' and field.comodel_name == 'property.collection'
+            and field.store and field.ondelete != 'cascade'
+        })
+
+    @api.model
+    def _eligible_condition(self, cutoff):
+        conditions = [SQL("c.date < %s AND c.status != 'draft'", cutoff)]
+        conditions.extend(
+            SQL("NOT EXISTS (SELECT 1 FROM %s r WHERE r.%s = c.id)", SQL.identifier(table), SQL.identifier(column))
+            for table, column in self._referencing_columns()
+        )
+        return SQL(' AND ').join(conditions)
+
+    @api.model
+    def _archive_batch(self, cutoff, batch_size):
+        """Move one batch of closed collections to the archive, returning {original id: archive id}.
+
+        Deleting, copying and summarizing happen in one statement, so the
+        summary can never drift from the rows that left the live table.
+        """
+        columns = SQL(', ').join(SQL.identifier(column) for column in ARCHIVE_COLUMNS)
+        moved_columns = SQL(', ').join(SQL('moved.%s', SQL.identifier(column)) for column in ARCHIVE_COLUMNS)
+        self.env.cr.execute(SQL("""
+            WITH batch AS (
+                SELECT c.id
+                  FROM property_collection c
+                 WHERE %(eligible)s
+              ORDER BY c.id
+                 LIMIT %(limit)s
+                   FOR UPDATE SKIP LOCKED
+            ), moved AS (
+                DELETE FROM property_collection c
+                 USING batch
+                 WHERE c.id = batch.id
+             RETURNING c.*
+            ), archived AS (
+                INSERT INTO property_collection_archive (original_id, %(columns)s, archived_on,
+                                                         create_uid, create_date, write_uid, write_date)
+                SELECT moved.id, %(moved_columns)s, now() at time zone 'UTC',
+                       %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                  FROM moved
+             RETURNING original_id, id
+            ), summarized AS (
+                INSERT INTO property_collection_summary AS s (
+                    month, property_id, room_id, tenant_id, agreement_id, collected_by, collection_type, status,
+                    amount_collected, late_fee, record_count, currency_id,
+                    create_uid, create_date, write_uid, write_date)
+                SELECT date_trunc('month', moved.date)::date, moved.property_id, moved.room_id,
+                       moved.tenant_id, moved.agreement_id, moved.collected_by, moved.collection_type, moved.status,
+                       SUM(moved.amount_collected), SUM(COALESCE(moved.late_fee, 0)), COUNT(*),
+                       MIN(moved.currency_id),
+                       %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                  FROM moved
+              GROUP BY 1, 2, 3, 4, 5, 6, 7, 8
+                    ON CONFLICT (month, room_id, tenant_id, COALESCE(agreement_id, 0), COALESCE(collected_by, 0),
+                                 collection_type, status)
+                    DO UPDATE
+                   SET amount_collected = s.amount_collected + EXCLUDED.amount_collected,
+                       late_fee = s.late_fee + EXCLUDED.late_fee,
+                       record_count = s.record_count + EXCLUDED.record_count,
+                       write_uid = EXCLUDED.write_uid,
+                       write_date = EXCLUDED.write_date
+            )
+            SELECT original_id, id FROM archived
+        """,
+            eligible=self._eligible_condition(cutoff),
+            limit=batch_size,
+            columns=columns,
+            moved_columns=moved_columns,
+            uid=self.env.uid,
+        ))
+        mapping = dict(self.env.cr.fetchall())
+        if mapping:
+            self._repoint_records(mapping)
+            self._mark_parents_modified(list(mapping.values()))
+        return mapping
+
+    @api.model
+    def _mark_parents_modified(self, archive_ids):
+        """Recompute what depends on the collections of the records whose rows just moved.
+
+        The raw DELETE bypasses the ORM, so the stored computes of agreements,
+        tenants, rooms and properties over ``collection_ids`` (e.g. the last
+        rent collection date) are marked here and recomputed right away, before
+        the cron commits the batch.
+        """
+        self.env.invalidate_all()
+        archives = self.env['property.collection.archive'].browse(archive_ids)
+        tenant_ids = archives.tenant_id.ids
+        for model in self.env.registry.values():
+            if model._abstract or model._transient:
+                continue
+            for field in model._fields.values():
+                if (field.type == 'one2many' and field.comodel_name == 'property.collection'
+                        and field.inverse_name in archives._fields
+                        and archives._fields[field.inverse_name].comodel_name == model._name):
+                    parents = archives[field.inverse_name]
+                    self.env[model._name].browse(parents.ids).modified([field.name])
+        self.env['property.tenant']._bump_portal_cache_version(tenant_ids)
+        self.env.flush_all()
+
+    @api.model
+    def _repoint_records(self, mapping):
+        """Hand receipts and chatter of the moved collections over to their archive rows"""
+        params = [list(mapping), list(mapping.values())]
+        self.env.cr.execute("""
+            UPDATE ir_attachment a
+               SET res_model = 'property.collection.archive', res_id = m.archive_id
+              FROM unnest(%s::int[], %s::int[]) AS m (original_id, archive_id)
+             WHERE a.res_model = 'property.collection' AND a.res_id = m.original_id
+        """, params)
+        self.env.cr.execute("""
+            UPDATE mail_message msg
+               SET model = 'property.collection.archive', res_id = m.archive_id
+              FROM unnest(%s::int[], %s::int[]) AS m (original_id, archive_id)
+             WHERE msg.model = 'property.collection' AND msg.res_id = m.original_id
+        """, params)
+        self.env.cr.execute(
+            "DELETE FROM mail_followers WHERE res_model = 'property.collection' AND res_id = ANY(%s)",
+            [list(mapping)])
+        self.env.cr.execute(
+            "DELETE FROM mail_activity WHERE res_model = 'property.collection' AND res_id = ANY(%s)",
+            [list(mapping)])
+
+    @api.model
+    def _count_kept(self, cutoff):
+        self.env.cr.execute(SQL(
+            "SELECT COUNT(*) FROM property_collection c WHERE c.date < %s AND c.status != 'draft'", cutoff))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _run(self, cutoff=None, max_batches=None):
+        """Archive closed collections batch by batch, committing between batches when run by the cron"""
+        cutoff = cutoff or self._default_cutoff()
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param(BATCH_SIZE_PARAM, 5000))
+        commit = self.env.context.get('archive_commit', False)
+        self.env.flush_all()
+        started = time.perf_counter()
+        archived = batches = 0
+        done = False
+        while max_batches is None or batches < max_batches:
+            mapping = self._archive_batch(cutoff, batch_size)
+            archived += len(mapping)
+            batches += 1
+            if commit:
+                self.env.cr.commit()
+            if len(mapping) < batch_size:
+                done = True
+                break
+
+        if not archived:
+            return self.browse()
+        duration = time.perf_counter() - started
+        # Forget cached collections and totals computed from the rows that just moved
+        self.env.invalidate_all()
+        self.env.cr.execute("SELECT COUNT(*) FROM property_collection_summary")
+        run = self.create({
+            'cutoff_date': cutoff,
+            'rows_archived': archived,
+            'rows_kept': self._count_kept(cutoff),
+            'summary_rows': self.env.cr.fetchone()[0],
+            'duration': duration,
+            'rows_per_second': archived / duration if duration else 0.0,
+            'done': done,
+        })
+        _logger.info("Archived %s collections dated before %s in %.1fs", archived, cutoff, duration)
+        return run
+
+    @api.model
+    def _cron_archive(self):
+        """Cron job to archive the collections of closed years"""
+        self.with_context(archive_commit=True)._run(max_batches=50)
+
+    def action_run(self):
+        self._run(max_batches=10)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
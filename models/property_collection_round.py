@@ -0,0 +1,175 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+from .property_bulk import bulk_mode
+
+
+class PropertyCollectionRound(models.Model):
+    _name = 'property.collection.round'
+    _description = 'Collection Round'
+    _inherit = ['mail.thread']
+    _order = 'date desc, id desc'
+
+    name = fields.Char('Round Reference', compute='_compute_name', store=True)
+    date = fields.Date('Collection Date', required=True, default=fields.Date.today, tracking=True)
+    collector_id = fields.Many2one('res.users', 'Collector', required=True,
+                                   default=lambda self: self.env.user, tracking=True)
+
+    # Scope
+    property_id = fields.Many2one('property.property', 'Property', required=True, tracking=True)
+    flat_id = fields.Many2one('property.flat', 'Flat', domain="[('property_id', '=', property_id)]",
+                              help="Leave empty to collect the whole property")
+
+    # Sheet
+    line_ids = fields.One2many('property.collection.round.line', 'round_id', 'Rooms')
+    collection_ids = fields.One2many('property.collection', 'round_id', 'Collections')
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Saved'),
+    ], string='Status', default='draft', tracking=True)
+
+    # Totals
+    expected_total = fields.Monetary('Expected', compute='_compute_totals', currency_field='currency_id')
+    collected_total = fields.Monetary('Entered', compute='_compute_totals', currency_field='currency_id')
+    collection_count = fields.Integer('Collections', compute='_compute_totals')
+    currency_id = fields.Many2one('res.currency', 'Currency',
+                                  default=lambda self: self.env.company.currency_id)
+
+    @api.depends('property_id', 'flat_id', 'date')
+    def _compute_name(self):
+        for record in self:
+            scope = record.flat_id.name or record.property_id.name or ''
+            record.name = f"ROUND/{record.date.strftime('%Y%m%d') if record.date else ''}/{scope}"
+
+    @api.depends('line_ids.expected_amount', 'line_ids.amount', 'collection_ids')
+    def _compute_totals(self):
+        for record in self:
+            record.expected_total = sum(record.line_ids.mapped('expected_amount'))
+            record.collected_total = sum(record.line_ids.mapped('amount'))
+            record.collection_count = len(record.collection_ids)
+
+    @api.onchange('property_id')
+    def _onchange_property_id(self):
+        if self.flat_id and self.flat_id.property_id != self.property_id:
+            self.flat_id = False
+
+    def _fetch_occupied_rooms(self):
+        """Occupied rooms of the round with tenant, agreement and last collection, in one query"""
+        self.ensure_one()
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT r.id, a.tenant_id, a.id, a.rent_amount, a.payment_method,
+                   last.date, last.amount_collected
+              FROM property_room r
+              JOIN property_agreement a ON a.room_id = r.id AND a.state = 'active'
+         LEFT JOIN LATERAL (
+                    SELECT c.date, c.amount_collected
+                      FROM property_collection c
+                     WHERE c.room_id = r.id AND c.status != 'cancelled'
+                  ORDER BY c.date DESC, c.id DESC
+                     LIMIT 1
+                   ) last ON TRUE
+             WHERE r.property_id = %s
+               AND (%s IS NULL OR r.flat_id = %s)
+          ORDER BY r.flat_id, r.room_number, a.start_date DESC
+        """, [self.property_id.id, self.flat_id.id or None, self.flat_id.id or None])
+        return self.env.cr.fetchall()
+
+    def action_load_rooms(self):
+        """Fill the sheet with every occupied room of the property or flat"""
+        for record in self:
+            if record.state != 'draft':
+                raise UserError(_('Only draft rounds can be reloaded.'))
+            record.line_ids.unlink()
+            seen_rooms = set()
+            vals_list = []
+            for room_id, tenant_id, agreement_id, rent, payment_method, last_date, last_amount \
+                    in record._fetch_occupied_rooms():
+                if room_id in seen_rooms:
+                    continue
+                seen_rooms.add(room_id)
+                vals_list.append({
+                    'round_id': record.id,
+                    'room_id': room_id,
+                    'tenant_id': tenant_id,
+                    'agreement_id': agreement_id,
+                    'expected_amount': rent,
+                    'payment_method': payment_method or 'cash',
+                    'last_collection_date': last_date,
+                    'last_collection_amount': last_amount,
+                })
+            self.env['property.collection.round.line'].create(vals_list)
+
+    def _prepare_collection_vals(self, line):
+        return {
+            'round_id': self.id,
+            'date': self.date,
+            'amount_collected': line.amount,
+            'tenant_id': line.tenant_id.id,
+            'room_id': line.room_id.id,
+            'agreement_id': line.agreement_id.id,
+            'payment_method': line.payment_method,
+            'reference_number': line.reference_number,
+            'collection_type': 'rent',
+            'status': 'collected',
+            'collected_by': self.collector_id.id,
+            'notes': line.notes,
+        }
+
+    def action_save(self):
+        """Create the collections of every filled line in one batch"""
+        self.ensure_one()
+        if self.state != 'draft':
+            raise UserError(_('This collection round is already saved.'))
+        lines = self.line_ids.filtered(lambda l: l.amount > 0 and not l.collected)
+        if not lines:
+            raise UserError(_('Enter at least one collected amount.'))
+
+        collections = bulk_mode(self.env['property.collection']).create([self._prepare_collection_vals(line) for line in lines])
+        collections._assign_receipt_numbers()
+        lines.write({'collected': True})
+        self.state = 'done'
+        self.message_post(body=_('%(count)s collections saved for a total of %(amount)s.',
+                                 count=len(collections), amount=sum(collections.mapped('amount_collected'))))
+        return True
+
+    def action_view_collections(self):
+        return {
+            'name': _('Collections'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'property.collection',
+            'view_mode': 'list,form',
+            'domain': [('round_id', '=', self.id)],
+        }
+
+
+class PropertyCollectionRoundLine(models.Model):
+    _name = 'property.collection.round.line'
+    _description = 'Collection Round Line'
+    _order = 'round_id, id'
+
+    round_id = fields.Many2one('property.collection.round', 'Round', required=True, ondelete='cascade', index=True)
+    room_id = fields.Many2one('property.room', 'Room', required=True, readonly=True)
+    tenant_id = fields.Many2one('property.tenant', 'Tenant', required=True, readonly=True)
+    agreement_id = fields.Many2one('property.agreement', 'Agreement', readonly=True)
+
+    # Preloaded context
+    expected_amount = fields.Monetary('Rent', currency_field='currency_id', readonly=True)
+    last_collection_date = fields.Date('Last Collection', readonly=True)
+    last_collection_amount = fields.Monetary('Last Amount', currency_field='currency_id', readonly=True)
+
+    # Entered by the collector
+    amount = fields.Monetary('Collected', currency_field='currency_id')
+    payment_method = fields.Selection([
+        ('cash', 'Cash'),
+        ('bank_transfer', 'Bank Transfer'),
+        ('cheque', 'Cheque'),
+        ('online', 'Online Payment'),
+        ('card', 'Card Payment'),
+    ], string='Payment Method', required=True, default='cash')
+    reference_number = fields.Char('Reference')
+    notes = fields.Char('Notes')
+    collected = fields.Boolean('Saved', readonly=True)
+
+    currency_id = fields.Many2one(related='round_id.currency_id')
@@ -4,6 +4,8 @@ from odoo import api, fields, models
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
+from .property_perf import instrument
+
 
 class PropertyDashboard(models.TransientModel):
     _name = 'property.dashboard'
@@ -20,6 +22,7 @@ class PropertyDashboard(models.TransientModel):
         return result
 
     @api.model
+    @instrument('property.dashboard.default_get', category='dashboard')
     def default_get(self, fields_list):
         """Override to ensure fresh data is always computed"""
         res = super().default_get(fields_list)
@@ -1,4 +1,5 @@
 from odoo import models, fields, api, _
+from odoo.exceptions import UserError
 
 
 class PropertyDeposit(models.Model):
@@ -25,6 +26,11 @@ class PropertyDeposit(models.Model):
     refund_date = fields.Date('Refund Date')
     refund_reason = fields.Text('Refund/Deduction Reason')
     
+    # Ledger
+    balance = fields.Monetary('Held Balance', currency_field='currency_id', readonly=True, copy=False,
+                              help="Maintained by the deposit ledger with every movement posted")
+    move_ids = fields.One2many('property.deposit.move', 'deposit_id', 'Ledger')
+    
     currency_id = fields.Many2one('res.currency', 'Currency', 
                                   default=lambda self: self.env.company.currency_id)
     
@@ -35,3 +41,69 @@ class PropertyDeposit(models.Model):
                 record.name = f"DEP/{record.tenant_id.name}/{record.deposit_date.strftime('%Y%m%d')}"
             else:
                 record.name = 'New Deposit'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        deposits = super().create(vals_list)
+        deposits.filtered('deposit_amount')._post_moves('received', lambda d: d.deposit_amount,
+                                                        date=lambda d: d.deposit_date)
+        return deposits
+    
+    def write(self, vals):
+        if 'deposit_amount' in vals and self.move_ids:
+            raise UserError(_('The amount of a posted deposit cannot change; post a ledger movement instead.'))
+        return super().write(vals)
+    
+    def _lock_for_ledger(self):
+        """Lock the deposits in id order until the end of the transaction"""
+        if self:
+            self.env.cr.execute(
+                "SELECT id FROM property_deposit WHERE id = ANY(%s) ORDER BY id FOR UPDATE", [self.ids])
+            self.invalidate_recordset(['balance'])
+    
+    def _get_last_move_dates(self):
+        """Date of the last ledger movement of each deposit, in one query"""
+        if not self:
+            return {}
+        self.env['property.deposit.move'].flush_model(['deposit_id', 'date'])
+        self.env.cr.execute("""
+            SELECT deposit_id, MAX(date)
+              FROM property_deposit_move
+             WHERE deposit_id = ANY(%s)
+          GROUP BY deposit_id
+        """, [self.ids])
+        return dict(self.env.cr.fetchall())
+    
+    def _post_moves(self, move_type, amount, date=None, note=None, exit_id=None):
+        """Post one ledger movement per deposit; ``amount`` and ``date`` may be callables of the deposit"""
+        return self.env['property.deposit.move'].create([{
+            'deposit_id': deposit.id,
+            'move_type': move_type,
+            'amount': amount(deposit) if callable(amount) else amount,
+            'date': date(deposit) if callable(date) else date or fields.Date.context_today(self),
+            'note': note,
+            'exit_id': exit_id,
+        } for deposit in self])
+    
+    def _apply_moves(self, balances):
+        """Bring balance, refund and status in line with the movements just posted"""
+        refunded = {deposit: (amount, date) for deposit, amount, date in self.env['property.deposit.move']._read_group(
+            [('deposit_id', 'in', self.ids), ('move_type', '=', 'refunded')],
+            ['deposit_id'], ['amount:sum', 'date:max'],
+        )}
+        for deposit in self:
+            balance = balances[deposit.id]
+            refund, refund_date = refunded.get(deposit, (0.0, False))
+            refund = -refund
+            if not deposit.currency_id.is_zero(balance):
+                status = 'partially_refunded' if balance < deposit.deposit_amount else 'held'
+            else:
+                status = 'refunded' if refund else 'forfeited'
+            vals = {'balance': balance, 'refund_amount': refund, 'status': status}
+            if refund_date:
+                vals['refund_date'] = refund_date
+            super(PropertyDeposit, deposit).write(vals)
+    
+    def action_refund_balance(self):
+        """Refund what is still held on the deposits"""
+        self.filtered('balance')._post_moves('refunded', lambda d: d.balance, note=_('Balance refunded'))
@@ -0,0 +1,157 @@
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+
+# Money leaving the deposit is posted with a negative amount
+OUTGOING_MOVES = ('deducted', 'refunded')
+
+
+class PropertyDepositMove(models.Model):
+    _name = 'property.deposit.move'
+    _description = 'Deposit Ledger Entry'
+    _order = 'date desc, id desc'
+
+    deposit_id = fields.Many2one('property.deposit', 'Deposit', required=True, readonly=True,
+                                 ondelete='restrict', index=True)
+    tenant_id = fields.Many2one('property.tenant', 'Tenant', readonly=True)
+    agreement_id = fields.Many2one('property.agreement', 'Agreement', readonly=True)
+    property_id = fields.Many2one('property.property', 'Property', readonly=True)
+
+    date = fields.Date('Date', required=True, readonly=True, default=fields.Date.today)
+    move_type = fields.Selection([
+        ('received', 'Received'),
+        ('deducted', 'Deducted'),
+        ('refunded', 'Refunded'),
+    ], string='Movement', required=True, readonly=True)
+    amount = fields.Monetary('Amount', required=True, readonly=True, currency_field='currency_id',
+                             help="Positive when received, negative when deducted or refunded")
+    balance = fields.Monetary('Running Balance', readonly=True, currency_field='currency_id',
+                              help="Deposit held after this movement")
+    exit_id = fields.Many2one('property.tenant.exit', 'Move-Out', readonly=True)
+    note = fields.Char('Note', readonly=True)
+
+    currency_id = fields.Many2one(related='deposit_id.currency_id')
+
+    def init(self):
+        # Liability as of a date: range scan on date, read property and amount from the index
+        tools.create_index(self.env.cr, 'property_deposit_move_date_property_idx',
+                           self._table, ['date', 'property_id', 'move_type', 'amount'])
+        self._backfill_opening_moves()
+
+    def _backfill_opening_moves(self):
+        """Post the history of deposits recorded before the ledger existed"""
+        cr = self.env.cr
+        cr.execute(f"""
+            WITH history AS (
+                SELECT d.id AS deposit_id, d.deposit_date AS date, 'received' AS move_type,
+                       d.deposit_amount AS amount, 1 AS step
+                  FROM property_deposit d
+                 WHERE COALESCE(d.deposit_amount, 0) != 0
+                UNION ALL
+                SELECT d.id, COALESCE(d.refund_date, d.deposit_date), 'refunded', -d.refund_amount, 2
+                  FROM property_deposit d
+                 WHERE COALESCE(d.refund_amount, 0) != 0
+                UNION ALL
+                SELECT d.id, COALESCE(d.refund_date, d.deposit_date), 'deducted',
+                       -(d.deposit_amount - COALESCE(d.refund_amount, 0)), 3
+                  FROM property_deposit d
+                 WHERE d.status = 'forfeited' AND d.deposit_amount - COALESCE(d.refund_amount, 0) > 0
+            )
+            INSERT INTO {self._table} (deposit_id, tenant_id, agreement_id, property_id, date, move_type,
+                                       amount, balance, create_uid, create_date, write_uid, write_date)
+            SELECT h.deposit_id, d.tenant_id, d.agreement_id, a.property_id, h.date, h.move_type, h.amount,
+                   SUM(h.amount) OVER (PARTITION BY h.deposit_id ORDER BY h.step),
+                   1, now() at time zone 'UTC', 1, now() at time zone 'UTC'
+              FROM history h
+              JOIN property_deposit d ON d.id = h.deposit_id
+         LEFT JOIN property_agreement a ON a.id = d.agreement_id
+             WHERE NOT EXISTS (SELECT 1 FROM {self._table} m WHERE m.deposit_id = h.deposit_id)
+        """)
+        if cr.rowcount:
+            cr.execute(f"""
+                UPDATE property_deposit d
+                   SET balance = m.balance
+                  FROM (SELECT deposit_id, SUM(amount) AS balance
+                          FROM {self._table}
+                      GROUP BY deposit_id) m
+                 WHERE m.deposit_id = d.id
+            """)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Post movements after the last one of their deposit, keeping the running balance.
+
+        The deposits are locked first so concurrent postings on the same
+        deposit queue up instead of computing their balance from the same
+        starting point.
+        """
+        deposits = self.env['property.deposit'].browse({vals['deposit_id'] for vals in vals_list})
+        deposits._lock_for_ledger()
+        balances = {deposit.id: deposit.balance for deposit in deposits}
+        last_dates = deposits._get_last_move_dates()
+
+        for vals in vals_list:
+            deposit = deposits.browse(vals['deposit_id'])
+            date = fields.Date.to_date(vals.get('date')) or fields.Date.context_today(self)
+            amount = abs(vals.get('amount') or 0.0)
+            if not amount:
+                raise ValidationError(_('A deposit movement needs an amount.'))
+            if vals['move_type'] in OUTGOING_MOVES:
+                amount = -amount
+            if last_dates.get(deposit.id) and date < last_dates[deposit.id]:
+                raise ValidationError(_(
+                    'Deposit %(deposit)s already has a movement on %(date)s; the ledger only grows forward.',
+                    deposit=deposit.name, date=last_dates[deposit.id]))
+            balance = balances[deposit.id] + amount
+            if deposit.currency_id.compare_amounts(balance, 0) < 0:
+                raise ValidationError(_(
+                    'Deposit %(deposit)s only holds %(held)s.', deposit=deposit.name, held=balances[deposit.id]))
+            balances[deposit.id] = balance
+            last_dates[deposit.id] = date
+            vals.update({
+                'date': date,
+                'amount': amount,
+                'balance': balance,
+                'tenant_id': deposit.tenant_id.id,
+                'agreement_id': deposit.agreement_id.id,
+                'property_id': deposit.agreement_id.property_id.id,
+            })
+
+        moves = super().create(vals_list)
+        moves.deposit_id._apply_moves(balances)
+        return moves
+
+    def write(self, vals):
+        raise UserError(_('Deposit ledger entries cannot be changed; post a new movement instead.'))
+
+    @api.ondelete(at_uninstall=False)
+    def _unlink_never(self):
+        raise UserError(_('Deposit ledger entries cannot be deleted; post a new movement instead.'))
+
+    @api.model
+    def _get_liability(self, as_of, property_ids=None):
+        """Deposits received, deducted, refunded and held per property on ``as_of``, in one indexed query"""
+        self.env.flush_all()
+        self.env.cr.execute(SQL("""
+            SELECT property_id,
+                   SUM(amount) FILTER (WHERE move_type = 'received'),
+                   -SUM(amount) FILTER (WHERE move_type = 'deducted'),
+                   -SUM(amount) FILTER (WHERE move_type = 'refunded'),
+                   SUM(amount)
+              FROM %s
+             WHERE date <= %s %s
+          GROUP BY property_id
+        """,
+            SQL.identifier(self._table),
+            as_of,
+            SQL('AND property_id = ANY(%s)', list(property_ids)) if property_ids else SQL(),
+        ))
+        return {
+            property_id: {
+                'received': received or 0.0,
+                'deducted': deducted or 0.0,
+                'refunded': refunded or 0.0,
+                'held': held or 0.0,
+            }
+            for property_id, received, deducted, refunded, held in self.env.cr.fetchall()
+        }
@@ -1,9 +1,12 @@
 from odoo import models, fields, api, _
 
+from .property_perf import instrument
+
 
 class PropertyDueTracker(models.Model):
     _name = 'property.due.tracker'
     _description = 'Due Tracker'
+    _inherit = ['property.sync.mixin']
     _order = 'due_date, priority desc'
 
     name = fields.Char('Description', compute='_compute_name', store=True)
@@ -116,9 +119,15 @@ class PropertyDueTracker(models.Model):
         self.write({'status': 'waived'})
     
     @api.model
+    @instrument('property.due.tracker.create_monthly_dues', category='cron')
     def create_monthly_dues(self):
         """Create monthly dues for all active agreements"""
-        active_agreements = self.env['property.agreement'].search([('state', '=', 'active')])
+        today = fields.Date.today()
+        active_agreements = self.env['property.agreement'].search([
+            ('state', '=', 'active'),
+            ('start_date', '<=', today),
+            ('end_date', '>=', today),
+        ])
         
         for agreement in active_agreements:
             # Check if due already exists for current month
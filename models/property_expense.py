@@ -1,11 +1,21 @@
+import logging
+import time
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
+from .property_bulk import bulk_mode
+from .property_bill_extraction import BATCH_SIZE_PARAM, extract_texts, parse_bill_text
+from .property_perf import instrument
+from .property_storage import bill_thumbnail
+
+_logger = logging.getLogger(__name__)
+
 
 class PropertyExpense(models.Model):
     _name = 'property.expense'
     _description = 'Property Expense'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'property.pnl.source.mixin']
     _order = 'date desc'
 
     name = fields.Char('Description', required=True, tracking=True)
@@ -68,6 +78,8 @@ class PropertyExpense(models.Model):
     # Approval
     approved_by = fields.Many2one('res.users', 'Approved By')
     approval_date = fields.Datetime('Approval Date')
+    auto_approved = fields.Boolean('Auto Approved', readonly=True, copy=False,
+                                   help="Approved on submission because the amount was under the approval threshold")
     
     # Additional Information
     notes = fields.Text('Notes')
@@ -80,10 +92,24 @@ class PropertyExpense(models.Model):
     
     # Attachments
     bill_image = fields.Binary('Bill/Receipt')
+    bill_thumbnail = fields.Image('Bill Preview', compute='_compute_bill_thumbnail')
     bill_filename = fields.Char('Bill Filename')
     attachment_ids = fields.One2many('ir.attachment', 'res_id', 'Attachments',
                                      domain=[('res_model', '=', 'property.expense')])
     
+    # Bill Extraction
+    extraction_state = fields.Selection([
+        ('none', 'No Bill'),
+        ('pending', 'Queued'),
+        ('done', 'Extracted'),
+        ('failed', 'Nothing Found'),
+    ], string='Bill Extraction', default='none', readonly=True, copy=False, index=True)
+    extracted_text = fields.Text('Bill Text', readonly=True, copy=False)
+    extracted_vendor_id = fields.Many2one('res.partner', 'Extracted Vendor', readonly=True, copy=False)
+    extracted_amount = fields.Monetary('Extracted Amount', currency_field='currency_id', readonly=True, copy=False)
+    extracted_date = fields.Date('Extracted Date', readonly=True, copy=False)
+    extracted_reference = fields.Char('Extracted Reference', readonly=True, copy=False)
+    
     # Financial
     currency_id = fields.Many2one('res.currency', 'Currency', 
                                   default=lambda self: self.env.company.currency_id)
@@ -91,6 +117,24 @@ class PropertyExpense(models.Model):
     # Bill Reference (Community Edition)
     bill_reference = fields.Char('Related Bill Reference')
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('bill_image'):
+                vals['extraction_state'] = 'pending'
+        return super().create(vals_list)
+    
+    def write(self, vals):
+        if 'bill_image' in vals:
+            vals = dict(vals, extraction_state='pending' if vals['bill_image'] else 'none')
+        return super().write(vals)
+    
+    @api.depends('bill_image')
+    def _compute_bill_thumbnail(self):
+        for record in self:
+            # The form reads with bin_size; the preview needs the content
+            record.bill_thumbnail = bill_thumbnail(record.with_context(bin_size=False).bill_image)
+    
     @api.onchange('flat_id')
     def _onchange_flat_id(self):
         if self.flat_id:
@@ -109,20 +153,30 @@ class PropertyExpense(models.Model):
                 raise ValidationError(_('Expense amount must be positive!'))
     
     def action_submit(self):
-        self.write({'state': 'submitted'})
+        """Submit drafts; those under their approval threshold are approved right away"""
+        drafts = self.filtered(lambda e: e.state == 'draft')
+        rules = self.env['property.expense.approval.rule'].search([])
+        auto_approved = drafts.filtered(lambda e: e.amount <= rules._get_auto_approve_limit(e))
+        auto_approved.write({
+            'state': 'approved',
+            'approved_by': self.env.user.id,
+            'approval_date': fields.Datetime.now(),
+            'auto_approved': True,
+        })
+        (drafts - auto_approved).write({'state': 'submitted'})
     
     def action_approve(self):
-        self.write({
+        self.filtered(lambda e: e.state == 'submitted').write({
             'state': 'approved',
             'approved_by': self.env.user.id,
             'approval_date': fields.Datetime.now(),
         })
     
     def action_pay(self):
-        self.write({'state': 'paid'})
+        self.filtered(lambda e: e.state == 'approved').write({'state': 'paid'})
     
     def action_reject(self):
-        self.write({'state': 'rejected'})
+        self.filtered(lambda e: e.state in ('submitted', 'approved')).write({'state': 'rejected'})
     
     def action_create_bill_reference(self):
         """Create bill reference for this expense (Community Edition)"""
@@ -144,3 +198,139 @@ class PropertyExpense(models.Model):
                 'type': 'success',
             }
         }
+    
+    def _get_bill_sources(self):
+        """Filestore path (or raw content) of each expense's bill that is a PDF, by expense id"""
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'bill_image'),
+            ('res_id', 'in', self.ids),
+        ])
+        return {
+            attachment.res_id: attachment._full_path(attachment.store_fname)
+            if attachment.store_fname else attachment.raw
+            for attachment in attachments
+            if attachment.mimetype == 'application/pdf'
+        }
+    
+    def _prefill_from_extraction(self, values):
+        """Fill the vendor and reference the clerk left empty; amount and date are applied on review"""
+        self.ensure_one()
+        prefill = {}
+        if values.get('vendor') and not self.vendor_id:
+            prefill['vendor_id'] = values['vendor']
+        if values.get('reference') and not self.reference_number:
+            prefill['reference_number'] = values['reference']
+        return prefill
+    
+    def _extract_bills(self):
+        """Extract and parse the bills of the expenses"""
+        sources = self._get_bill_sources()
+        started = time.perf_counter()
+        texts = dict(zip(sources, extract_texts(list(sources.values()))))
+        elapsed = time.perf_counter() - started
+        rules = self.env['property.expense.extraction.rule']._get_parser_rules()
+        
+        for expense in bulk_mode(self):
+            text = texts.get(expense.id, '')
+            values = parse_bill_text(text, rules) if text else {}
+            vals = expense._prefill_from_extraction(values)
+            vals.update({
+                'extraction_state': 'done' if values else 'failed',
+                'extracted_text': text,
+                'extracted_vendor_id': values.get('vendor', False),
+                'extracted_amount': values.get('amount', 0.0),
+                'extracted_date': values.get('date', False),
+                'extracted_reference': values.get('reference', False),
+            })
+            expense.write(vals)
+        
+        if sources:
+            _logger.info("Extracted %s bills in %.2fs (%.0f bills/min)",
+                         len(sources), elapsed, len(sources) * 60 / (elapsed or 1))
+        return len(sources), elapsed
+    
+    @api.model
+    @instrument('property.expense._cron_extract_bills', category='cron')
+    def _cron_extract_bills(self, max_batches=20):
+        """Cron job to extract vendor, amount, date and reference from queued bills.
+
+        Odoo never runs one scheduled action concurrently with itself, so the
+        job is declared as several scheduled actions; each runs on its own cron
+        worker and claims its batches with SKIP LOCKED, next to the others.
+        Parsing stays in the worker process, so one scheduled action extracts
+        one bill at a time.
+        """
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param(BATCH_SIZE_PARAM, 100))
+        for _batch in range(max_batches):
+            expenses = self._claim_pending_bills(batch_size)
+            if not expenses:
+                break
+            expenses._extract_bills()
+            self.env.cr.commit()
+    
+    @api.model
+    def _claim_pending_bills(self, limit):
+        """Lock up to ``limit`` queued bills that no other worker is extracting"""
+        self.flush_model(['extraction_state'])
+        self.env.cr.execute("""
+            SELECT id
+              FROM property_expense
+             WHERE extraction_state = 'pending'
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [limit])
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+    
+    def action_queue_extraction(self):
+        self.filtered('bill_image').write({'extraction_state': 'pending'})
+    
+    def action_apply_extraction(self):
+        """Copy the extracted values over the expense, replacing what was entered"""
+        for expense in self.filtered(lambda e: e.state == 'draft' and e.extraction_state == 'done'):
+            vals = {}
+            if expense.extracted_vendor_id:
+                vals['vendor_id'] = expense.extracted_vendor_id.id
+            if expense.extracted_amount:
+                vals['amount'] = expense.extracted_amount
+            if expense.extracted_date:
+                vals['date'] = expense.extracted_date
+            if expense.extracted_reference:
+                vals['reference_number'] = expense.extracted_reference
+            expense.write(vals)
+
+
+class PropertyExpenseApprovalRule(models.Model):
+    _name = 'property.expense.approval.rule'
+    _description = 'Expense Approval Threshold'
+    _order = 'sequence, id'
+
+    name = fields.Char('Rule Name', required=True)
+    sequence = fields.Integer('Sequence', default=10)
+    active = fields.Boolean('Active', default=True)
+
+    # Scope (empty means any)
+    category = fields.Selection(
+        lambda self: self.env['property.expense']._fields['category'].selection, string='Category')
+    expense_type = fields.Selection(
+        lambda self: self.env['property.expense']._fields['expense_type'].selection, string='Expense Type')
+    property_id = fields.Many2one('property.property', 'Property')
+
+    # Threshold
+    auto_approve_limit = fields.Monetary('Auto-Approve Up To', currency_field='currency_id',
+                                         help="Expenses up to this amount are approved on submission")
+    currency_id = fields.Many2one('res.currency', 'Currency',
+                                  default=lambda self: self.env.company.currency_id)
+
+    def _matches(self, expense):
+        return ((not self.category or self.category == expense.category)
+                and (not self.expense_type or self.expense_type == expense.expense_type)
+                and (not self.property_id or self.property_id == expense.property_id))
+
+    def _get_auto_approve_limit(self, expense):
+        """Limit of the first rule in self matching the expense, -1 when none matches"""
+        for rule in self:
+            if rule._matches(expense):
+                return rule.auto_approve_limit
+        return -1
@@ -1,6 +1,8 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
+from .property_perf import instrument
+
 
 class PropertyFlat(models.Model):
     _name = 'property.flat'
@@ -70,6 +72,7 @@ class PropertyFlat(models.Model):
             record.rooms_count = len(record.room_ids)
     
     @api.depends('room_ids.status')
+    @instrument('property.flat._compute_room_stats', category='compute')
     def _compute_room_stats(self):
         for record in self:
             record.occupied_rooms = len(record.room_ids.filtered(lambda r: r.status == 'occupied'))
@@ -2,6 +2,9 @@ from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
 from datetime import timedelta
 
+from .property_bulk import bulk_mode, post_batch_summary
+from .property_perf import instrument
+
 
 class PropertyInvoice(models.Model):
     _name = 'property.invoice'
@@ -71,11 +74,13 @@ class PropertyInvoice(models.Model):
     # Company Info
     company_id = fields.Many2one('res.company', 'Company', default=lambda self: self.env.company)
     
-    @api.model
-    def create(self, vals):
-        if vals.get('name', _('New')) == _('New'):
-            vals['name'] = self.env['ir.sequence'].next_by_code('property.invoice') or _('New')
-        return super(PropertyInvoice, self).create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        to_number = [vals for vals in vals_list if vals.get('name', _('New')) == _('New')]
+        names = self.env['ir.sequence'].next_block_by_code('property.invoice', len(to_number))
+        for vals, name in zip(to_number, names):
+            vals['name'] = name or _('New')
+        return super(PropertyInvoice, self).create(vals_list)
 
     @api.depends('invoice_line_ids.price_total')
     def _compute_amounts(self):
@@ -188,17 +193,25 @@ class PropertyInvoice(models.Model):
         return False
 
     @api.model
+    @instrument('property.invoice.create_monthly_invoices', category='cron')
     def create_monthly_invoices(self):
         """Cron job to create monthly invoices"""
         today = fields.Date.today()
         
-        # Find all active agreements
-        active_agreements = self.env['property.agreement'].search([('state', '=', 'active')])
+        # Find all active agreements in effect today (renewals can be activated ahead of their start)
+        active_agreements = self.env['property.agreement'].search([
+            ('state', '=', 'active'),
+            ('start_date', '<=', today),
+            ('end_date', '>=', today),
+        ])
         
+        Invoice = bulk_mode(self)
+        invoices = Invoice
         for agreement in active_agreements:
             # Check if invoice should be generated
             if agreement.payment_frequency == 'monthly' and today.day == agreement.invoice_day:
-                self._create_monthly_invoice(agreement, today)
+                invoices |= Invoice._create_monthly_invoice(agreement, today)
+        post_batch_summary(invoices, _('Monthly invoices generated'), 'amount_total')
 
     def _create_monthly_invoice(self, agreement, invoice_date):
         """Create monthly invoice for agreement"""
@@ -240,6 +253,8 @@ class PropertyInvoice(models.Model):
             # Auto-post if configured
             if agreement.auto_post_invoices:
                 invoice.action_post()
+            return invoice
+        return self.browse()
 
 
 class PropertyInvoiceLine(models.Model):
@@ -288,6 +303,7 @@ class PropertyPayment(models.Model):
         ('cheque', 'Cheque'),
         ('online', 'Online Payment'),
         ('card', 'Card Payment'),
+        ('deposit', 'Deposit Deduction'),
     ], string='Payment Method', required=True, default='cash', tracking=True)
     
     reference = fields.Char('Reference')
@@ -301,11 +317,13 @@ class PropertyPayment(models.Model):
         ('cancelled', 'Cancelled'),
     ], default='draft', tracking=True)
 
-    @api.model
-    def create(self, vals):
-        if vals.get('name', _('New')) == _('New'):
-            vals['name'] = self.env['ir.sequence'].next_by_code('property.payment') or _('New')
-        return super(PropertyPayment, self).create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        to_number = [vals for vals in vals_list if vals.get('name', _('New')) == _('New')]
+        names = self.env['ir.sequence'].next_block_by_code('property.payment', len(to_number))
+        for vals, name in zip(to_number, names):
+            vals['name'] = name or _('New')
+        return super(PropertyPayment, self).create(vals_list)
 
     def action_post(self):
         """Post the payment and update invoice"""
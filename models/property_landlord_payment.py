@@ -1,10 +1,19 @@
+import logging
+
 from odoo import models, fields, api, _
 
+_logger = logging.getLogger(__name__)
+
+# Collections that are landlord income; deposits and token money are
+# refundable to the tenant and stay out of the payouts
+PAYOUT_COLLECTION_TYPES = ['rent', 'extra', 'penalty', 'maintenance', 'utility', 'other']
+
 
 class PropertyLandlordPayment(models.Model):
     _name = 'property.landlord.payment'
     _description = 'Landlord Payment'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'property.pnl.source.mixin']
+    _pnl_date_field = 'payment_date'
 
     name = fields.Char('Payment Reference', required=True)
     
@@ -18,6 +27,20 @@ class PropertyLandlordPayment(models.Model):
     period_from = fields.Date('Period From')
     period_to = fields.Date('Period To')
     
+    # Payout Computation
+    collections_amount = fields.Monetary('Collections', currency_field='currency_id', readonly=True)
+    expenses_amount = fields.Monetary('Approved Expenses', currency_field='currency_id', readonly=True)
+    management_fee = fields.Monetary('Management Fee', currency_field='currency_id', readonly=True)
+    
+    # Statement
+    statement_state = fields.Selection([
+        ('none', 'Not Requested'),
+        ('pending', 'Queued'),
+        ('done', 'Ready'),
+        ('failed', 'Failed'),
+    ], string='Statement', default='none', copy=False, readonly=True)
+    statement_id = fields.Many2one('ir.attachment', 'Statement PDF', copy=False, readonly=True)
+    
     payment_method = fields.Selection([
         ('cash', 'Cash'),
         ('bank_transfer', 'Bank Transfer'),
@@ -34,3 +57,106 @@ class PropertyLandlordPayment(models.Model):
     
     currency_id = fields.Many2one('res.currency', 'Currency', 
                                   default=lambda self: self.env.company.currency_id)
+
+    @api.model
+    def _compute_payouts(self, period_from, period_to, property_ids=None):
+        """Landlord share of every property over the period, with one grouped query.
+
+        The share is the income collected minus the approved or paid expenses
+        minus the management fee taken on the collections. Properties with a
+        payout over any part of the period are left out, so no collection is
+        paid twice.
+        """
+        self.env.flush_all()
+        self.env.cr.execute("""
+            WITH collected AS (
+                SELECT property_id, SUM(amount_collected) AS amount
+                  FROM property_collection
+                 WHERE status IN ('collected', 'verified', 'deposited')
+                   AND collection_type = ANY(%(collection_types)s)
+                   AND date BETWEEN %(date_from)s AND %(date_to)s
+              GROUP BY property_id
+            ), spent AS (
+                SELECT property_id, SUM(amount) AS amount
+                  FROM property_expense
+                 WHERE state IN ('approved', 'paid')
+                   AND date BETWEEN %(date_from)s AND %(date_to)s
+              GROUP BY property_id
+            )
+            SELECT p.id, p.landlord_id, COALESCE(c.amount, 0), COALESCE(s.amount, 0),
+                   COALESCE(c.amount, 0) * COALESCE(p.management_fee_percent, 0) / 100
+              FROM property_property p
+         LEFT JOIN collected c ON c.property_id = p.id
+         LEFT JOIN spent s ON s.property_id = p.id
+             WHERE p.active AND p.landlord_id IS NOT NULL
+               AND (c.amount IS NOT NULL OR s.amount IS NOT NULL)
+               AND (%(property_ids)s::int[] IS NULL OR p.id = ANY(%(property_ids)s::int[]))
+               AND NOT EXISTS (
+                    SELECT 1 FROM property_landlord_payment l
+                     WHERE l.property_id = p.id AND l.status != 'cancelled'
+                       AND l.period_from <= %(date_to)s AND l.period_to >= %(date_from)s)
+          ORDER BY p.landlord_id, p.name
+        """, {
+            'date_from': period_from,
+            'date_to': period_to,
+            'collection_types': PAYOUT_COLLECTION_TYPES,
+            'property_ids': list(property_ids) if property_ids else None,
+        })
+        currency = self.env.company.currency_id
+        return [{
+            'property_id': property_id,
+            'landlord_id': landlord_id,
+            'collections_amount': currency.round(collections),
+            'expenses_amount': currency.round(expenses),
+            'management_fee': currency.round(fee),
+            'amount': currency.round(collections - expenses - fee),
+        } for property_id, landlord_id, collections, expenses, fee in self.env.cr.fetchall()]
+    
+    def _get_statement_groups(self):
+        """Payments sharing a statement: one per landlord and period"""
+        return self.grouped(lambda p: (p.landlord_id, p.period_from, p.period_to)).values()
+    
+    def _render_statements(self):
+        """Render one statement PDF per landlord and period and attach it to its payments"""
+        report = self.env.ref('property_management_lite.action_report_landlord_statement')
+        for payments in self._get_statement_groups():
+            landlord = payments.landlord_id
+            try:
+                with self.env.cr.savepoint():
+                    pdf, _report_type = self.env['ir.actions.report']._render_qweb_pdf(report, payments.ids)
+                    attachment = self.env['ir.attachment'].create({
+                        'name': _('Statement %(landlord)s %(date_from)s - %(date_to)s.pdf',
+                                  landlord=landlord.name, date_from=payments[0].period_from,
+                                  date_to=payments[0].period_to),
+                        'type': 'binary',
+                        'raw': pdf,
+                        'res_model': 'res.partner',
+                        'res_id': landlord.id,
+                        'mimetype': 'application/pdf',
+                    })
+                    payments.write({'statement_state': 'done', 'statement_id': attachment.id})
+            except Exception:
+                _logger.exception("Landlord statement of %s failed", landlord.display_name)
+                payments.write({'statement_state': 'failed'})
+    
+    @api.model
+    def _cron_render_statements(self, batch_size=50):
+        """Cron job rendering the queued landlord statements, committing after each batch"""
+        while True:
+            payments = self.search([('statement_state', '=', 'pending')], order='landlord_id, id')
+            groups = list(payments._get_statement_groups())[:batch_size]
+            if not groups:
+                break
+            self.browse().union(*groups)._render_statements()
+            self.env.cr.commit()
+    
+    def action_queue_statement(self):
+        """Queue the statements of the payments, rendered in the background"""
+        self.write({'statement_state': 'pending'})
+        self.env.ref('property_management_lite.ir_cron_property_landlord_statements')._trigger()
+    
+    def action_mark_paid(self):
+        self.write({'status': 'paid'})
+    
+    def action_cancel(self):
+        self.write({'status': 'cancelled'})
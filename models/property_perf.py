@@ -0,0 +1,181 @@
+import functools
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+
+from odoo import models, fields, api, tools, SUPERUSER_ID
+from odoo.http import request
+
+_logger = logging.getLogger(__name__)
+
+SAMPLE_RATE_PARAM = 'property_management_lite.perf_sample_rate'
+
+PERF_CATEGORIES = [
+    ('dashboard', 'Dashboard'),
+    ('compute', 'Compute'),
+    ('cron', 'Scheduled Action'),
+    ('controller', 'Controller'),
+    ('other', 'Other'),
+]
+
+# Samples are buffered per database and written in one INSERT from a separate
+# cursor, so instrumented calls never pay for their own bookkeeping row
+FLUSH_SIZE = 50
+FLUSH_INTERVAL = 60
+_pending_samples = defaultdict(list)
+_pending_lock = threading.Lock()
+_last_flush = defaultdict(float)
+
+
+def _resolve_env(args):
+    env = getattr(args[0], 'env', None) if args else None
+    if env is None and request:
+        env = request.env
+    return env
+
+
+def _sample_rate(env):
+    try:
+        return float(env['ir.config_parameter'].sudo().get_param(SAMPLE_RATE_PARAM, 0.0))
+    except ValueError:
+        return 0.0
+
+
+def _count_rows(value):
+    if isinstance(value, (models.BaseModel, list, tuple)):
+        return len(value)
+    return 0
+
+
+def _flush_samples(env, force=False):
+    dbname = env.cr.dbname
+    with _pending_lock:
+        pending = _pending_samples[dbname]
+        if not pending or (not force and len(pending) < FLUSH_SIZE
+                           and time.monotonic() - _last_flush[dbname] < FLUSH_INTERVAL):
+            return
+        _pending_samples[dbname] = []
+        _last_flush[dbname] = time.monotonic()
+    try:
+        with env.registry.cursor() as cr:
+            api.Environment(cr, SUPERUSER_ID, {})['property.perf.sample'].create(pending)
+    except Exception:
+        _logger.warning("Could not store %s performance samples", len(pending), exc_info=True)
+
+
+def instrument(name, category='other'):
+    """Record query count, SQL/Python time and rows for a sampled share of calls.
+
+    Works on model methods (the env comes from the recordset) and on
+    controller routes (the env comes from the request). Sampling is driven by
+    the ``property_management_lite.perf_sample_rate`` parameter, between 0
+    (off, the default) and 1 (every call).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            env = _resolve_env(args)
+            if env is None:
+                return method(*args, **kwargs)
+            rate = _sample_rate(env)
+            if rate <= 0 or random.random() >= rate:
+                return method(*args, **kwargs)
+
+            thread = threading.current_thread()
+            if not hasattr(thread, 'query_count'):
+                # The cursor only accounts queries on threads that carry these
+                thread.query_count = 0
+                thread.query_time = 0.0
+            start_queries = thread.query_count
+            start_sql_time = thread.query_time
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            total = time.perf_counter() - start
+            sql_time = thread.query_time - start_sql_time
+            sample = {
+                'name': name,
+                'category': category,
+                'date': fields.Datetime.now(),
+                'user_id': env.uid,
+                'query_count': thread.query_count - start_queries,
+                'sql_time_ms': sql_time * 1000,
+                'python_time_ms': max(total - sql_time, 0.0) * 1000,
+                'total_time_ms': total * 1000,
+            }
+            sample['rows'] = _count_rows(args[0] if args else None) + _count_rows(result)
+            with _pending_lock:
+                _pending_samples[env.cr.dbname].append(sample)
+            _flush_samples(env)
+            return result
+        return wrapper
+    return decorator
+
+
+class PropertyPerfSample(models.Model):
+    _name = 'property.perf.sample'
+    _description = 'Performance Sample'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    name = fields.Char('Method', required=True, index=True)
+    category = fields.Selection(PERF_CATEGORIES, string='Category', required=True, default='other')
+    date = fields.Datetime('Date', required=True, index=True)
+    user_id = fields.Many2one('res.users', 'User')
+
+    query_count = fields.Integer('Queries')
+    sql_time_ms = fields.Float('SQL Time (ms)')
+    python_time_ms = fields.Float('Python Time (ms)')
+    total_time_ms = fields.Float('Total Time (ms)')
+    rows = fields.Integer('Rows Touched')
+
+    @api.model
+    def _cron_purge_samples(self):
+        """Cron job to drop samples older than the retention period"""
+        _flush_samples(self.env, force=True)
+        days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'property_management_lite.perf_retention_days', 14))
+        self.env.cr.execute(
+            "DELETE FROM property_perf_sample WHERE date < (now() at time zone 'UTC') - %s * interval '1 day'",
+            [days],
+        )
+
+
+class PropertyPerfStat(models.Model):
+    _name = 'property.perf.stat'
+    _description = 'Performance Statistics (last 24 hours)'
+    _auto = False
+    _order = 'p95_time_ms desc'
+
+    name = fields.Char('Method', readonly=True)
+    category = fields.Selection(PERF_CATEGORIES, string='Category', readonly=True)
+    sample_count = fields.Integer('Samples', readonly=True)
+    p50_time_ms = fields.Float('p50 Time (ms)', readonly=True)
+    p95_time_ms = fields.Float('p95 Time (ms)', readonly=True)
+    p50_query_count = fields.Float('p50 Queries', readonly=True)
+    p95_query_count = fields.Float('p95 Queries', readonly=True)
+    avg_sql_time_ms = fields.Float('Avg SQL Time (ms)', readonly=True)
+    avg_python_time_ms = fields.Float('Avg Python Time (ms)', readonly=True)
+    avg_rows = fields.Float('Avg Rows', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT MIN(s.id) AS id,
+                       s.name,
+                       s.category,
+                       COUNT(*) AS sample_count,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY s.total_time_ms) AS p50_time_ms,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY s.total_time_ms) AS p95_time_ms,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY s.query_count) AS p50_query_count,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY s.query_count) AS p95_query_count,
+                       AVG(s.sql_time_ms) AS avg_sql_time_ms,
+                       AVG(s.python_time_ms) AS avg_python_time_ms,
+                       AVG(s.rows) AS avg_rows
+                  FROM property_perf_sample s
+                 WHERE s.date >= (now() at time zone 'UTC') - interval '24 hours'
+              GROUP BY s.name, s.category
+            )
+        """)
@@ -0,0 +1,237 @@
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+
+from .property_perf import instrument
+
+
+class PropertyPnlSourceMixin(models.AbstractModel):
+    _name = 'property.pnl.source.mixin'
+    _description = 'Source of the Profit & Loss Facts'
+
+    # Date field deciding the month a record is reported in
+    _pnl_date_field = 'date'
+
+    def write(self, vals):
+        if self._pnl_date_field in vals:
+            self.env['property.pnl.dirty.month']._log_months(self)
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['property.pnl.dirty.month']._log_months(self)
+        return super().unlink()
+
+
+class PropertyPnlDirtyMonth(models.Model):
+    _name = 'property.pnl.dirty.month'
+    _description = 'Month Left by a Moved or Deleted P&L Record'
+    _log_access = False
+
+    month = fields.Date('Month', required=True, readonly=True)
+
+    @api.model
+    def _log_months(self, records):
+        """Remember the months the records are reported in now, which the write
+        or unlink leaves with no write_date for the incremental refresh to see"""
+        months = {fields.Date.start_of(date, 'month') for date in records.mapped(records._pnl_date_field) if date}
+        if months:
+            self.sudo().create([{'month': month} for month in months])
+
+    @api.model
+    def _pop_months(self):
+        """Months logged and committed so far; a failed refresh rolls the removal back"""
+        self.flush_model()
+        self.env.cr.execute("DELETE FROM property_pnl_dirty_month RETURNING month")
+        return {row[0] for row in self.env.cr.fetchall()}
+
+
+class PropertyPnlFact(models.Model):
+    _name = 'property.pnl.fact'
+    _description = 'Profit & Loss Monthly Fact'
+    _order = 'month desc, property_id, flat_id'
+    _rec_name = 'month'
+
+    WATERMARK_PARAM = 'property_management_lite.pnl_watermark'
+    # Transactions still open when the watermark is taken commit with an older
+    # write_date, so every run rescans a short overlap window
+    WATERMARK_OVERLAP = timedelta(minutes=10)
+
+    # Dimensions
+    month = fields.Date('Month', required=True, index=True, readonly=True)
+    property_id = fields.Many2one('property.property', 'Property', index=True, readonly=True)
+    flat_id = fields.Many2one('property.flat', 'Flat', readonly=True)
+    line_type = fields.Selection([
+        ('income', 'Income'),
+        ('expense', 'Expense'),
+    ], string='Type', required=True, readonly=True)
+    source = fields.Selection([
+        ('collection', 'Collections'),
+        ('expense', 'Expenses'),
+        ('landlord_payment', 'Landlord Payments'),
+        ('staff_salary', 'Staff Salaries'),
+    ], string='Source', required=True, readonly=True)
+    category = fields.Selection('_selection_category', string='Category', readonly=True)
+
+    # Measures
+    income = fields.Monetary('Income', currency_field='currency_id', readonly=True)
+    expense = fields.Monetary('Expense', currency_field='currency_id', readonly=True)
+    profit = fields.Monetary('Profit', currency_field='currency_id', readonly=True)
+    record_count = fields.Integer('# Records', readonly=True)
+
+    # Financial
+    currency_id = fields.Many2one('res.currency', 'Currency',
+                                  default=lambda self: self.env.company.currency_id)
+
+    @api.model
+    def _selection_category(self):
+        """Collection and expense types share one category axis in the pivot"""
+        selection = dict(self.env['property.collection']._fields['collection_type'].selection)
+        for key, label in self.env['property.expense']._fields['expense_type'].selection:
+            selection.setdefault(key, label)
+        selection['landlord_payment'] = _('Landlord Payment')
+        selection['staff_salary'] = _('Staff Salary')
+        return list(selection.items())
+
+    @api.model
+    def _get_fact_queries(self):
+        """Return one aggregation query per source model.
+
+        Every query selects (month, property_id, flat_id, line_type, source,
+        category, income, expense, record_count) and is restricted to the
+        months being rebuilt through the ``months`` parameter.
+        """
+        return [
+            """
+            SELECT date_trunc('month', c.date)::date, c.property_id, r.flat_id,
+                   'income', 'collection', c.collection_type,
+                   SUM(c.amount_collected), 0, COUNT(*)
+              FROM property_collection c
+              JOIN property_room r ON r.id = c.room_id
+             WHERE c.status != 'cancelled' AND {month_filter}
+          GROUP BY 1, 2, 3, 6
+            """.format(month_filter=self._month_filter('c.date')),
+            """
+            SELECT s.month, s.property_id, r.flat_id,
+                   'income', 'collection', s.collection_type,
+                   SUM(s.amount_collected), 0, SUM(s.record_count)
+              FROM property_collection_summary s
+              JOIN property_room r ON r.id = s.room_id
+             WHERE s.status != 'cancelled' AND {month_filter}
+          GROUP BY 1, 2, 3, 6
+            """.format(month_filter=self._month_filter('s.month')),
+            """
+            SELECT date_trunc('month', e.date)::date,
+                   COALESCE(e.property_id, r.property_id, f.property_id),
+                   COALESCE(e.flat_id, r.flat_id),
+                   'expense', 'expense', e.expense_type,
+                   0, SUM(e.amount), COUNT(*)
+              FROM property_expense e
+         LEFT JOIN property_room r ON r.id = e.room_id
+         LEFT JOIN property_flat f ON f.id = e.flat_id
+             WHERE e.state IN ('approved', 'paid') AND {month_filter}
+          GROUP BY 1, 2, 3, 6
+            """.format(month_filter=self._month_filter('e.date')),
+            """
+            SELECT date_trunc('month', l.payment_date)::date, l.property_id, NULL::integer,
+                   'expense', 'landlord_payment', 'landlord_payment',
+                   0, SUM(l.amount), COUNT(*)
+              FROM property_landlord_payment l
+             WHERE l.status = 'paid' AND {month_filter}
+          GROUP BY 1, 2
+            """.format(month_filter=self._month_filter('l.payment_date')),
+            """
+            SELECT date_trunc('month', s.period_from)::date, s.property_id, NULL::integer,
+                   'expense', 'staff_salary', 'staff_salary',
+                   0, SUM(s.total_amount), COUNT(*)
+              FROM property_staff_salary s
+             WHERE s.status IN ('approved', 'paid') AND {month_filter}
+          GROUP BY 1, 2
+            """.format(month_filter=self._month_filter('s.period_from')),
+        ]
+
+    @api.model
+    def _month_filter(self, column):
+        return f"(%(months)s::date[] IS NULL OR date_trunc('month', {column})::date = ANY(%(months)s::date[]))"
+
+    @api.model
+    def _get_dirty_months(self, since):
+        """Months touched in any source table since the given watermark"""
+        sources = [
+            ('property_collection', 'date'),
+            ('property_collection_summary', 'month'),
+            ('property_expense', 'date'),
+            ('property_landlord_payment', 'payment_date'),
+            ('property_staff_salary', 'period_from'),
+        ]
+        query = " UNION ".join(
+            f"SELECT date_trunc('month', {column})::date FROM {table} WHERE write_date > %(since)s"
+            for table, column in sources
+        )
+        self.env.cr.execute(query, {'since': since})
+        months = {row[0] for row in self.env.cr.fetchall() if row[0]}
+        return sorted(months | self.env['property.pnl.dirty.month']._pop_months())
+
+    @api.model
+    def _rebuild_months(self, months=None):
+        """Replace the facts of the given months (all months when None)"""
+        self.env.flush_all()
+        cr = self.env.cr
+        if months is None:
+            cr.execute("DELETE FROM property_pnl_fact")
+        else:
+            cr.execute("DELETE FROM property_pnl_fact WHERE month = ANY(%s)", [months])
+
+        params = {
+            'months': months,
+            'uid': self.env.uid,
+            'currency_id': self.env.company.currency_id.id,
+        }
+        for query in self._get_fact_queries():
+            cr.execute(f"""
+                INSERT INTO property_pnl_fact (
+                    month, property_id, flat_id, line_type, source, category,
+                    income, expense, profit, record_count, currency_id,
+                    create_uid, create_date, write_uid, write_date
+                )
+                SELECT src.month, src.property_id, src.flat_id, src.line_type, src.source,
+                       src.category, src.income, src.expense, src.income - src.expense,
+                       src.record_count, %(currency_id)s,
+                       %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                  FROM ({query}) AS src (month, property_id, flat_id, line_type, source,
+                                         category, income, expense, record_count)
+            """, params)
+        self.invalidate_model()
+
+    @api.model
+    def _refresh(self, full=False):
+        """Incrementally refresh the facts of every month changed since the last run"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        self.env.cr.execute("SELECT now() at time zone 'UTC'")
+        started_at = self.env.cr.fetchone()[0]
+
+        watermark = ICP.get_param(self.WATERMARK_PARAM)
+        if full or not watermark:
+            self.env['property.pnl.dirty.month']._pop_months()
+            self._rebuild_months()
+        else:
+            since = fields.Datetime.to_datetime(watermark) - self.WATERMARK_OVERLAP
+            months = self._get_dirty_months(since)
+            if months:
+                self._rebuild_months(months)
+
+        ICP.set_param(self.WATERMARK_PARAM, fields.Datetime.to_string(started_at))
+        return True
+
+    @api.model
+    @instrument('property.pnl.fact._cron_refresh_facts', category='cron')
+    def _cron_refresh_facts(self):
+        """Cron job to refresh the P&L facts incrementally"""
+        return self._refresh()
+
+    def action_rebuild(self):
+        """Full rebuild, e.g. after records were changed by SQL"""
+        self._refresh(full=True)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
@@ -1,6 +1,8 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
+from .property_perf import instrument
+
 
 class PropertyProperty(models.Model):
     _name = 'property.property'
@@ -32,12 +34,19 @@ class PropertyProperty(models.Model):
     landlord_id = fields.Many2one('res.partner', 'Landlord', 
                                   domain=[('is_company', '=', False), ('supplier_rank', '>', 0)])
     manager_id = fields.Many2one('res.users', 'Property Manager', default=lambda self: self.env.user)
+    management_fee_percent = fields.Float('Management Fee (%)',
+                                          help="Share of the rent collected kept as management fee on landlord payouts")
     
     # Financial
     property_value = fields.Monetary('Property Value', currency_field='currency_id')
     currency_id = fields.Many2one('res.currency', 'Currency', 
                                   default=lambda self: self.env.company.currency_id)
     
+    # Receipts
+    gapless_receipts = fields.Boolean('Gapless Receipt Numbers',
+                                      help="Number this property's collection receipts from its own gapless sequence")
+    receipt_sequence_id = fields.Many2one('ir.sequence', 'Receipt Sequence', readonly=True, copy=False)
+    
     # Relations
     flat_ids = fields.One2many('property.flat', 'property_id', 'Flats')
     collection_ids = fields.One2many('property.collection', 'property_id', 'Collections')
@@ -60,8 +69,21 @@ class PropertyProperty(models.Model):
     
     # Images and Attachments
     image = fields.Image('Property Image', max_width=1920, max_height=1920)
-    image_medium = fields.Image('Medium-sized Image', related='image', max_width=128, max_height=128, store=True)
-    image_small = fields.Image('Small-sized Image', related='image', max_width=64, max_height=64, store=True)
+    image_medium = fields.Image('Medium-sized Image', related='image', max_width=128, max_height=128)
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        properties = super().create(vals_list)
+        properties.filtered('gapless_receipts')._get_receipt_sequence()
+        return properties
+    
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals or 'active' in vals:
+            self.env['property.room']._invalidate_availability_index()
+        if vals.get('gapless_receipts'):
+            self._get_receipt_sequence()
+        return res
     
     @api.depends('flat_ids')
     def _compute_total_flats(self):
@@ -74,6 +96,7 @@ class PropertyProperty(models.Model):
             record.total_rooms = sum(len(flat.room_ids) for flat in record.flat_ids)
     
     @api.depends('flat_ids.room_ids.status')
+    @instrument('property.property._compute_room_stats', category='compute')
     def _compute_room_stats(self):
         for record in self:
             rooms = record.flat_ids.mapped('room_ids')
@@ -83,6 +106,7 @@ class PropertyProperty(models.Model):
             record.occupancy_rate = (record.occupied_rooms / record.total_rooms) if record.total_rooms > 0 else 0
     
     @api.depends('flat_ids.room_ids.rent_amount', 'expense_ids.amount')
+    @instrument('property.property._compute_financial_summary', category='compute')
     def _compute_financial_summary(self):
         for record in self:
             # Monthly rent income from occupied rooms
@@ -98,6 +122,28 @@ class PropertyProperty(models.Model):
             # Monthly profit
             record.monthly_profit = record.monthly_rent_income - record.monthly_expenses
     
+    def _get_receipt_sequence(self):
+        """Gapless receipt sequence of the property, created when gapless receipts are switched on.
+
+        Properties switched on earlier get theirs on first use; the property
+        row is locked and re-read first so two first collections cannot each
+        create a sequence and hand out the same numbers.
+        """
+        missing = self.filtered(lambda p: not p.receipt_sequence_id)
+        if missing:
+            self.env.cr.execute(
+                "SELECT id FROM property_property WHERE id = ANY(%s) ORDER BY id FOR UPDATE", [missing.ids])
+            missing.invalidate_recordset(['receipt_sequence_id'])
+            for property_rec in missing.filtered(lambda p: not p.receipt_sequence_id):
+                property_rec.sudo().receipt_sequence_id = self.env['ir.sequence'].sudo().create({
+                    'name': _('Receipts %s', property_rec.code),
+                    'prefix': f'{property_rec.code}/%(year)s/',
+                    'padding': 5,
+                    'implementation': 'no_gap',
+                    'company_id': False,
+                })
+        return self.receipt_sequence_id
+    
     @api.constrains('code')
     def _check_code_unique(self):
         for record in self:
@@ -0,0 +1,106 @@
+import logging
+from collections import defaultdict, namedtuple
+
+from markupsafe import Markup
+
+from odoo import models, fields, api, _
+
+_logger = logging.getLogger(__name__)
+
+DIGEST_PARAM = 'property_management_lite.reminder_digest'
+
+# A reminder the crons want to exist; identical reminders share record, user and summary
+Reminder = namedtuple('Reminder', ['record', 'user_id', 'summary', 'note', 'date_deadline'])
+
+
+class PropertyReminder(models.AbstractModel):
+    _name = 'property.reminder'
+    _description = 'Reminder Scheduler'
+
+    @api.model
+    def _digest_enabled(self):
+        return bool(self.env['ir.config_parameter'].sudo().get_param(DIGEST_PARAM))
+
+    @api.model
+    def _open_activity_keys(self, res_model, res_ids, activity_type):
+        """(res_id, user_id, summary) of the open activities of the records, in one query"""
+        activities = self.env['mail.activity'].sudo().search_fetch([
+            ('res_model', '=', res_model),
+            ('res_id', 'in', res_ids),
+            ('activity_type_id', '=', activity_type.id),
+        ], ['res_id', 'user_id', 'summary'])
+        return {(activity.res_id, activity.user_id.id, activity.summary) for activity in activities}
+
+    @api.model
+    def _missing_reminders(self, reminders, activity_type):
+        """The reminders without an identical open activity, duplicates within the set dropped"""
+        by_model = defaultdict(list)
+        for reminder in reminders:
+            by_model[reminder.record._name].append(reminder)
+        missing = []
+        for res_model, model_reminders in by_model.items():
+            seen = self._open_activity_keys(
+                res_model, list({reminder.record.id for reminder in model_reminders}), activity_type)
+            for reminder in model_reminders:
+                key = (reminder.record.id, reminder.user_id, reminder.summary)
+                if key not in seen:
+                    seen.add(key)
+                    missing.append(reminder)
+        return missing
+
+    @api.model
+    def _schedule(self, reminders, activity_type_xmlid='mail.mail_activity_data_todo'):
+        """Create the activities of the reminders that do not exist yet, in one batch.
+
+        With the ``reminder_digest`` parameter set no activity is created;
+        the digest cron sends each manager one daily summary instead.
+        """
+        if self._digest_enabled():
+            return self.env['mail.activity']
+        activity_type = self.env.ref(activity_type_xmlid)
+        reminders = [reminder._replace(user_id=reminder.user_id or self.env.uid) for reminder in reminders]
+        missing = self._missing_reminders(reminders, activity_type)
+        if not missing:
+            return self.env['mail.activity']
+
+        model_ids = {
+            res_model: self.env['ir.model']._get_id(res_model)
+            for res_model in {reminder.record._name for reminder in missing}
+        }
+        activities = self.env['mail.activity'].sudo().create([{
+            'res_model_id': model_ids[reminder.record._name],
+            'res_id': reminder.record.id,
+            'activity_type_id': activity_type.id,
+            'summary': reminder.summary,
+            'note': reminder.note,
+            'date_deadline': reminder.date_deadline or fields.Date.context_today(self),
+            'user_id': reminder.user_id,
+        } for reminder in missing])
+        _logger.info("Scheduled %s reminders, %s already open", len(activities), len(reminders) - len(missing))
+        return activities
+
+    @api.model
+    def _get_reminders(self):
+        """Every reminder due today, gathered from the reminder crons"""
+        return (self.env['property.agreement']._prepare_expiring_reminders()
+                + self.env['property.collection']._prepare_due_reminders())
+
+    @api.model
+    def _cron_send_digest(self):
+        """Cron job sending each manager one daily digest of their reminders"""
+        if not self._digest_enabled():
+            return
+        by_user = defaultdict(list)
+        for reminder in self._get_reminders():
+            by_user[reminder.user_id or self.env.uid].append(reminder)
+        for user in self.env['res.users'].browse(list(by_user)):
+            reminders = sorted(by_user[user.id], key=lambda r: r.summary)
+            items = Markup('').join(
+                Markup('<li><strong>%s</strong> - %s</li>') % (reminder.summary, reminder.note or '')
+                for reminder in reminders
+            )
+            self.env['mail.thread'].sudo().message_notify(
+                partner_ids=user.partner_id.ids,
+                subject=_('Property reminders for %s', fields.Date.context_today(self)),
+                body=Markup('<ul>%s</ul>') % items,
+            )
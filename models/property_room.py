@@ -1,11 +1,38 @@
-from odoo import models, fields, api, _
+from collections import namedtuple
+from datetime import timedelta
+
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
 
+from .property_cache import bump_cache_version, create_version_sequence, get_cache_version, has_pending_changes
+from .property_perf import instrument
+
+
+# Version of the cached availability index
+AVAILABILITY_VERSION_SEQUENCE = 'property_room_availability_version'
+
+AVAILABILITY_AMENITIES = (
+    'has_ac', 'has_heater', 'has_wardrobe', 'has_desk', 'has_wifi',
+    'has_private_bathroom', 'has_balcony_access', 'has_parking',
+)
+
+RoomAvailability = namedtuple('RoomAvailability', [
+    'id', 'name', 'property_id', 'property_name', 'flat_id', 'room_type_id',
+    'room_type_name', 'max_occupancy', 'rent', 'status', 'amenities', 'available_from',
+])
+
+AVAILABILITY_SORTS = {
+    'rent': (lambda room: (room.rent, room.id), False),
+    '-rent': (lambda room: (room.rent, room.id), True),
+    'available_from': (lambda room: (room.available_from or '', room.id), False),
+    'name': (lambda room: (room.name or '', room.id), False),
+}
+
 
 class PropertyRoom(models.Model):
     _name = 'property.room'
     _description = 'Property Room'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'property.sync.mixin']
     _order = 'property_id, flat_id, room_number'
 
     name = fields.Char('Room Name', compute='_compute_name', store=True)
@@ -72,6 +99,29 @@ class PropertyRoom(models.Model):
     image_ids = fields.One2many('ir.attachment', 'res_id', 'Additional Images', 
                                 domain=[('res_model', '=', 'property.room'), ('mimetype', 'like', 'image/')])
     
+    # Fields feeding the availability index; writing any of them rebuilds it
+    AVAILABILITY_INDEX_FIELDS = {
+        'name', 'room_number', 'property_id', 'flat_id', 'room_type_id', 'rent_amount',
+        'status', 'current_agreement_id', *AVAILABILITY_AMENITIES,
+    }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rooms = super().create(vals_list)
+        self._invalidate_availability_index()
+        return rooms
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self.AVAILABILITY_INDEX_FIELDS.intersection(vals):
+            self._invalidate_availability_index()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._invalidate_availability_index()
+        return res
+
     @api.depends('property_id', 'flat_id', 'room_number')
     def _compute_name(self):
         for record in self:
@@ -97,11 +147,17 @@ class PropertyRoom(models.Model):
             else:
                 record.days_vacant = 0
     
+    @instrument('property.room._compute_financial_stats', category='compute')
     def _compute_financial_stats(self):
+        ids = [id_ for id_ in self._origin.ids if id_]
+        live = {room.id: (amount, date) for room, amount, date in self.env['property.collection']._read_group(
+            [('room_id', 'in', ids)], ['room_id'], ['amount_collected:sum', 'date:max'])}
+        archived = self.env['property.collection.summary']._get_archived_stats('room_id', ids)
         for record in self:
-            collections = self.env['property.collection'].search([('room_id', '=', record.id)])
-            record.total_collected = sum(collections.mapped('amount_collected'))
-            record.last_collection_date = max(collections.mapped('date')) if collections else False
+            amount, last_date = live.get(record._origin.id, (0.0, False))
+            archived_amount, archived_date = archived.get(record._origin.id, (0.0, False))
+            record.total_collected = amount + archived_amount
+            record.last_collection_date = last_date or archived_date
             
             # Calculate pending amount based on current agreement
             if record.current_agreement_id and record.status == 'occupied':
@@ -174,3 +230,105 @@ class PropertyRoom(models.Model):
                 'default_deposit_amount': self.deposit_amount,
             }
         }
+
+    def init(self):
+        create_version_sequence(self.env.cr, AVAILABILITY_VERSION_SEQUENCE)
+
+    @api.model
+    def _invalidate_availability_index(self):
+        bump_cache_version(self.env, AVAILABILITY_VERSION_SEQUENCE)
+
+    @api.model
+    def _get_availability_index(self):
+        """The availability index of the current version, rebuilt uncached after changes not committed yet"""
+        if has_pending_changes(self.env, AVAILABILITY_VERSION_SEQUENCE):
+            return self._read_availability_index()
+        return self._build_availability_index(get_cache_version(self.env.cr, AVAILABILITY_VERSION_SEQUENCE))
+
+    @api.model
+    @tools.ormcache('version')
+    def _build_availability_index(self, version):
+        return self._read_availability_index()
+
+    @api.model
+    def _read_availability_index(self):
+        """Every rentable room as an immutable tuple, built with a single query.
+
+        Vacant and booked rooms are available now; occupied rooms become
+        available the day after their active agreement ends.
+        """
+        self.env.flush_all()
+        amenity_columns = ', '.join(f'r.{name}' for name in AVAILABILITY_AMENITIES)
+        self.env.cr.execute(f"""
+            SELECT r.id, r.name, r.property_id, p.name, r.flat_id, r.room_type_id,
+                   rt.name, rt.max_occupancy, r.rent_amount, r.status, a.end_date,
+                   {amenity_columns}
+              FROM property_room r
+              JOIN property_property p ON p.id = r.property_id
+              JOIN property_room_type rt ON rt.id = r.room_type_id
+         LEFT JOIN property_agreement a ON a.id = r.current_agreement_id AND a.state = 'active'
+             WHERE p.active
+               AND (r.status IN ('vacant', 'booked')
+                    OR (r.status = 'occupied' AND a.end_date IS NOT NULL))
+        """)
+        index = []
+        for row in self.env.cr.fetchall():
+            end_date = row[10]
+            index.append(RoomAvailability(
+                id=row[0], name=row[1], property_id=row[2], property_name=row[3],
+                flat_id=row[4], room_type_id=row[5], room_type_name=row[6],
+                max_occupancy=row[7] or 0, rent=row[8] or 0.0, status=row[9],
+                amenities=frozenset(name for name, flag in zip(AVAILABILITY_AMENITIES, row[11:]) if flag),
+                available_from=(end_date + timedelta(days=1)).isoformat() if row[9] == 'occupied' else False,
+            ))
+        return tuple(index)
+
+    @api.model
+    def search_available(self, property_ids=None, room_type_ids=None, rent_min=None, rent_max=None,
+                         amenities=None, min_occupancy=None, available_by=None,
+                         sort='rent', limit=80, offset=0):
+        """Filter, sort and paginate the availability index.
+
+        ``available_by`` (ISO date) also includes occupied rooms whose agreement
+        ends before that date. Returns ``{'total': int, 'rooms': [dict]}``.
+        """
+        self.check_access('read')
+        property_ids = set(property_ids or ())
+        room_type_ids = set(room_type_ids or ())
+        amenities = frozenset(amenities or ()) & frozenset(AVAILABILITY_AMENITIES)
+        available_by = str(available_by) if available_by else False
+
+        matches = [
+            room for room in self._get_availability_index()
+            if (room.status != 'occupied' or (available_by and room.available_from <= available_by))
+            and (not property_ids or room.property_id in property_ids)
+            and (not room_type_ids or room.room_type_id in room_type_ids)
+            and (rent_min is None or room.rent >= rent_min)
+            and (rent_max is None or room.rent <= rent_max)
+            and (not min_occupancy or room.max_occupancy >= min_occupancy)
+            and amenities <= room.amenities
+        ]
+        # The index is shared by every user; keep the rooms the record rules let this one read
+        allowed = set(self.browse([room.id for room in matches])._filtered_access('read').ids)
+        matches = [room for room in matches if room.id in allowed]
+        key, reverse = AVAILABILITY_SORTS.get(sort, AVAILABILITY_SORTS['rent'])
+        matches.sort(key=key, reverse=reverse)
+
+        limit = max(1, min(int(limit or 80), 500))
+        offset = max(0, int(offset or 0))
+        return {
+            'total': len(matches),
+            'rooms': [{
+                'id': room.id,
+                'name': room.name,
+                'property_id': room.property_id,
+                'property': room.property_name,
+                'room_type_id': room.room_type_id,
+                'room_type': room.room_type_name,
+                'max_occupancy': room.max_occupancy,
+                'rent': room.rent,
+                'status': room.status,
+                'amenities': sorted(room.amenities),
+                'available_from': room.available_from,
+            } for room in matches[offset:offset + limit]],
+        }
@@ -25,6 +25,12 @@ class PropertyRoomType(models.Model):
     
     active = fields.Boolean('Active', default=True)
     
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals or 'max_occupancy' in vals:
+            self.env['property.room']._invalidate_availability_index()
+        return res
+    
     @api.constrains('code')
     def _check_code_unique(self):
         for record in self:
@@ -1,10 +1,15 @@
+from collections import defaultdict
+
 from odoo import models, fields, api, _
 
+from .property_landlord_payment import PAYOUT_COLLECTION_TYPES
+
 
 class PropertyStaffSalary(models.Model):
     _name = 'property.staff.salary'
     _description = 'Staff Salary & Commission'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'property.pnl.source.mixin']
+    _pnl_date_field = 'period_from'
 
     name = fields.Char('Reference', required=True)
     
@@ -19,6 +24,13 @@ class PropertyStaffSalary(models.Model):
     bonus = fields.Monetary('Bonus', currency_field='currency_id')
     total_amount = fields.Monetary('Total Amount', compute='_compute_total', store=True, currency_field='currency_id')
     
+    # Commission Audit (snapshot taken by the payroll run)
+    collected_amount = fields.Monetary('Collected', currency_field='currency_id', readonly=True)
+    collection_count = fields.Integer('Collections', readonly=True)
+    commission_line_ids = fields.One2many('property.staff.salary.commission', 'salary_id', 'Commission Breakdown',
+                                          readonly=True)
+    commission_computed_at = fields.Datetime('Commission Computed On', readonly=True)
+    
     status = fields.Selection([
         ('draft', 'Draft'),
         ('approved', 'Approved'),
@@ -32,3 +44,146 @@ class PropertyStaffSalary(models.Model):
     def _compute_total(self):
         for record in self:
             record.total_amount = record.basic_salary + record.commission + record.bonus
+
+    @api.model
+    def _get_collection_aggregates(self, period_from, period_to, user_ids=None):
+        """Collected amount and count per collector, property, type and days late, in one grouped query.
+
+        Deposits and token money are refundable to the tenant and earn no
+        commission, as they are no landlord income either.
+        """
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT collected_by, property_id, collection_type, days_late, SUM(amount_collected), COUNT(*)
+              FROM property_collection
+             WHERE status IN ('collected', 'verified', 'deposited')
+               AND collected_by IS NOT NULL
+               AND collection_type = ANY(%(collection_types)s)
+               AND date BETWEEN %(date_from)s AND %(date_to)s
+               AND (%(user_ids)s::int[] IS NULL OR collected_by = ANY(%(user_ids)s::int[]))
+          GROUP BY collected_by, property_id, collection_type, days_late
+        """, {'date_from': period_from, 'date_to': period_to, 'collection_types': PAYOUT_COLLECTION_TYPES,
+              'user_ids': list(user_ids) if user_ids else None})
+        return self.env.cr.fetchall()
+    
+    @api.model
+    def _compute_commissions(self, period_from, period_to, user_ids=None):
+        """Commission of every collector over the period under the active tiered rules.
+
+        Plans do not stack: each collection counts towards the most specific
+        plan matching it only, so a property plan replaces the general plan
+        for that property instead of paying on top of it.
+
+        Returns a dict user_id -> dict with collected_amount, collection_count,
+        commission and the commission line values, each line recording the
+        tier applied so the figure can be recomputed by hand.
+        """
+        rules = self.env['property.commission.rule'].search([])
+        aggregates = self._get_collection_aggregates(period_from, period_to, user_ids)
+        currency = self.env.company.currency_id
+        results = {}
+        for user_id, property_id, collection_type, days_late, amount, count in aggregates:
+            result = results.setdefault(user_id, {
+                'collected_amount': 0.0, 'collection_count': 0, 'commission': 0.0, 'lines': [],
+                'rows': [],
+            })
+            result['collected_amount'] += amount
+            result['collection_count'] += count
+            result['rows'].append((property_id, collection_type, days_late, amount))
+
+        plans = rules._get_tier_groups()
+        for result in results.values():
+            bases = [0.0] * len(plans)
+            for property_id, collection_type, days_late, amount in result.pop('rows'):
+                matching = [index for index, tiers in enumerate(plans)
+                            if tiers[0]._matches(property_id, collection_type, days_late)]
+                if matching:
+                    # max() keeps the first plan, by sequence, among equally specific ones
+                    bases[max(matching, key=lambda index: plans[index][0]._specificity())] += amount
+            for tiers, base in zip(plans, bases):
+                if not base:
+                    continue
+                for tier, portion in tiers._split(base):
+                    commission = currency.round(portion * tier.rate / 100)
+                    result['commission'] += commission
+                    result['lines'].append({
+                        'rule_id': tier.id,
+                        'rule_name': tier.name,
+                        'scope_base': base,
+                        'tier_from': tier.min_amount,
+                        'tier_amount': portion,
+                        'rate': tier.rate,
+                        'commission': commission,
+                    })
+        return results
+
+
+class PropertyStaffSalaryCommission(models.Model):
+    _name = 'property.staff.salary.commission'
+    _description = 'Staff Salary Commission Line'
+    _order = 'salary_id, id'
+
+    salary_id = fields.Many2one('property.staff.salary', 'Salary', required=True, ondelete='cascade', index=True)
+    rule_id = fields.Many2one('property.commission.rule', 'Rule', ondelete='set null')
+    
+    # Snapshot of the rule and figures used, kept when the rule changes later
+    rule_name = fields.Char('Rule', readonly=True)
+    scope_base = fields.Monetary('Collected in Scope', currency_field='currency_id', readonly=True)
+    tier_from = fields.Monetary('Tier From', currency_field='currency_id', readonly=True)
+    tier_amount = fields.Monetary('Amount in Tier', currency_field='currency_id', readonly=True)
+    rate = fields.Float('Rate (%)', readonly=True)
+    commission = fields.Monetary('Commission', currency_field='currency_id', readonly=True)
+    
+    currency_id = fields.Many2one(related='salary_id.currency_id')
+
+
+class PropertyCommissionRule(models.Model):
+    _name = 'property.commission.rule'
+    _description = 'Collector Commission Tier'
+    _order = 'sequence, min_amount, id'
+
+    name = fields.Char('Rule Name', required=True)
+    sequence = fields.Integer('Sequence', default=10)
+    active = fields.Boolean('Active', default=True)
+
+    # Scope (empty means any); tiers sharing a scope form one plan
+    property_id = fields.Many2one('property.property', 'Property')
+    collection_type = fields.Selection(
+        lambda self: self.env['property.collection']._fields['collection_type'].selection, string='Collection Type')
+    max_days_late = fields.Integer('Max Days Late', default=-1,
+                                   help="Collections paid later than this do not count; -1 counts every collection")
+
+    # Tier
+    min_amount = fields.Monetary('From Amount', currency_field='currency_id',
+                                 help="The rate applies to the collected amount above this, up to the next tier")
+    rate = fields.Float('Rate (%)', required=True)
+    currency_id = fields.Many2one('res.currency', 'Currency',
+                                  default=lambda self: self.env.company.currency_id)
+
+    def _scope_key(self):
+        return (self.property_id.id, self.collection_type, self.max_days_late)
+
+    def _specificity(self):
+        """Number of scope criteria set, the plan with most of them wins a collection"""
+        return bool(self.property_id) + bool(self.collection_type) + (self.max_days_late >= 0)
+
+    def _matches(self, property_id, collection_type, days_late):
+        return ((not self.property_id or self.property_id.id == property_id)
+                and (not self.collection_type or self.collection_type == collection_type)
+                and (self.max_days_late < 0 or (days_late or 0) <= self.max_days_late))
+
+    def _get_tier_groups(self):
+        """The rules grouped by scope, in sequence order, each group ordered by tier"""
+        groups = defaultdict(lambda: self.browse())
+        for rule in self:
+            groups[rule._scope_key()] |= rule
+        return [tiers.sorted(lambda r: (r.min_amount, r.id)) for tiers in groups.values()]
+
+    def _split(self, base):
+        """(tier, portion of base) for the tiers in self reached by base, marginally"""
+        tiers = list(self)
+        for index, tier in enumerate(tiers):
+            upper = tiers[index + 1].min_amount if index + 1 < len(tiers) else base
+            portion = min(base, upper) - tier.min_amount
+            if portion > 0:
+                yield tier, portion
@@ -0,0 +1,236 @@
+import base64
+import binascii
+import logging
+import re
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools.image import image_process
+from odoo.tools.mimetypes import guess_mimetype
+
+_logger = logging.getLogger(__name__)
+
+# Binary fields offloaded to content-addressed filestore attachments
+OFFLOAD_FIELDS = [
+    ('property.expense', 'bill_image'),
+    ('property.collection', 'receipt_image'),
+    ('property.agreement', 'agreement_document'),
+    ('property.tenant', 'image'),
+    ('property.property', 'image'),
+]
+
+# Resized copies once stored next to the originals; previews are now resized on read
+STALE_COPY_FIELDS = [
+    ('property.property', 'image_medium'),
+    ('property.property', 'image_small'),
+    ('property.tenant', 'image_128'),
+    ('property.expense', 'bill_thumbnail'),
+]
+
+BATCH_SIZE_PARAM = 'property_management_lite.storage_offload_batch_size'
+
+
+def bill_thumbnail(value, size=256):
+    """Base64 preview of at most ``size`` pixels of an image bill; False for PDFs etc."""
+    if not value:
+        return False
+    try:
+        raw = base64.b64decode(value)
+    except ValueError:
+        return False
+    if not guess_mimetype(raw).startswith('image/'):
+        return False
+    try:
+        return base64.b64encode(image_process(raw, size=(size, size)))
+    except UserError:
+        return False
+
+
+def legacy_raw(value):
+    """Content of an inline column value: the base64 text the ORM wrote, or raw bytes stored by other means"""
+    value = value.encode() if isinstance(value, str) else bytes(value)
+    try:
+        return base64.b64decode(re.sub(rb'\s', b'', value), validate=True)
+    except binascii.Error:
+        return value
+
+
+class PropertyStorageOffload(models.Model):
+    _name = 'property.storage.offload'
+    _description = 'Attachment Storage Offload Run'
+    _order = 'date desc, id desc'
+    _rec_name = 'date'
+
+    date = fields.Datetime('Run Date', required=True, default=fields.Datetime.now, readonly=True)
+    legacy_values_moved = fields.Integer('Inline Values Moved', readonly=True,
+                                         help="Values moved from table columns to attachments")
+    attachments_moved = fields.Integer('Attachments Moved to Filestore', readonly=True)
+    bytes_moved = fields.Float('Data Moved (MB)', digits=(16, 2), readonly=True)
+    stale_copies_removed = fields.Integer('Stored Copies Removed', readonly=True,
+                                          help="Resized images no longer stored next to their original")
+    deduplicated_files = fields.Integer('Deduplicated Files', readonly=True,
+                                        help="Attachments sharing a filestore file with another attachment")
+    db_size_before = fields.Float('Tables Before (MB)', digits=(16, 2), readonly=True)
+    db_size_after = fields.Float('Tables After (MB)', digits=(16, 2), readonly=True)
+    reclaimed = fields.Float('Reclaimed (MB)', digits=(16, 2), compute='_compute_reclaimed', store=True)
+    done = fields.Boolean('Completed', readonly=True,
+                          help="Nothing was left to migrate after this run")
+
+    @api.depends('db_size_before', 'db_size_after')
+    def _compute_reclaimed(self):
+        for record in self:
+            record.reclaimed = max(record.db_size_before - record.db_size_after, 0.0)
+
+    @api.model
+    def _get_tables(self):
+        return ['ir_attachment'] + [self.env[model]._table for model, _field in OFFLOAD_FIELDS]
+
+    @api.model
+    def _tables_size(self):
+        """Live data size of the offload tables in MB (dead tuples are not counted)"""
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(pg_total_relation_size(c.oid)
+                                * s.n_live_tup::float / GREATEST(s.n_live_tup + s.n_dead_tup, 1)), 0)
+              FROM pg_class c
+              JOIN pg_stat_user_tables s ON s.relid = c.oid
+             WHERE c.relname = ANY(%s)
+        """, [list(set(self._get_tables()))])
+        return self.env.cr.fetchone()[0] / (1024 * 1024)
+
+    @api.model
+    def _legacy_columns(self):
+        """(model, field) pairs whose table still has an inline column from before attachments"""
+        tables = {self.env[model]._table: (model, field) for model, field in OFFLOAD_FIELDS}
+        self.env.cr.execute("""
+            SELECT table_name, column_name
+              FROM information_schema.columns
+             WHERE table_schema = current_schema()
+               AND table_name = ANY(%s)
+        """, [list(tables)])
+        columns = set(self.env.cr.fetchall())
+        return [(model, field) for table, (model, field) in tables.items() if (table, field) in columns]
+
+    @api.model
+    def _move_legacy_values(self, model, field, batch_size):
+        """Move one batch of inline column values into attachments, returning (count, bytes)"""
+        table = self.env[model]._table
+        self.env.cr.execute(f"""
+            SELECT id, "{field}", octet_length("{field}")
+              FROM {table}
+             WHERE "{field}" IS NOT NULL
+             LIMIT %s
+        """, [batch_size])
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return 0, 0
+        self.env['ir.attachment'].sudo().create([{
+            'name': field,
+            'res_model': model,
+            'res_field': field,
+            'res_id': record_id,
+            'type': 'binary',
+            'raw': legacy_raw(value),
+        } for record_id, value, _size in rows])
+        self.env.cr.execute(f'UPDATE {table} SET "{field}" = NULL WHERE id = ANY(%s)',
+                            [[record_id for record_id, *_rest in rows]])
+        return len(rows), sum(size or 0 for *_rest, size in rows)
+
+    @api.model
+    def _move_db_attachments(self, batch_size):
+        """Move one batch of database-stored attachments of the offload fields to the filestore"""
+        if self.env['ir.attachment']._storage() == 'db':
+            return 0, 0
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', 'in', [model for model, _field in OFFLOAD_FIELDS]),
+            ('res_field', 'in', [field for _model, field in OFFLOAD_FIELDS]),
+            ('store_fname', '=', False),
+            ('db_datas', '!=', False),
+        ], limit=batch_size)
+        moved_bytes = sum(attachments.mapped('file_size'))
+        for attachment in attachments:
+            # Rewriting raw stores the file content-addressed by checksum, reusing identical files
+            attachment.write({'raw': attachment.raw, 'mimetype': attachment.mimetype})
+        return len(attachments), moved_bytes
+
+    @api.model
+    def _remove_stale_copies(self, batch_size):
+        """Delete one batch of the attachments left by the formerly stored resized images"""
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', 'in', [model for model, _field in STALE_COPY_FIELDS]),
+            ('res_field', 'in', [field for _model, field in STALE_COPY_FIELDS]),
+        ], limit=batch_size)
+        attachments = attachments.filtered(lambda a: (a.res_model, a.res_field) in STALE_COPY_FIELDS)
+        removed_bytes = sum(attachments.mapped('file_size'))
+        count = len(attachments)
+        attachments.unlink()
+        return count, removed_bytes
+
+    @api.model
+    def _count_deduplicated(self):
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(n - 1), 0)
+              FROM (SELECT COUNT(*) AS n
+                      FROM ir_attachment
+                     WHERE store_fname IS NOT NULL AND res_model = ANY(%s)
+                  GROUP BY store_fname) files
+        """, [[model for model, _field in OFFLOAD_FIELDS]])
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _run(self, max_batches=None):
+        """Offload binaries batch by batch, committing between batches when run by the cron"""
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param(BATCH_SIZE_PARAM, 200))
+        commit = self.env.context.get('offload_commit', False)
+        size_before = self._tables_size()
+        legacy = attachments = copies = moved_bytes = batches = 0
+        done = False
+        while max_batches is None or batches < max_batches:
+            moved = 0
+            for model, field in self._legacy_columns():
+                count, size = self._move_legacy_values(model, field, batch_size)
+                legacy += count
+                moved += count
+                moved_bytes += size
+            count, size = self._move_db_attachments(batch_size)
+            attachments += count
+            moved += count
+            moved_bytes += size
+            count, size = self._remove_stale_copies(batch_size)
+            copies += count
+            moved += count
+            moved_bytes += size
+            batches += 1
+            if commit:
+                self.env.cr.commit()
+            if not moved:
+                done = True
+                break
+
+        if not legacy and not attachments and not copies:
+            return self.browse()
+        self.env.flush_all()
+        run = self.create({
+            'legacy_values_moved': legacy,
+            'attachments_moved': attachments,
+            'stale_copies_removed': copies,
+            'bytes_moved': moved_bytes / (1024 * 1024),
+            'deduplicated_files': self._count_deduplicated(),
+            'db_size_before': size_before,
+            'db_size_after': self._tables_size(),
+            'done': done,
+        })
+        _logger.info("Storage offload moved %s inline values and %s attachments, removed %s stored copies (%.1f MB)",
+                     legacy, attachments, copies, run.bytes_moved)
+        return run
+
+    @api.model
+    def _cron_offload(self):
+        """Cron job to offload inline binaries to the filestore"""
+        self.with_context(offload_commit=True)._run(max_batches=50)
+
+    def action_run(self):
+        self._run(max_batches=10)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+# Deletions are kept this long; collectors last synced before that download everything again
+SYNC_TOMBSTONE_RETENTION = timedelta(days=90)
+
+
+class PropertySyncMixin(models.AbstractModel):
+    _name = 'property.sync.mixin'
+    _description = 'Records Synced to the Collector App'
+
+    def unlink(self):
+        self.env['property.sync.tombstone']._log_deleted(self)
+        return super().unlink()
+
+
+class PropertySyncTombstone(models.Model):
+    _name = 'property.sync.tombstone'
+    _description = 'Deleted Record of the Collector App'
+    _order = 'deleted_at, id'
+    _log_access = False
+
+    model = fields.Char('Model', required=True, readonly=True)
+    res_id = fields.Integer('Record ID', required=True, readonly=True)
+    deleted_at = fields.Datetime('Deleted On', required=True, readonly=True, index=True)
+
+    @api.model
+    def _log_deleted(self, records):
+        """Remember the deleted records, so the next delta sync removes them from the devices"""
+        if records:
+            deleted_at = self.env.cr.now()
+            self.sudo().create([
+                {'model': records._name, 'res_id': record_id, 'deleted_at': deleted_at}
+                for record_id in records.ids
+            ])
+
+    @api.model
+    def _get_deleted_ids(self, model, since):
+        self.env.cr.execute(
+            "SELECT res_id FROM property_sync_tombstone WHERE model = %s AND deleted_at > %s ORDER BY res_id",
+            [model, since])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.autovacuum
+    def _gc_tombstones(self):
+        self.env.cr.execute("DELETE FROM property_sync_tombstone WHERE deleted_at < %s",
+                            [fields.Datetime.now() - SYNC_TOMBSTONE_RETENTION])
@@ -1,11 +1,41 @@
-from odoo import models, fields, api, _
+import re
+
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
 
+from .property_cache import bump_cache_version, create_version_sequence, get_cache_version, has_pending_changes
+from .property_perf import instrument
+
+# Version of the cached portal user to tenant lookup
+PORTAL_TENANT_VERSION_SEQUENCE = 'property_portal_tenant_version'
+
+# Numbers without a country code are taken as local (UAE) numbers
+LOCAL_COUNTRY_CODE = '971'
+
+
+def normalize_mobile(value):
+    """Lookup key of a mobile number: '+971 50 123 4567', '00971501234567' and '050-1234567' all give '501234567'"""
+    digits = re.sub(r'\D', '', value or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    elif digits.startswith('0'):
+        digits = LOCAL_COUNTRY_CODE + digits.lstrip('0')
+    elif value and not value.strip().startswith('+') and len(digits) <= 9:
+        digits = LOCAL_COUNTRY_CODE + digits
+    if digits.startswith(LOCAL_COUNTRY_CODE):
+        digits = digits[len(LOCAL_COUNTRY_CODE):]
+    return digits or False
+
+
+def normalize_id(value):
+    """Lookup key of an ID or passport number: upper-case letters and digits only"""
+    return re.sub(r'[^0-9A-Z]', '', (value or '').upper()) or False
+
 
 class PropertyTenant(models.Model):
     _name = 'property.tenant'
     _description = 'Property Tenant'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'property.sync.mixin']
     _order = 'name'
 
     # Basic Information
@@ -25,6 +55,12 @@ class PropertyTenant(models.Model):
         ('other', 'Other'),
     ], string='ID Type', required=True, default='emirates_id')
     
+    # Duplicate Detection
+    mobile_key = fields.Char('Mobile Key', compute='_compute_lookup_keys', store=True, copy=False,
+                             help="Mobile number without formatting, leading zeros or local country code")
+    id_key = fields.Char('ID Key', compute='_compute_lookup_keys', store=True, copy=False,
+                         help="ID/Passport number without spaces, dashes or case")
+    
     # Additional Contact Information
     emergency_contact_name = fields.Char('Emergency Contact Name')
     emergency_contact_phone = fields.Char('Emergency Contact Phone')
@@ -87,6 +123,45 @@ class PropertyTenant(models.Model):
     
     # Image
     image = fields.Image('Photo', max_width=1920, max_height=1920)
+    image_128 = fields.Image('Photo Thumbnail', related='image', max_width=128, max_height=128)
+    
+    # Portal
+    portal_cache_version = fields.Integer('Portal Cache Version', default=0, copy=False,
+                                          help="Bumped whenever the tenant's collections or agreements change")
+    
+    _sql_constraints = [
+        ('mobile_key_unique', 'UNIQUE(mobile_key)', 'A tenant with this mobile number already exists!'),
+        ('id_key_unique', 'UNIQUE(id_key)', 'A tenant with this ID/Passport number already exists!'),
+    ]
+    
+    def init(self):
+        create_version_sequence(self.env.cr, PORTAL_TENANT_VERSION_SEQUENCE)
+    
+    @api.depends('mobile', 'id_passport')
+    def _compute_lookup_keys(self):
+        for record in self:
+            record.mobile_key = normalize_mobile(record.mobile)
+            record.id_key = normalize_id(record.id_passport)
+    
+    def _check_lookup_keys_unique(self, previous_keys=None):
+        """Fallback for databases where the UNIQUE constraints could not be added
+        because of existing duplicates; one grouped query per key for the whole batch.
+
+        Only a tenant joining the group of another one fails: ``previous_keys``
+        maps the id of an updated tenant to its ``(mobile_key, id_key)`` before
+        the write, so editing a legacy duplicate, or resolving it, still works.
+        """
+        previous_keys = previous_keys or {}
+        for index, (fname, message) in enumerate((
+            ('mobile_key', _('A tenant with this mobile number already exists!')),
+            ('id_key', _('A tenant with this ID/Passport number already exists!')),
+        )):
+            keys = {
+                record[fname] for record in self
+                if record[fname] and record[fname] != previous_keys.get(record.id, (False, False))[index]
+            }
+            if keys and self._read_group([(fname, 'in', list(keys))], [fname], having=[('__count', '>', 1)]):
+                raise ValidationError(message)
     
     @api.depends('agreement_ids.state')
     def _compute_agreement_stats(self):
@@ -95,10 +170,15 @@ class PropertyTenant(models.Model):
             record.active_agreements_count = len(record.agreement_ids.filtered(lambda a: a.state == 'active'))
     
     @api.depends('collection_ids.amount_collected')
+    @instrument('property.tenant._compute_payment_stats', category='compute')
     def _compute_payment_stats(self):
+        archived = self.env['property.collection.summary']._get_archived_stats(
+            'tenant_id', [id_ for id_ in self._origin.ids if id_])
         for record in self:
-            record.total_paid = sum(record.collection_ids.mapped('amount_collected'))
-            record.last_payment_date = max(record.collection_ids.mapped('date')) if record.collection_ids else False
+            archived_amount, archived_date = archived.get(record._origin.id, (0.0, False))
+            record.total_paid = sum(record.collection_ids.mapped('amount_collected')) + archived_amount
+            record.last_payment_date = (max(record.collection_ids.mapped('date')) if record.collection_ids
+                                        else archived_date)
     
     @api.model
     def create(self, vals):
@@ -115,7 +195,9 @@ class PropertyTenant(models.Model):
             partner = self.env['res.partner'].create(partner_vals)
             vals['partner_id'] = partner.id
         
-        return super().create(vals)
+        tenant = super().create(vals)
+        tenant._check_lookup_keys_unique()
+        return tenant
     
     def write(self, vals):
         # Update corresponding res.partner
@@ -131,29 +213,52 @@ class PropertyTenant(models.Model):
             if partner_vals:
                 self.partner_id.write(partner_vals)
         
-        return super().write(vals)
+        if 'mobile' not in vals and 'id_passport' not in vals:
+            return super().write(vals)
+        previous_keys = {record.id: (record.mobile_key, record.id_key) for record in self}
+        res = super().write(vals)
+        self._check_lookup_keys_unique(previous_keys)
+        return res
     
-    @api.constrains('id_passport')
-    def _check_id_passport_unique(self):
-        for record in self:
-            if record.id_passport:
-                existing = self.search([
-                    ('id_passport', '=', record.id_passport),
-                    ('id', '!=', record.id)
-                ])
-                if existing:
-                    raise ValidationError(_('ID/Passport number must be unique!'))
-    
-    @api.constrains('mobile')
-    def _check_mobile_unique(self):
-        for record in self:
-            if record.mobile:
-                existing = self.search([
-                    ('mobile', '=', record.mobile),
-                    ('id', '!=', record.id)
-                ])
-                if existing:
-                    raise ValidationError(_('Mobile number must be unique!'))
+    @api.model
+    def _bump_portal_cache_version(self, tenant_ids):
+        """Invalidate the portal cache of the given tenants with a single UPDATE"""
+        tenant_ids = [tenant_id for tenant_id in set(tenant_ids) if tenant_id]
+        if not tenant_ids:
+            return
+        self.env.cr.execute("""
+            UPDATE property_tenant
+               SET portal_cache_version = portal_cache_version + 1
+             WHERE id = ANY(%s)
+        """, [tenant_ids])
+        self.browse(tenant_ids).invalidate_recordset(['portal_cache_version'])
+    
+    @api.model
+    def _get_portal_tenant_id(self, uid):
+        """Tenant linked to a portal user's partner, cached per user"""
+        if has_pending_changes(self.env, PORTAL_TENANT_VERSION_SEQUENCE):
+            return self._read_portal_tenant_id(uid)
+        return self._lookup_portal_tenant_id(uid, get_cache_version(self.env.cr, PORTAL_TENANT_VERSION_SEQUENCE))
+
+    @api.model
+    def _invalidate_portal_tenant_ids(self):
+        bump_cache_version(self.env, PORTAL_TENANT_VERSION_SEQUENCE)
+
+    @api.model
+    @tools.ormcache('uid', 'version')
+    def _lookup_portal_tenant_id(self, uid, version):
+        return self._read_portal_tenant_id(uid)
+
+    @api.model
+    def _read_portal_tenant_id(self, uid):
+        self.env.cr.execute("""
+            SELECT p.tenant_id
+              FROM res_users u
+              JOIN res_partner p ON p.id = u.partner_id
+             WHERE u.id = %s
+        """, [uid])
+        row = self.env.cr.fetchone()
+        return row[0] if row else False
     
     def action_activate(self):
         self.write({'status': 'active'})
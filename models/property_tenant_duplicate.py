@@ -0,0 +1,52 @@
+from odoo import models, fields, tools
+
+
+class PropertyTenantDuplicate(models.Model):
+    _name = 'property.tenant.duplicate'
+    _description = 'Suspected Duplicate Tenant'
+    _auto = False
+    _order = 'match_type, match_key, tenant_id'
+    _rec_name = 'tenant_id'
+
+    match_type = fields.Selection([
+        ('mobile', 'Same Mobile'),
+        ('id', 'Same ID/Passport'),
+        ('name', 'Same Name and Nationality'),
+    ], string='Match', readonly=True)
+    match_key = fields.Char('Matched On', readonly=True)
+    group_size = fields.Integer('Tenants in Group', readonly=True)
+
+    tenant_id = fields.Many2one('property.tenant', 'Tenant', readonly=True)
+    mobile = fields.Char('Mobile Number', readonly=True)
+    id_passport = fields.Char('ID/Passport Number', readonly=True)
+    status = fields.Selection(related='tenant_id.status')
+    date_joined = fields.Date('Date Joined', readonly=True)
+
+    def init(self):
+        """One row per tenant sharing a lookup key with another tenant.
+
+        Every key is grouped with a window count over a single scan of the
+        tenants, so the cost grows with the number of tenants rather than
+        the number of pairs. Mobile and ID keys are unique once legacy
+        duplicates are merged; the name key keeps catching look-alikes.
+        """
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT row_number() OVER (ORDER BY match_type, match_key, tenant_id) AS id, keyed.*
+                  FROM (
+                        SELECT keys.match_type, keys.match_key,
+                               COUNT(*) OVER (PARTITION BY keys.match_type, keys.match_key) AS group_size,
+                               t.id AS tenant_id, t.mobile, t.id_passport, t.date_joined
+                          FROM property_tenant t
+                    CROSS JOIN LATERAL (VALUES
+                                   ('mobile', t.mobile_key),
+                                   ('id', t.id_key),
+                                   ('name', lower(regexp_replace(t.name, '[^[:alnum:]]', '', 'g'))
+                                            || '/' || COALESCE(t.nationality::text, '-'))
+                               ) AS keys (match_type, match_key)
+                         WHERE keys.match_key IS NOT NULL
+                       ) keyed
+                 WHERE keyed.group_size > 1
+            )
+        """)
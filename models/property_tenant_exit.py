@@ -1,4 +1,7 @@
+import calendar
+
 from odoo import models, fields, api, _
+from odoo.exceptions import UserError
 
 
 class PropertyTenantExit(models.Model):
@@ -29,6 +32,16 @@ class PropertyTenantExit(models.Model):
         ('absconding', 'Absconding'),
     ], string='Exit Type', default='normal')
     
+    # Settlement Sources (filled by Calculate Settlement)
+    invoice_outstanding = fields.Monetary('Unpaid Invoices', currency_field='currency_id', readonly=True)
+    dues_outstanding = fields.Monetary('Open Dues', currency_field='currency_id', readonly=True,
+                                       help="Open dues not already billed by an invoice of the same month and type; "
+                                            "rent from the exit month on is in the prorated rent instead")
+    prorated_rent = fields.Monetary('Prorated Rent', currency_field='currency_id', readonly=True,
+                                    help="Rent of the exit month up to the exit date, less the rent already paid "
+                                         "from that month on; negative when the tenant paid ahead")
+    deposit_held = fields.Monetary('Deposit Held', currency_field='currency_id', readonly=True)
+    
     # Financial Settlement
     deposit_refund = fields.Monetary('Deposit Refund', currency_field='currency_id')
     pending_dues = fields.Monetary('Pending Dues', currency_field='currency_id')
@@ -50,6 +63,13 @@ class PropertyTenantExit(models.Model):
     currency_id = fields.Many2one('res.currency', 'Currency', 
                                   default=lambda self: self.env.company.currency_id)
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        exits = super().create(vals_list)
+        # Settlements not given by the caller are calculated right away
+        exits.filtered(lambda e: not e.pending_dues and not e.deposit_refund).action_compute_settlement()
+        return exits
+    
     @api.depends('tenant_id', 'exit_date')
     def _compute_name(self):
         for record in self:
@@ -63,15 +83,222 @@ class PropertyTenantExit(models.Model):
         for record in self:
             record.final_settlement = record.deposit_refund - record.pending_dues - record.damages_deduction
     
+    @api.model
+    def _get_settlement_figures(self, exits):
+        """Settlement sources of ``(agreement_id, exit_date)`` pairs, one grouped query per source.
+
+        Returns a dict agreement_id -> dict with invoice_outstanding,
+        dues_outstanding, prorated_rent and deposit_held.
+        """
+        exit_dates = {agreement_id: exit_date for agreement_id, exit_date in exits if agreement_id and exit_date}
+        figures = {agreement_id: dict.fromkeys(
+            ['invoice_outstanding', 'dues_outstanding', 'prorated_rent', 'deposit_held'], 0.0)
+            for agreement_id in exit_dates}
+        if not exit_dates:
+            return figures
+        agreement_ids = list(exit_dates)
+        exit_params = [agreement_ids, [exit_dates[agreement_id] for agreement_id in agreement_ids]]
+        self.env.flush_all()
+        cr = self.env.cr
+
+        # Rent from the exit month on is settled by the prorated rent below, not by its invoice
+        # or due, which create_monthly_dues issues for the whole month ahead of time
+        cr.execute("""
+            SELECT e.agreement_id, SUM(i.amount_residual)
+              FROM unnest(%s::int[], %s::date[]) AS e (agreement_id, exit_date)
+              JOIN property_invoice i ON i.agreement_id = e.agreement_id
+             WHERE i.state IN ('posted', 'partial')
+               AND (i.invoice_type != 'rent' OR date_trunc('month', i.date) < date_trunc('month', e.exit_date))
+          GROUP BY e.agreement_id
+        """, exit_params)
+        for agreement_id, amount in cr.fetchall():
+            figures[agreement_id]['invoice_outstanding'] = amount or 0.0
+
+        # Dues and invoices are both generated for rent; count a due only when no invoice billed it
+        cr.execute("""
+            SELECT e.agreement_id, SUM(d.outstanding_amount)
+              FROM unnest(%s::int[], %s::date[]) AS e (agreement_id, exit_date)
+              JOIN property_due_tracker d ON d.agreement_id = e.agreement_id
+             WHERE d.status IN ('pending', 'overdue', 'partially_paid')
+               AND (d.due_type != 'rent' OR date_trunc('month', d.due_date) < date_trunc('month', e.exit_date))
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM property_invoice i
+                     WHERE i.agreement_id = d.agreement_id
+                       AND i.invoice_type = d.due_type
+                       AND i.state != 'cancelled'
+                       AND date_trunc('month', i.date) = date_trunc('month', d.due_date))
+          GROUP BY e.agreement_id
+        """, exit_params)
+        for agreement_id, amount in cr.fetchall():
+            figures[agreement_id]['dues_outstanding'] = amount or 0.0
+
+        # Rent of the exit month up to the exit date, less the rent already paid from that month on
+        cr.execute("""
+            SELECT e.agreement_id, a.rent_amount, GREATEST(date_trunc('month', e.exit_date)::date, a.start_date),
+                   (SELECT COALESCE(SUM(i.amount_paid), 0)
+                      FROM property_invoice i
+                     WHERE i.agreement_id = e.agreement_id AND i.invoice_type = 'rent' AND i.state != 'cancelled'
+                       AND date_trunc('month', i.date) >= date_trunc('month', e.exit_date))
+                 + (SELECT COALESCE(SUM(d.amount_paid), 0)
+                      FROM property_due_tracker d
+                     WHERE d.agreement_id = e.agreement_id AND d.due_type = 'rent'
+                       AND date_trunc('month', d.due_date) >= date_trunc('month', e.exit_date)
+                       AND NOT EXISTS (
+                            SELECT 1 FROM property_invoice i
+                             WHERE i.agreement_id = d.agreement_id AND i.invoice_type = 'rent'
+                               AND i.state != 'cancelled'
+                               AND date_trunc('month', i.date) = date_trunc('month', d.due_date)))
+              FROM unnest(%s::int[], %s::date[]) AS e (agreement_id, exit_date)
+              JOIN property_agreement a ON a.id = e.agreement_id
+        """, exit_params)
+        for agreement_id, rent, period_start, paid in cr.fetchall():
+            exit_date = exit_dates[agreement_id]
+            days_in_month = calendar.monthrange(exit_date.year, exit_date.month)[1]
+            days = max((exit_date - period_start).days + 1, 0)
+            figures[agreement_id]['prorated_rent'] = (rent or 0.0) * days / days_in_month - paid
+
+        cr.execute("""
+            SELECT agreement_id, SUM(balance)
+              FROM property_deposit
+             WHERE agreement_id = ANY(%s) AND balance > 0
+          GROUP BY agreement_id
+        """, [agreement_ids])
+        for agreement_id, amount in cr.fetchall():
+            figures[agreement_id]['deposit_held'] = amount or 0.0
+        return figures
+
+    @api.model
+    def _prepare_settlement_vals(self, figures):
+        currency = self.env.company.currency_id
+        vals = {key: currency.round(value) for key, value in figures.items()}
+        vals['pending_dues'] = currency.round(
+            figures['invoice_outstanding'] + figures['dues_outstanding'] + figures['prorated_rent'])
+        vals['deposit_refund'] = vals['deposit_held']
+        return vals
+
+    def action_compute_settlement(self):
+        """Fill dues, prorated rent and deposit from the tenant's records; damages stay as entered"""
+        figures = self._get_settlement_figures([(record.agreement_id.id, record.exit_date) for record in self])
+        for record in self:
+            record.write(self._prepare_settlement_vals(figures[record.agreement_id.id]))
+    
+    def _get_held_deposits(self):
+        return self.env['property.deposit'].search(
+            [('agreement_id', 'in', self.agreement_id.ids), ('balance', '>', 0)], order='deposit_date, id')
+
+    def _check_deposit_dates(self):
+        """Refuse exits dated before the last movement of their deposits, the ledger only grows forward"""
+        deposits = self._get_held_deposits()
+        last_dates = deposits._get_last_move_dates()
+        for record in self:
+            for deposit in deposits.filtered(lambda d: d.agreement_id == record.agreement_id):
+                last_date = last_dates.get(deposit.id)
+                if last_date and record.exit_date < last_date:
+                    raise UserError(_(
+                        'Deposit %(deposit)s already has a movement on %(date)s, after the exit date of %(exit)s. '
+                        'Set the exit date on or after %(date)s to settle the deposit.',
+                        deposit=deposit.name, date=last_date, exit=record.name))
+
+    def _get_settled_documents(self):
+        """Open invoices and dues counted in the pending dues of the exit, oldest first"""
+        self.ensure_one()
+        exit_month = self.exit_date.replace(day=1)
+        invoices = self.env['property.invoice'].search([
+            ('agreement_id', '=', self.agreement_id.id),
+            ('state', '!=', 'cancelled'),
+        ], order='due_date, id')
+        billed = {(invoice.invoice_type, invoice.date.replace(day=1)) for invoice in invoices}
+        dues = self.env['property.due.tracker'].search([
+            ('agreement_id', '=', self.agreement_id.id),
+            ('status', 'in', ('pending', 'overdue', 'partially_paid')),
+        ], order='due_date, id').filtered(
+            lambda due: (due.due_type, due.due_date.replace(day=1)) not in billed
+            and (due.due_type != 'rent' or due.due_date < exit_month))
+        invoices = invoices.filtered(
+            lambda invoice: invoice.state in ('posted', 'partial')
+            and (invoice.invoice_type != 'rent' or invoice.date < exit_month))
+        return invoices, dues
+
+    def _settle_documents(self, amount):
+        """Pay the invoices and dues of the exit with ``amount`` taken from the deposit, oldest first"""
+        self.ensure_one()
+        currency = self.currency_id
+        invoices, dues = self._get_settled_documents()
+        payment_vals = []
+        for invoice in invoices:
+            paid = currency.round(min(amount, invoice.amount_residual))
+            if currency.compare_amounts(paid, 0) <= 0:
+                break
+            payment_vals.append({
+                'invoice_id': invoice.id,
+                'amount': paid,
+                'date': self.exit_date,
+                'payment_method': 'deposit',
+                'reference': self.name,
+            })
+            amount -= paid
+        for payment in self.env['property.payment'].create(payment_vals):
+            payment.action_post()
+        for due in dues:
+            paid = currency.round(min(amount, due.outstanding_amount))
+            if currency.compare_amounts(paid, 0) <= 0:
+                break
+            due.amount_paid += paid
+            amount -= paid
+
+    def _post_deposit_settlement(self):
+        """Post the deductions and refunds of the exits on the deposit ledger.
+
+        The part of the deduction covering the pending dues pays the open
+        invoices and dues of the tenant, so they are not chased after the exit.
+        """
+        deposits = self._get_held_deposits()
+        by_agreement = deposits.grouped('agreement_id')
+        vals_list = []
+        for record in self:
+            currency = record.currency_id
+            to_deduct = record.pending_dues + record.damages_deduction
+            to_refund = max(record.final_settlement, 0.0)
+            deducted = 0.0
+            for deposit in by_agreement.get(record.agreement_id, deposits.browse()):
+                held = deposit.balance
+                for move_type, wanted in (('deducted', to_deduct), ('refunded', to_refund)):
+                    amount = currency.round(min(held, wanted))
+                    if currency.compare_amounts(amount, 0) <= 0:
+                        continue
+                    vals_list.append({
+                        'deposit_id': deposit.id,
+                        'move_type': move_type,
+                        'amount': amount,
+                        'date': record.exit_date,
+                        'exit_id': record.id,
+                        'note': record.name,
+                    })
+                    held -= amount
+                    if move_type == 'deducted':
+                        to_deduct -= amount
+                        deducted += amount
+                    else:
+                        to_refund -= amount
+            record._settle_documents(min(deducted, max(record.pending_dues, 0.0)))
+        return self.env['property.deposit.move'].create(vals_list)
+    
     def action_complete_exit(self):
+        to_settle = self.filtered(lambda e: e.status not in ('completed', 'archived'))
+        to_settle._check_deposit_dates()
         self.write({'status': 'completed'})
         
-        # Terminate the agreement
+        # Settle the deposits held
+        to_settle._post_deposit_settlement()
+        
+        # Terminate the agreements
         self.agreement_id.action_terminate()
         
-        # Archive tenant if no other active agreements
-        if not self.tenant_id.agreement_ids.filtered(lambda a: a.state == 'active'):
-            self.tenant_id.write({'status': 'inactive'})
+        # Archive tenants without other active agreements
+        self.tenant_id.filtered(
+            lambda t: not t.agreement_ids.filtered(lambda a: a.state == 'active')
+        ).write({'status': 'inactive'})
     
     def action_archive(self):
         self.write({'status': 'archived'})
@@ -24,6 +24,12 @@ class ResPartner(models.Model):
     last_payment_date = fields.Date('Last Payment', compute='_compute_payment_stats')
     currency_id = fields.Many2one('res.currency', 'Currency', default=lambda self: self.env.company.currency_id)
     
+    def write(self, vals):
+        res = super().write(vals)
+        if 'tenant_id' in vals:
+            self.env['property.tenant']._invalidate_portal_tenant_ids()
+        return res
+    
     @api.depends('owned_properties')
     def _compute_properties_count(self):
         for partner in self:
@@ -31,10 +37,14 @@ class ResPartner(models.Model):
     
     @api.depends('collection_ids.amount_collected')
     def _compute_payment_stats(self):
+        archived = self.env['property.collection.summary']._get_archived_stats(
+            'tenant_id', self.filtered('is_tenant').tenant_id.ids)
         for partner in self:
             if partner.is_tenant and partner.tenant_id:
-                partner.total_paid = sum(partner.collection_ids.mapped('amount_collected'))
-                partner.last_payment_date = max(partner.collection_ids.mapped('date')) if partner.collection_ids else False
+                archived_amount, archived_date = archived.get(partner.tenant_id.id, (0.0, False))
+                partner.total_paid = sum(partner.collection_ids.mapped('amount_collected')) + archived_amount
+                partner.last_payment_date = (max(partner.collection_ids.mapped('date')) if partner.collection_ids
+                                             else archived_date)
             else:
                 partner.total_paid = 0
                 partner.last_payment_date = False
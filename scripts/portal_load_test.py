@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Simulate rent-day portal traffic against a running Odoo server.
+
+Every simulated tenant logs in once, then loops over the portal pages a
+tenant checks on rent day (home counters, agreements, collections) until
+the duration elapses. Latency percentiles and throughput are printed per
+page at the end.
+
+Usage::
+
+    python scripts/portal_load_test.py --url http://localhost:8069 --db rental \\
+        --users tenants.txt --concurrency 50 --duration 60
+
+``tenants.txt`` holds one ``login:password`` pair per line.
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+
+PAGES = [
+    ('counters', 'POST', '/my/counters'),
+    ('agreements', 'GET', '/my/agreements'),
+    ('collections', 'GET', '/my/collections'),
+    ('collections_page_2', 'GET', '/my/collections/page/2'),
+]
+
+
+def login(url, db, login_name, password):
+    session = requests.Session()
+    response = session.post(f'{url}/web/session/authenticate', json={
+        'jsonrpc': '2.0',
+        'params': {'db': db, 'login': login_name, 'password': password},
+    }, timeout=30)
+    response.raise_for_status()
+    if response.json().get('error'):
+        raise RuntimeError(f'Login failed for {login_name}')
+    return session
+
+
+def hit(session, url, method, path):
+    if method == 'POST':
+        return session.post(f'{url}{path}', json={
+            'jsonrpc': '2.0',
+            'params': {'counters': ['agreement_count', 'collection_count']},
+        }, timeout=30)
+    return session.get(f'{url}{path}', timeout=30)
+
+
+def run_tenant(url, db, credentials, deadline, think_time, results, errors, lock):
+    try:
+        session = login(url, db, *credentials)
+    except Exception:
+        with lock:
+            errors['login'] += 1
+        return
+    while time.monotonic() < deadline:
+        name, method, path = random.choice(PAGES)
+        started = time.perf_counter()
+        try:
+            response = hit(session, url, method, path)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            if ok:
+                results[name].append(elapsed)
+            else:
+                errors[name] += 1
+        if think_time:
+            time.sleep(random.uniform(0, think_time))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8069')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--users', required=True, help='File with one login:password per line')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=int, default=60, help='Seconds')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Max seconds between requests')
+    args = parser.parse_args()
+
+    with open(args.users) as users_file:
+        credentials = [tuple(line.strip().split(':', 1)) for line in users_file if ':' in line]
+    if not credentials:
+        parser.error('No login:password pairs found in --users file')
+
+    results = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=run_tenant, args=(
+            args.url.rstrip('/'), args.db, credentials[i % len(credentials)],
+            deadline, args.think_time, results, errors, lock,
+        ))
+        for i in range(args.concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    total = sum(len(values) for values in results.values())
+    print(f'{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), '
+          f'{args.concurrency} concurrent tenants')
+    print(f'{"page":<20}{"count":>8}{"p50 ms":>10}{"p95 ms":>10}{"max ms":>10}{"errors":>8}')
+    for name, _method, _path in PAGES:
+        values = results[name]
+        print(f'{name:<20}{len(values):>8}{percentile(values, 50):>10.1f}'
+              f'{percentile(values, 95):>10.1f}{max(values, default=0):>10.1f}{errors[name]:>8}')
+    if errors['login']:
+        print(f'{errors["login"]} tenant logins failed')
+
+
+if __name__ == '__main__':
+    main()
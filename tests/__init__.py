@@ -0,0 +1,12 @@
+from . import test_benchmark
+from . import test_sequence_concurrency
+from . import test_bill_extraction
+from . import test_agreement_concurrency
+from . import test_collection_archive
+from . import test_bulk_mode
+from . import test_commission_plans
+from . import test_tenant_exit
+from . import test_bank_statement_import
+from . import test_agreement_renewal
+from . import test_tenant_lookup_keys
+from . import test_pnl_refresh
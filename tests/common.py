@@ -0,0 +1,395 @@
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests import HttpCase, TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+# Portfolio sizes selectable with PROPERTY_BENCHMARK_SCALE
+PORTFOLIO_SCALES = {
+    'small': {'properties': 3, 'flats_per_property': 8, 'rooms_per_flat': 3, 'years': 1},
+    'medium': {'properties': 10, 'flats_per_property': 20, 'rooms_per_flat': 4, 'years': 2},
+    'large': {'properties': 40, 'flats_per_property': 30, 'rooms_per_flat': 4, 'years': 3},
+}
+
+# Maximum queries per benchmark on any portfolio size; a benchmark above its
+# budget fails, so a new N+1 shows up in CI instead of in production
+QUERY_BUDGETS = {
+    'dashboard.default_get': 60,
+    'cron.create_daily_collections_reminder': 400,
+    'cron.check_expiring_agreements': 400,
+    'cron.create_monthly_invoices': 400,
+    'cron.create_monthly_dues': 400,
+    'cron.pnl_refresh': 20,
+    'list.property.property': 120,
+    'list.property.flat': 120,
+    'list.property.room': 250,
+    'list.property.tenant': 120,
+    'list.property.agreement': 120,
+    'list.property.collection': 60,
+    'list.property.invoice': 60,
+    'room.search_available': 10,
+    'report.tenant_duplicates': 5,
+    'report.deposit_liability': 2,
+    'api.collections': 80,
+    'api.rooms_available': 30,
+    'portal.counters': 40,
+    'portal.statement_csv': 60,
+    'sync.pull_full': 30,
+    'sync.pull_delta': 30,
+    'sync.push': 150,
+}
+
+
+class PortfolioGenerator:
+    """Build a synthetic portfolio with set-based INSERTs.
+
+    Ids are reserved from the table sequences up front so parent and child rows
+    can be inserted in one statement each, whatever the portfolio size. Stored
+    computes of the structural models are recomputed through the ORM afterwards;
+    the high-volume transaction tables are written with their final values.
+    """
+
+    def __init__(self, env, properties=3, flats_per_property=8, rooms_per_flat=3, years=1,
+                 occupancy=0.85, expenses_per_property_month=6, seed=42):
+        self.env = env
+        self.properties = properties
+        self.flats_per_property = flats_per_property
+        self.rooms_per_flat = rooms_per_flat
+        self.years = years
+        self.occupancy = occupancy
+        self.expenses_per_property_month = expenses_per_property_month
+        self.random = random.Random(seed)
+        self.today = fields.Date.today()
+        self.start = (self.today - relativedelta(years=years)).replace(day=1)
+        self.currency_id = env.company.currency_id.id
+        self.uid = env.uid
+
+    @classmethod
+    def from_scale(cls, env, scale=None):
+        scale = scale or os.environ.get('PROPERTY_BENCHMARK_SCALE', 'small')
+        return cls(env, **PORTFOLIO_SCALES[scale])
+
+    def _reserve_ids(self, table, count):
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)", [f'{table}_id_seq', count])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def _insert(self, table, columns, rows):
+        """Insert rows of (id, *columns) values with one multi-row INSERT per chunk"""
+        if not rows:
+            return
+        audit = ['create_uid', 'create_date', 'write_uid', 'write_date']
+        all_columns = ['id'] + columns + audit
+        placeholders = '(' + ', '.join(['%s'] * (len(columns) + 1))
+        placeholders += ", %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')"
+        for offset in range(0, len(rows), 1000):
+            chunk = rows[offset:offset + 1000]
+            values = ', '.join([placeholders] * len(chunk))
+            params = [value for row in chunk for value in (*row, self.uid, self.uid)]
+            self.env.cr.execute(
+                f"INSERT INTO {table} ({', '.join(all_columns)}) VALUES {values}", params)
+
+    def _recompute_stored(self, model, ids):
+        records = self.env[model].browse(ids)
+        for field in records._fields.values():
+            if field.store and field.compute:
+                self.env.add_to_compute(field, records)
+
+    def _months(self):
+        month = self.start
+        while month <= self.today:
+            yield month
+            month += relativedelta(months=1)
+
+    def generate(self):
+        """Create the portfolio and return the created ids per model"""
+        rand = self.random
+        room_type = self.env['property.room.type'].create({
+            'name': 'Benchmark Room', 'code': 'BENCH', 'default_rent': 2000, 'max_occupancy': 2,
+        })
+
+        property_ids = self._reserve_ids('property_property', self.properties)
+        self._insert('property_property', [
+            'name', 'code', 'address', 'city', 'property_type', 'state', 'active', 'currency_id',
+            'manager_id',
+        ], [
+            (pid, f'Benchmark Tower {n}', f'BT{n:03d}', f'{n} Benchmark Street', 'Dubai',
+             'apartment', 'active', True, self.currency_id, self.uid)
+            for n, pid in enumerate(property_ids, 1)
+        ])
+
+        flat_rows = []
+        room_rows = []
+        rooms = []
+        flat_ids = self._reserve_ids('property_flat', self.properties * self.flats_per_property)
+        room_ids = iter(self._reserve_ids('property_room', len(flat_ids) * self.rooms_per_flat))
+        for index, flat_id in enumerate(flat_ids):
+            property_id = property_ids[index // self.flats_per_property]
+            number = index % self.flats_per_property + 1
+            flat_rows.append((flat_id, f'{number:03d}', number // 10 + 1, property_id, '2bhk', True, True))
+            for room_number in range(1, self.rooms_per_flat + 1):
+                room_id = next(room_ids)
+                rent = rand.choice([1500, 1800, 2000, 2500, 3000])
+                rooms.append((room_id, property_id, rent))
+                room_rows.append((room_id, f'R{room_number}', property_id, flat_id, room_type.id,
+                                  rent, rent, 'vacant', True, True, True))
+        self._insert('property_flat', [
+            'flat_number', 'floor', 'property_id', 'flat_type', 'has_kitchen', 'has_living_room',
+        ], flat_rows)
+        self._insert('property_room', [
+            'room_number', 'property_id', 'flat_id', 'room_type_id', 'rent_amount', 'deposit_amount',
+            'status', 'has_wifi', 'water_included', 'internet_included',
+        ], room_rows)
+
+        occupied = [room for room in rooms if rand.random() < self.occupancy]
+        tenant_ids = self._reserve_ids('property_tenant', len(occupied))
+        self._insert('property_tenant', [
+            'name', 'mobile', 'id_passport', 'id_type', 'status', 'payment_method', 'currency_id',
+            'date_joined', 'portal_cache_version',
+        ], [
+            (tid, f'Benchmark Tenant {n:06d}', f'+9715{n:08d}', f'784-BENCH-{n:07d}', 'emirates_id',
+             'active', 'cash', self.currency_id, self.start, 0)
+            for n, tid in enumerate(tenant_ids, 1)
+        ])
+
+        agreement_ids = self._reserve_ids('property_agreement', len(occupied))
+        agreement_rows = []
+        leases = []
+        for (room_id, property_id, rent), tenant_id, agreement_id in zip(occupied, tenant_ids, agreement_ids):
+            start = self.start + timedelta(days=rand.randint(0, 60))
+            end = self.today + timedelta(days=rand.randint(-30, 330))
+            state = 'active' if end >= self.today else 'expired'
+            leases.append((agreement_id, tenant_id, room_id, property_id, rent, start, end, state))
+            agreement_rows.append((
+                agreement_id, tenant_id, room_id, property_id, start, end, rent, rent,
+                'cash', 'monthly', 1, 30, True, False, 1, 5, state, 'fixed', 30, self.currency_id,
+            ))
+        self._insert('property_agreement', [
+            'tenant_id', 'room_id', 'property_id', 'start_date', 'end_date', 'rent_amount',
+            'deposit_amount', 'payment_method', 'payment_frequency', 'payment_day', 'payment_terms',
+            'auto_generate_invoices', 'auto_post_invoices', 'invoice_day', 'advance_invoice_days',
+            'state', 'agreement_type', 'notice_period_days', 'currency_id',
+        ], agreement_rows)
+
+        self.env.cr.executemany("""
+            UPDATE property_room
+               SET status = 'occupied', current_tenant_id = %s, current_agreement_id = %s
+             WHERE id = %s
+        """, [(tenant_id, agreement_id, room_id)
+              for agreement_id, tenant_id, room_id, *_rest, state in leases if state == 'active'])
+
+        collection_count, invoice_count = self._generate_billing(leases)
+        expense_count = self._generate_expenses(property_ids)
+        deposit_count = self._generate_deposits(leases)
+
+        self.env.invalidate_all()
+        self._recompute_stored('property.property', property_ids)
+        self._recompute_stored('property.flat', flat_ids)
+        self._recompute_stored('property.room', [room[0] for room in rooms])
+        self._recompute_stored('property.tenant', tenant_ids)
+        self._recompute_stored('property.agreement', agreement_ids)
+        self.env.flush_all()
+        self.env.registry.clear_cache()
+
+        return {
+            'property.property': len(property_ids),
+            'property.flat': len(flat_ids),
+            'property.room': len(rooms),
+            'property.tenant': len(tenant_ids),
+            'property.agreement': len(agreement_ids),
+            'property.collection': collection_count,
+            'property.invoice': invoice_count,
+            'property.expense': expense_count,
+            'property.deposit': deposit_count,
+            'tenant_ids': tenant_ids,
+            'property_ids': property_ids,
+        }
+
+    def _generate_billing(self, leases):
+        """One posted invoice and one rent collection per lease and month"""
+        rand = self.random
+        invoice_rows = []
+        line_rows = []
+        collection_rows = []
+        periods = []
+        for agreement_id, tenant_id, room_id, property_id, rent, start, end, _state in leases:
+            for month in self._months():
+                period_to = month + relativedelta(months=1, days=-1)
+                if period_to < start or month > min(end, self.today):
+                    continue
+                periods.append((agreement_id, tenant_id, room_id, property_id, rent, month, period_to))
+
+        invoice_ids = self._reserve_ids('property_invoice', len(periods))
+        line_ids = self._reserve_ids('property_invoice_line', len(periods))
+        collection_ids = self._reserve_ids('property_collection', len(periods))
+        for seq, (period, invoice_id, line_id, collection_id) in enumerate(
+                zip(periods, invoice_ids, line_ids, collection_ids), 1):
+            agreement_id, tenant_id, room_id, property_id, rent, month, period_to = period
+            paid_on = min(month + timedelta(days=rand.randint(0, 9)), self.today)
+            paid = rent if paid_on < self.today - timedelta(days=15) or rand.random() < 0.5 else 0.0
+            state, payment_state = ('paid', 'paid') if paid else ('posted', 'not_paid')
+            invoice_rows.append((
+                invoice_id, f'BENCH/INV/{seq:07d}', month, month + timedelta(days=30), tenant_id,
+                room_id, property_id, agreement_id, rent, 0.0, rent, paid, rent - paid, state,
+                payment_state, 'rent', month, period_to, self.currency_id, self.env.company.id,
+            ))
+            line_rows.append((line_id, invoice_id, f'Monthly Rent {month:%B %Y}', 1.0, rent, rent, rent,
+                              self.currency_id))
+            if paid:
+                collection_rows.append((
+                    collection_id, f'COL/{paid_on:%Y%m%d}/BENCH/{room_id}', paid_on, rent, tenant_id,
+                    room_id, property_id, agreement_id, rand.choice(['cash', 'bank_transfer', 'cheque']),
+                    'rent', month, period_to, 'collected', self.currency_id, self.uid,
+                    f'BENCH-RCPT-{seq:07d}',
+                ))
+
+        self._insert('property_invoice', [
+            'name', 'date', 'due_date', 'tenant_id', 'room_id', 'property_id', 'agreement_id',
+            'amount_untaxed', 'amount_tax', 'amount_total', 'amount_paid', 'amount_residual',
+            'state', 'payment_state', 'invoice_type', 'period_from', 'period_to', 'currency_id',
+            'company_id',
+        ], invoice_rows)
+        self._insert('property_invoice_line', [
+            'invoice_id', 'name', 'quantity', 'price_unit', 'price_subtotal', 'price_total', 'currency_id',
+        ], line_rows)
+        self._insert('property_collection', [
+            'name', 'date', 'amount_collected', 'tenant_id', 'room_id', 'property_id', 'agreement_id',
+            'payment_method', 'collection_type', 'period_from', 'period_to', 'status', 'currency_id',
+            'collected_by', 'receipt_number',
+        ], collection_rows)
+        return len(collection_rows), len(invoice_rows)
+
+    def _generate_deposits(self, leases):
+        """One deposit per lease with its ledger; deposits of expired leases are refunded"""
+        deposit_ids = self._reserve_ids('property_deposit', len(leases))
+        deposit_rows = []
+        move_rows = []
+        for deposit_id, lease in zip(deposit_ids, leases):
+            agreement_id, tenant_id, _room_id, property_id, rent, start, end, state = lease
+            refunded = state == 'expired'
+            deposit_rows.append((
+                deposit_id, f'DEP/BENCH/{agreement_id}', tenant_id, agreement_id, rent, start,
+                'refunded' if refunded else 'held', rent if refunded else 0.0, end if refunded else None,
+                0.0 if refunded else rent, self.currency_id,
+            ))
+            move_rows.append((deposit_id, tenant_id, agreement_id, property_id, start, 'received', rent, rent))
+            if refunded:
+                move_rows.append((deposit_id, tenant_id, agreement_id, property_id, end, 'refunded', -rent, 0.0))
+        self._insert('property_deposit', [
+            'name', 'tenant_id', 'agreement_id', 'deposit_amount', 'deposit_date', 'status',
+            'refund_amount', 'refund_date', 'balance', 'currency_id',
+        ], deposit_rows)
+        move_ids = self._reserve_ids('property_deposit_move', len(move_rows))
+        self._insert('property_deposit_move', [
+            'deposit_id', 'tenant_id', 'agreement_id', 'property_id', 'date', 'move_type', 'amount', 'balance',
+        ], [(move_id, *row) for move_id, row in zip(move_ids, move_rows)])
+        return len(deposit_rows)
+
+    def _generate_expenses(self, property_ids):
+        rand = self.random
+        expense_types = ['dewa', 'maintenance', 'plumbing', 'electrical', 'cleaning', 'security', 'ac']
+        rows = []
+        for property_id in property_ids:
+            for month in self._months():
+                for _n in range(self.expenses_per_property_month):
+                    expense_date = min(month + timedelta(days=rand.randint(0, 27)), self.today)
+                    expense_type = rand.choice(expense_types)
+                    rows.append((property_id, expense_date, expense_type))
+        expense_ids = self._reserve_ids('property_expense', len(rows))
+        self._insert('property_expense', [
+            'name', 'date', 'amount', 'property_id', 'expense_type', 'category', 'state',
+            'payment_method', 'urgency', 'paid_by', 'currency_id',
+        ], [
+            (expense_id, f'Benchmark {expense_type}', expense_date, rand.randint(50, 2500), property_id,
+             expense_type, 'operational', 'paid', 'cash', 'medium', self.uid, self.currency_id)
+            for expense_id, (property_id, expense_date, expense_type) in zip(expense_ids, rows)
+        ])
+        return len(rows)
+
+
+class BenchmarkMixin:
+    """Time a block, count its queries and check them against QUERY_BUDGETS.
+
+    Results of every benchmark class are collected and written as JSON to
+    PROPERTY_BENCHMARK_REPORT (default: property_benchmark_report.json in the
+    temp directory) once the class finishes.
+    """
+
+    report = []
+
+    @classmethod
+    def setup_portfolio(cls):
+        started = time.perf_counter()
+        cls.portfolio = PortfolioGenerator.from_scale(cls.env).generate()
+        _logger.info("Generated benchmark portfolio in %.1fs: %s", time.perf_counter() - started,
+                     {key: value for key, value in cls.portfolio.items() if isinstance(value, int)})
+
+    @contextmanager
+    def benchmark(self, name):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        cr = self.env.cr
+        start_queries = cr.sql_log_count
+        started = time.perf_counter()
+        yield
+        self.env.flush_all()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        queries = cr.sql_log_count - start_queries
+        budget = QUERY_BUDGETS.get(name)
+        BenchmarkMixin.report.append({
+            'name': name,
+            'scale': os.environ.get('PROPERTY_BENCHMARK_SCALE', 'small'),
+            'time_ms': round(elapsed_ms, 2),
+            'queries': queries,
+            'query_budget': budget,
+        })
+        _logger.info("Benchmark %s: %.1f ms, %s queries (budget %s)", name, elapsed_ms, queries, budget)
+        if budget is not None and queries > budget:
+            self.fail(f"{name} ran {queries} queries, over its budget of {budget}")
+
+    @classmethod
+    def write_report(cls):
+        path = os.environ.get('PROPERTY_BENCHMARK_REPORT') or os.path.join(
+            tempfile.gettempdir(), 'property_benchmark_report.json')
+        with open(path, 'w') as report_file:
+            json.dump({'date': str(date.today()), 'results': BenchmarkMixin.report}, report_file, indent=2)
+        _logger.info("Benchmark report written to %s", path)
+
+
+# Benchmarks generate a whole portfolio: only run when asked for with --test-tags property_benchmark
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class PropertyBenchmarkCase(BenchmarkMixin, TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.setup_portfolio()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.write_report()
+        super().tearDownClass()
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class PropertyBenchmarkHttpCase(BenchmarkMixin, HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.setup_portfolio()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.write_report()
+        super().tearDownClass()
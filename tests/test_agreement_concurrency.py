@@ -0,0 +1,105 @@
+import threading
+
+from dateutil.relativedelta import relativedelta
+from psycopg2.errors import SerializationFailure
+
+from odoo import api, fields, SUPERUSER_ID
+from odoo.exceptions import ValidationError
+from odoo.sql_db import db_connect
+from odoo.tests import TransactionCase, tagged
+
+CLERKS = 4
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class TestAgreementConcurrency(TransactionCase):
+    """Clerks activating agreements on the same room at the same moment, on real cursors"""
+
+    def setUp(self):
+        super().setUp()
+        self.db = db_connect(self.env.cr.dbname)
+        with self.db.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            prop = env['property.property'].create({
+                'name': 'Concurrency Tower',
+                'code': 'CONC',
+                'address': 'Test Street',
+            })
+            flat = env['property.flat'].create({
+                'flat_number': '101',
+                'floor': 1,
+                'property_id': prop.id,
+                'flat_type': env['property.flat']._fields['flat_type'].selection[0][0],
+            })
+            room = env['property.room'].create({
+                'room_number': 'A',
+                'property_id': prop.id,
+                'flat_id': flat.id,
+                'room_type_id': env.ref('property_management_lite.room_type_master').id,
+                'rent_amount': 2000,
+            })
+            tenants = env['property.tenant'].create([{
+                'name': f'Concurrent Tenant {n}',
+                'mobile': f'+97155000{n:04d}',
+                'id_passport': f'CONC-{n:04d}',
+            } for n in range(CLERKS)])
+            self.property_id, self.flat_id, self.room_id = prop.id, flat.id, room.id
+            self.tenant_ids = tenants.ids
+
+    def tearDown(self):
+        with self.db.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['property.agreement'].search([('room_id', '=', self.room_id)]).unlink()
+            tenants = env['property.tenant'].browse(self.tenant_ids)
+            partners = tenants.partner_id
+            tenants.unlink()
+            partners.unlink()
+            env['property.property'].browse(self.property_id).unlink()
+        super().tearDown()
+
+    def test_parallel_activation_single_winner(self):
+        barrier = threading.Barrier(CLERKS)
+        activated = []
+        rejected = []
+        lock = threading.Lock()
+        # Started yesterday, so the room is handed over whatever the user's timezone
+        start_date = fields.Date.today() - relativedelta(days=1)
+
+        def clerk(tenant_id):
+            try:
+                with self.db.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    agreement = env['property.agreement'].create({
+                        'tenant_id': tenant_id,
+                        'room_id': self.room_id,
+                        'start_date': start_date,
+                        'end_date': start_date + relativedelta(years=1),
+                        'rent_amount': 2000,
+                    })
+                    env.flush_all()
+                    barrier.wait()
+                    agreement.action_activate()
+                    env.flush_all()
+                    cr.commit()
+                    with lock:
+                        activated.append(agreement.id)
+            except (ValidationError, SerializationFailure) as e:
+                with lock:
+                    rejected.append(e)
+
+        threads = [threading.Thread(target=clerk, args=(tenant_id,)) for tenant_id in self.tenant_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(activated), 1, "Exactly one clerk may rent out the room")
+        self.assertEqual(len(rejected), CLERKS - 1)
+        with self.db.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            room = env['property.room'].browse(self.room_id)
+            self.assertEqual(room.status, 'occupied')
+            self.assertEqual(room.current_agreement_id.id, activated[0])
+            self.assertEqual(room.flat_id.occupied_rooms, 1)
+            self.assertEqual(env['property.agreement'].search_count([
+                ('room_id', '=', self.room_id), ('state', '=', 'active')]), 1)
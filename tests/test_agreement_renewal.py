@@ -0,0 +1,74 @@
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAgreementRenewal(TransactionCase):
+    """A renewal activated ahead of its start date takes the room over on that date"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        prop = cls.env['property.property'].create({
+            'name': 'Renewal Tower',
+            'code': 'RENW',
+            'address': 'Test Street',
+        })
+        flat = cls.env['property.flat'].create({
+            'flat_number': '101',
+            'floor': 1,
+            'property_id': prop.id,
+            'flat_type': cls.env['property.flat']._fields['flat_type'].selection[0][0],
+        })
+        cls.room = cls.env['property.room'].create({
+            'room_number': 'A',
+            'property_id': prop.id,
+            'flat_id': flat.id,
+            'room_type_id': cls.env.ref('property_management_lite.room_type_master').id,
+            'rent_amount': 2000,
+        })
+        cls.tenant = cls.env['property.tenant'].create({
+            'name': 'Renewing Tenant',
+            'mobile': '+971550009999',
+            'id_passport': 'RENW-0001',
+        })
+        # Days away from today, so the timezone of the user does not matter
+        today = fields.Date.today()
+        cls.current = cls._create_agreement(today - relativedelta(months=11), today + relativedelta(days=2))
+        cls.current.action_activate()
+        cls.renewal = cls._create_agreement(today + relativedelta(days=3), today + relativedelta(years=1))
+
+    @classmethod
+    def _create_agreement(cls, start_date, end_date):
+        return cls.env['property.agreement'].create({
+            'tenant_id': cls.tenant.id,
+            'room_id': cls.room.id,
+            'start_date': start_date,
+            'end_date': end_date,
+            'rent_amount': 2000,
+        })
+
+    def test_renewal_waits_for_its_start_date(self):
+        self.renewal.action_activate()
+
+        self.assertEqual(self.renewal.state, 'active')
+        self.assertEqual(self.room.current_agreement_id, self.current,
+                         "The running agreement stays current until the renewal starts")
+        self.assertEqual(self.tenant.current_room_id, self.room)
+        self.assertEqual(self.room.status, 'occupied')
+
+        self.env['property.agreement']._cron_start_agreements()
+        self.assertEqual(self.room.current_agreement_id, self.current, "The renewal has not started yet")
+
+    def test_renewal_taken_over_on_start_date(self):
+        self.renewal.action_activate()
+        self.current.write({'end_date': fields.Date.today() - relativedelta(days=2)})
+        self.renewal.write({'start_date': fields.Date.today() - relativedelta(days=1)})
+
+        self.env['property.agreement']._cron_start_agreements()
+
+        self.assertEqual(self.room.current_agreement_id, self.renewal)
+        self.assertEqual(self.room.current_tenant_id, self.tenant)
+        self.assertEqual(self.room.status, 'occupied')
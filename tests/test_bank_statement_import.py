@@ -0,0 +1,40 @@
+import base64
+
+from odoo.tests import TransactionCase, tagged
+
+STATEMENT = """Date,Amount,Reference,Transaction ID
+2024-03-01,1500.00,RENT A-101 MARCH,TRX-0001
+2024-03-02,800.00,CASH DEPOSIT,
+2024-03-02,800.00,CASH DEPOSIT,
+"""
+
+
+@tagged('post_install', '-at_install')
+class TestBankStatementImport(TransactionCase):
+
+    def _import(self, content=STATEMENT):
+        wizard = self.env['property.bank.statement.import'].create({
+            'statement_file': base64.b64encode(content.encode()),
+            'statement_filename': 'statement.csv',
+            'file_format': 'csv',
+            'bank_name': 'Statement Test Bank',
+            'auto_match': False,
+        })
+        wizard.action_import()
+        return wizard
+
+    def _transfers(self):
+        return self.env['property.bank.transfer'].search([('bank_name', '=', 'Statement Test Bank')])
+
+    def test_repeated_lines_without_reference(self):
+        wizard = self._import()
+        self.assertEqual(wizard.imported_count, 3, "Two identical cash deposits are two transfers")
+        self.assertEqual(wizard.duplicate_count, 0)
+        self.assertEqual(len(self._transfers()), 3)
+
+    def test_import_twice(self):
+        self._import()
+        wizard = self._import()
+        self.assertEqual(wizard.imported_count, 0)
+        self.assertEqual(wizard.duplicate_count, 3, "Re-importing a statement creates no transfer")
+        self.assertEqual(len(self._transfers()), 3)
@@ -0,0 +1,172 @@
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from odoo.addons.property_management_lite.models.property_bank_transfer import (
+    OpenItemIndex, match_transfers,
+)
+from odoo.addons.property_management_lite.models.property_room import AVAILABILITY_VERSION_SEQUENCE
+from .common import BenchmarkMixin, PropertyBenchmarkCase, PropertyBenchmarkHttpCase
+
+BANK_MATCH_TRANSFERS = 50000
+BANK_MATCH_OPEN_ITEMS = 100000
+BANK_MATCH_MAX_SECONDS = 10
+SYNC_PUSH_COLLECTIONS = 50
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class TestPropertyBenchmark(PropertyBenchmarkCase):
+
+    def _list_specification(self, model):
+        """web_search_read specification of the fields shown in the default list view"""
+        Model = self.env[model]
+        arch = Model.get_views([(False, 'list')])['views']['list']['arch']
+        specification = {}
+        for name in Model._fields:
+            if f'name="{name}"' not in arch:
+                continue
+            field = Model._fields[name]
+            if field.type == 'many2one':
+                specification[name] = {'fields': {'display_name': {}}}
+            elif field.type not in ('one2many', 'many2many'):
+                specification[name] = {}
+        return specification
+
+    def test_dashboard(self):
+        Dashboard = self.env['property.dashboard']
+        with self.benchmark('dashboard.default_get'):
+            Dashboard.default_get(list(Dashboard._fields))
+
+    def test_monthly_crons(self):
+        crons = [
+            ('cron.create_daily_collections_reminder',
+             self.env['property.collection'].create_daily_collections_reminder),
+            ('cron.check_expiring_agreements',
+             self.env['property.agreement']._cron_check_expiring_agreements),
+            ('cron.create_monthly_invoices', self.env['property.invoice'].create_monthly_invoices),
+            ('cron.create_monthly_dues', self.env['property.due.tracker'].create_monthly_dues),
+            ('cron.pnl_refresh', lambda: self.env['property.pnl.fact']._refresh(full=True)),
+        ]
+        for name, cron in crons:
+            with self.subTest(cron=name), self.benchmark(name):
+                cron()
+
+    def test_list_views(self):
+        for model in ('property.property', 'property.flat', 'property.room', 'property.tenant',
+                      'property.agreement', 'property.collection', 'property.invoice'):
+            specification = self._list_specification(model)
+            with self.subTest(model=model), self.benchmark(f'list.{model}'):
+                self.env[model].web_search_read([], specification, limit=80)
+
+    def test_room_availability(self):
+        Room = self.env['property.room']
+        # Cache the index as if the portfolio were committed, under a version of its
+        # own that is dropped again so no other test reads the rolled back rooms
+        next_version = lambda: self.env.cr.execute("SELECT nextval(%s)", [AVAILABILITY_VERSION_SEQUENCE])
+        self.env.cr.postcommit.data.pop(AVAILABILITY_VERSION_SEQUENCE, None)
+        next_version()
+        self.addCleanup(next_version)
+        Room.search_available()
+        with self.benchmark('room.search_available'):
+            Room.search_available(rent_max=2500, sort='rent', limit=80)
+
+    def test_tenant_duplicates(self):
+        Duplicate = self.env['property.tenant.duplicate']
+        with self.benchmark('report.tenant_duplicates'):
+            Duplicate.read_group([], ['group_size:max'], ['match_type', 'match_key'], lazy=False)
+
+    def test_deposit_liability(self):
+        Move = self.env['property.deposit.move']
+        with self.benchmark('report.deposit_liability'):
+            Move._get_liability(date.today())
+
+    def test_bank_match_transfers(self):
+        """50k transfers against 100k open items, matched in memory"""
+        rand = random.Random(7)
+        base = date(2025, 1, 1).toordinal()
+        items = [
+            ('collection' if n % 3 else 'invoice', n, rand.choice(range(1000, 5000, 50)),
+             rand.randint(1, 20000), base + rand.randint(0, 365), frozenset())
+            for n in range(BANK_MATCH_OPEN_ITEMS)
+        ]
+        transfers = [
+            (n, item[2], item[3] if n % 4 else False, item[4] + rand.randint(-3, 3), frozenset())
+            for n, item in enumerate(rand.sample(items, BANK_MATCH_TRANSFERS))
+        ]
+        started = time.perf_counter()
+        matched, ambiguous = match_transfers(transfers, OpenItemIndex(items), 7, 0.8, 0.1)
+        elapsed = time.perf_counter() - started
+        BenchmarkMixin.report.append({
+            'name': 'bank.match_transfers',
+            'time_ms': round(elapsed * 1000, 2),
+            'transfers': BANK_MATCH_TRANSFERS,
+            'open_items': BANK_MATCH_OPEN_ITEMS,
+            'matched': len(matched),
+            'ambiguous': len(ambiguous),
+        })
+        self.assertTrue(matched)
+        self.assertLess(elapsed, BANK_MATCH_MAX_SECONDS)
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class TestPropertyBenchmarkHttp(PropertyBenchmarkHttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        tenant = cls.env['property.tenant'].browse(cls.portfolio['tenant_ids'][0])
+        cls.portal_user = cls.env['res.users'].create({
+            'name': tenant.name,
+            'login': 'benchmark_portal',
+            'password': 'benchmark_portal',
+            'groups_id': [(6, 0, [cls.env.ref('base.group_portal').id])],
+        })
+        cls.portal_user.partner_id.write({'is_tenant': True, 'tenant_id': tenant.id})
+
+    def test_json_apis(self):
+        self.authenticate('admin', 'admin')
+        with self.benchmark('api.collections'):
+            self.make_jsonrpc_request('/property/api/collections', {})
+        with self.benchmark('api.rooms_available'):
+            self.make_jsonrpc_request('/property/api/rooms/available', {'limit': 80})
+
+    def test_portal(self):
+        self.authenticate('benchmark_portal', 'benchmark_portal')
+        with self.benchmark('portal.counters'):
+            self.make_jsonrpc_request('/my/counters', {'counters': ['agreement_count', 'collection_count']})
+        with self.benchmark('portal.statement_csv'):
+            response = self.url_open('/my/collections/statement.csv')
+            self.assertEqual(response.status_code, 200)
+
+    def test_sync(self):
+        self.env.ref('base.user_admin').groups_id = [(4, self.env.ref('property_management_lite.group_property_user').id)]
+        self.authenticate('admin', 'admin')
+        with self.benchmark('sync.pull_full'):
+            response = self.url_open('/property/sync/pull')
+            self.assertEqual(response.status_code, 200)
+        since = fields.Datetime.to_string(fields.Datetime.now() - timedelta(hours=1))
+        with self.benchmark('sync.pull_delta'):
+            response = self.url_open(f'/property/sync/pull?since={since}')
+            self.assertEqual(response.status_code, 200)
+
+        agreements = self.env['property.agreement'].search([('state', '=', 'active')], limit=SYNC_PUSH_COLLECTIONS)
+        payload = {'collections': [{
+            'sync_key': f'benchmark-{agreement.id}',
+            'room_id': agreement.room_id.id,
+            'tenant_id': agreement.tenant_id.id,
+            'agreement_id': agreement.id,
+            'date': str(date.today()),
+            'amount_collected': agreement.rent_amount,
+            'payment_method': 'cash',
+            'collection_type': 'rent',
+        } for agreement in agreements]}
+        with self.benchmark('sync.push'):
+            response = self.url_open('/property/sync/push', data=json.dumps(payload),
+                                     headers={'Content-Type': 'application/json'})
+            self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual({result['status'] for result in results.values()}, {'created'})
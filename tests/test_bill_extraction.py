@@ -0,0 +1,93 @@
+import base64
+import io
+import os
+import tempfile
+import time
+
+from reportlab.pdfgen import canvas
+
+from odoo.tests import TransactionCase, tagged
+
+from ..models.property_bill_extraction import extract_texts
+from .common import BenchmarkMixin
+
+BILLS = 200
+MONTHLY_BILLS = 2000
+
+
+def make_bill_pdf(number, pages=2):
+    """A text-layer PDF bill shaped like a utility or supplier invoice"""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for page in range(pages):
+        pdf.drawString(72, 800, 'ACME Plumbing and Maintenance LLC')
+        pdf.drawString(72, 780, f'Invoice No: INV-{number:06d}')
+        pdf.drawString(72, 760, 'Invoice Date: 05/03/2024')
+        for line in range(30):
+            pdf.drawString(72, 720 - line * 18, f'Item {page * 30 + line} - Pipe fitting 1/2 inch    12.50')
+        if page == pages - 1:
+            pdf.drawString(72, 160, 'Subtotal 1,000.00')
+            pdf.drawString(72, 140, f'Grand Total AED {1000 + number % 100}.00')
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class TestBillExtraction(BenchmarkMixin, TransactionCase):
+    """Bill text extraction: parsing on real expenses and throughput of one worker"""
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.write_report()
+        super().tearDownClass()
+
+    def test_extract_and_prefill(self):
+        vendor = self.env['res.partner'].create({'name': 'ACME Plumbing', 'supplier_rank': 1})
+        self.env['property.expense.extraction.rule'].create({
+            'name': 'ACME',
+            'field': 'vendor',
+            'pattern': r'ACME Plumbing',
+            'vendor_id': vendor.id,
+        })
+        expense = self.env['property.expense'].create({
+            'name': 'Plumbing repair',
+            'amount': 1.0,
+            'expense_type': 'plumbing',
+            'bill_image': base64.b64encode(make_bill_pdf(42)),
+        })
+        self.assertEqual(expense.extraction_state, 'pending')
+
+        expense._extract_bills()
+        self.assertEqual(expense.extraction_state, 'done')
+        self.assertEqual(expense.vendor_id, vendor)
+        self.assertEqual(expense.reference_number, 'INV-000042')
+        self.assertEqual(expense.extracted_amount, 1042.0)
+        self.assertEqual(expense.amount, 1.0, "Amount is only replaced on review")
+
+        expense.action_apply_extraction()
+        self.assertEqual(expense.amount, 1042.0)
+        self.assertEqual(str(expense.date), '2024-03-05')
+        self.assertEqual(expense.extraction_state, 'done', "Applying values must not queue the bill again")
+
+    def test_extraction_throughput(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for number in range(BILLS):
+                path = os.path.join(directory, f'bill_{number}.pdf')
+                with open(path, 'wb') as bill:
+                    bill.write(make_bill_pdf(number))
+                paths.append(path)
+
+            started = time.perf_counter()
+            texts = extract_texts(paths)
+            elapsed = time.perf_counter() - started
+            self.assertTrue(all('Grand Total' in text for text in texts))
+            per_worker_minute = BILLS * 60 / elapsed
+            BenchmarkMixin.report.append({
+                'name': 'bill_extraction.worker',
+                'bills': BILLS,
+                'time_ms': round(elapsed * 1000, 2),
+                'bills_per_minute_per_worker': round(per_worker_minute, 1),
+                'worker_minutes_per_month': round(MONTHLY_BILLS / per_worker_minute, 2),
+            })
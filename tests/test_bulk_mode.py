@@ -0,0 +1,62 @@
+from itertools import cycle, islice
+
+from odoo.tests import tagged
+
+from odoo.addons.property_management_lite.models.property_bulk import bulk_mode, post_batch_summary
+from .common import BenchmarkMixin, PropertyBenchmarkCase
+
+BULK_MODE_COLLECTIONS = 2000
+MAIL_TABLES = ('mail_message', 'mail_tracking_value', 'mail_followers')
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class TestBulkMode(PropertyBenchmarkCase):
+    """Chatter rows written by a batch of collections, with and without the bulk context"""
+
+    def _last_ids(self):
+        ids = {}
+        for table in MAIL_TABLES:
+            self.env.cr.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+            ids[table] = self.env.cr.fetchone()[0]
+        return ids
+
+    def _rows_written(self, Collection):
+        """Rows added to the mail tables by creating then verifying a batch of collections"""
+        agreements = self.env['property.agreement'].search([('state', '=', 'active')], limit=100)
+        self.assertTrue(agreements)
+        self.env.flush_all()
+        before = self._last_ids()
+        collections = Collection.create([{
+            'tenant_id': agreement.tenant_id.id,
+            'room_id': agreement.room_id.id,
+            'agreement_id': agreement.id,
+            'amount_collected': agreement.rent_amount,
+            'status': 'collected',
+        } for agreement in islice(cycle(agreements), BULK_MODE_COLLECTIONS)])
+        collections.action_verify()
+        if Collection.env.context.get('tracking_disable'):
+            post_batch_summary(collections, 'Collections verified', 'amount_collected')
+        self.env.flush_all()
+        rows = {}
+        for table, last_id in before.items():
+            self.env.cr.execute(f"SELECT COUNT(*) FROM {table} WHERE id > %s", [last_id])
+            rows[table] = self.env.cr.fetchone()[0]
+        return rows
+
+    def test_bulk_mode_rows_written(self):
+        Collection = self.env['property.collection']
+        tracked = self._rows_written(Collection)
+        bulk = self._rows_written(bulk_mode(Collection))
+
+        per_10k = 10000 / BULK_MODE_COLLECTIONS
+        BenchmarkMixin.report.append({
+            'name': 'mail.bulk_mode_rows_per_10k_collections',
+            'collections': BULK_MODE_COLLECTIONS,
+            'tracked': {table: round(count * per_10k) for table, count in tracked.items()},
+            'bulk': {table: round(count * per_10k) for table, count in bulk.items()},
+        })
+        self.assertEqual(bulk['mail_tracking_value'], 0)
+        self.assertEqual(bulk['mail_followers'], 0)
+        self.assertLessEqual(bulk['mail_message'], len(self.portfolio['property_ids']),
+                             "Bulk mode logs one summary per property")
+        self.assertGreater(tracked['mail_message'], bulk['mail_message'])
@@ -0,0 +1,98 @@
+import base64
+from datetime import date, timedelta
+
+from odoo import models
+from odoo.tests import tagged
+from odoo.tools import SQL
+
+from odoo.addons.property_management_lite.models.property_collection_archive import ARCHIVE_COLUMNS
+
+from .common import BenchmarkMixin, PropertyBenchmarkCase
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class TestCollectionArchive(PropertyBenchmarkCase):
+    """Moving the whole collection history of the portfolio to the archive"""
+
+    def _totals(self):
+        """Amount and count of live plus summarized collections per property and status"""
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT property_id, status, SUM(amount), SUM(records)
+              FROM (SELECT property_id, status, amount_collected AS amount, 1 AS records
+                      FROM property_collection
+                     UNION ALL
+                    SELECT property_id, status, amount_collected, record_count
+                      FROM property_collection_summary) c
+          GROUP BY property_id, status
+        """)
+        return {(property_id, status): (round(amount or 0.0, 2), records)
+                for property_id, status, amount, records in self.env.cr.fetchall()}
+
+    def _agreement_totals(self):
+        self.env.invalidate_all()
+        agreements = self.env['property.agreement'].search([])
+        return {agreement.id: round(agreement.total_collected, 2) for agreement in agreements}
+
+    def test_archive_history(self):
+        before = self._totals()
+        agreements_before = self._agreement_totals()
+        Archive = self.env['property.collection.archive']
+        archived_before = Archive.search_count([])
+
+        run = self.env['property.collection.archive.run']._run(cutoff=date.today() + timedelta(days=1))
+
+        self.assertTrue(run, "The generated history has closed collections to archive")
+        self.assertTrue(run.done)
+        self.assertEqual(Archive.search_count([]) - archived_before, run.rows_archived)
+        self.assertEqual(self._totals(), before, "Archiving must not change any total")
+        self.assertEqual(self._agreement_totals(), agreements_before,
+                         "Archived rent must not show up as pending on the agreements")
+        BenchmarkMixin.report.append({
+            'name': 'collection.archive',
+            'time_ms': round(run.duration * 1000, 2),
+            'rows_archived': run.rows_archived,
+            'rows_kept': run.rows_kept,
+            'rows_per_second': round(run.rows_per_second, 1),
+        })
+
+    def test_archive_keeps_every_column(self):
+        Collection = self.env['property.collection']
+        Run = self.env['property.collection.archive.run']
+        magic = set(models.MAGIC_COLUMNS) | {'id'}
+        stored = {name for name, field in Collection._fields.items()
+                  if field.store and field.column_type and name not in magic}
+        self.assertEqual(stored - set(ARCHIVE_COLUMNS), set(),
+                         "Every stored collection column must be copied to the archive")
+
+        cutoff = date.today() + timedelta(days=1)
+        self.env.flush_all()
+        self.env.cr.execute(SQL("SELECT c.id FROM property_collection c WHERE %s ORDER BY c.id LIMIT 1",
+                                Run._eligible_condition(cutoff)))
+        collection = Collection.browse(self.env.cr.fetchone()[0])
+        collection_round = self.env['property.collection.round'].create({
+            'collector_id': self.env.uid,
+            'property_id': collection.property_id.id,
+        })
+        receipt = base64.b64encode(b'receipt scan')
+        values = {
+            'round_id': collection_round.id,
+            'bank_id': self.env['res.bank'].create({'name': 'Archive Test Bank'}).id,
+            'bank_account': 'ACC-0042',
+            'invoice_reference': 'INV/ARCHIVE/1',
+            'payment_reference': 'PAY/ARCHIVE/1',
+            'receipt_image': receipt,
+            'receipt_filename': 'receipt.png',
+        }
+        collection.write(values)
+
+        Run._run(cutoff=cutoff)
+
+        archived = self.env['property.collection.archive'].search([('original_id', '=', collection.id)])
+        self.assertEqual(len(archived), 1)
+        self.assertFalse(collection.exists())
+        self.assertEqual(archived.round_id, collection_round)
+        self.assertEqual(archived.bank_id.id, values['bank_id'])
+        for fname in ('bank_account', 'invoice_reference', 'payment_reference', 'receipt_filename'):
+            self.assertEqual(archived[fname], values[fname], fname)
+        self.assertEqual(archived.receipt_image, receipt, "The receipt must stay readable from the archive")
@@ -0,0 +1,45 @@
+from datetime import date
+
+from odoo.tests import tagged
+
+from .common import PropertyBenchmarkCase
+
+PERIOD = (date(2000, 1, 1), date(2000, 1, 31))
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class TestCommissionPlans(PropertyBenchmarkCase):
+    """Which plan pays the commission of a collection"""
+
+    def test_most_specific_plan_only(self):
+        Rule = self.env['property.commission.rule']
+        Rule.search([]).active = False
+        agreements = self.env['property.agreement'].search([('state', '=', 'active')])
+        first = agreements[0]
+        other = agreements.filtered(lambda agreement: agreement.property_id != first.property_id)[:1]
+        self.assertTrue(other, "The generated portfolio has several properties")
+        collector = self.env['res.users'].create({'name': 'Commission Collector', 'login': 'commission.collector'})
+        self.env['property.collection'].create([{
+            'tenant_id': agreement.tenant_id.id,
+            'room_id': agreement.room_id.id,
+            'agreement_id': agreement.id,
+            'amount_collected': amount,
+            'collection_type': collection_type,
+            'date': date(2000, 1, 15),
+            'collected_by': collector.id,
+            'status': 'collected',
+        } for agreement, amount, collection_type in [
+            (first, 1000.0, 'rent'), (first, 500.0, 'deposit'), (other, 1000.0, 'rent'),
+        ]])
+        Rule.create([
+            {'name': 'Everywhere', 'rate': 1.0},
+            {'name': 'First property', 'rate': 2.0, 'property_id': first.property_id.id},
+        ])
+
+        result = self.env['property.staff.salary']._compute_commissions(*PERIOD, [collector.id])[collector.id]
+
+        self.assertEqual(result['collected_amount'], 2000.0, "Deposits are no commissionable income")
+        self.assertEqual(result['commission'], 30.0,
+                         "The property plan replaces the general plan instead of stacking on it")
+        self.assertEqual(sorted((line['rule_name'], line['scope_base']) for line in result['lines']),
+                         [('Everywhere', 1000.0), ('First property', 1000.0)])
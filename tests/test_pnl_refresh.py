@@ -0,0 +1,42 @@
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPnlRefresh(TransactionCase):
+    """The incremental refresh rebuilds the month a record leaves"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.property = cls.env['property.property'].create({
+            'name': 'P&L Tower',
+            'code': 'PNLT',
+            'address': 'Test Street',
+        })
+        cls.expense = cls.env['property.expense'].create({
+            'name': 'Roof repair',
+            'date': date(2001, 3, 15),
+            'amount': 700.0,
+            'property_id': cls.property.id,
+            'state': 'approved',
+        })
+        cls.env['property.pnl.fact']._refresh(full=True)
+
+    def _expense(self, month):
+        facts = self.env['property.pnl.fact'].search([
+            ('property_id', '=', self.property.id), ('month', '=', month), ('source', '=', 'expense'),
+        ])
+        return sum(facts.mapped('expense'))
+
+    def test_moved_to_another_month(self):
+        self.expense.date = date(2001, 5, 10)
+        self.env['property.pnl.fact']._refresh()
+        self.assertEqual(self._expense(date(2001, 3, 1)), 0.0, "The month the expense left is rebuilt")
+        self.assertEqual(self._expense(date(2001, 5, 1)), 700.0)
+
+    def test_deleted(self):
+        self.expense.unlink()
+        self.env['property.pnl.fact']._refresh()
+        self.assertEqual(self._expense(date(2001, 3, 1)), 0.0, "The month of a deleted expense is rebuilt")
@@ -0,0 +1,106 @@
+import threading
+import time
+
+from odoo import api, SUPERUSER_ID
+from odoo.sql_db import db_connect
+from odoo.tests import TransactionCase, tagged
+
+from .common import BenchmarkMixin
+
+WORKERS = 8
+RECEIPTS_PER_WORKER = 200
+BATCH_SIZE = 20
+# Rest of a collector transaction, run while the sequence row is still locked
+TRANSACTION_WORK = 0.002
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class TestSequenceConcurrency(BenchmarkMixin, TransactionCase):
+    """Parallel collectors numbering receipts on real, committed cursors"""
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.write_report()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.db = db_connect(self.env.cr.dbname)
+        with self.db.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            self.sequence_ids = {
+                implementation: env['ir.sequence'].create({
+                    'name': f'Benchmark {implementation}',
+                    'prefix': 'BENCH/',
+                    'padding': 6,
+                    'implementation': implementation,
+                }).id
+                for implementation in ('no_gap', 'standard')
+            }
+        self.addCleanup(self._unlink_sequences)
+
+    def _unlink_sequences(self):
+        with self.db.cursor() as cr:
+            api.Environment(cr, SUPERUSER_ID, {})['ir.sequence'].browse(
+                list(self.sequence_ids.values())).unlink()
+
+    def _run_workers(self, implementation, reserve):
+        numbers = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                with self.db.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    sequence = env['ir.sequence'].browse(self.sequence_ids[implementation])
+                    for _batch in range(RECEIPTS_PER_WORKER // BATCH_SIZE):
+                        batch = reserve(sequence)
+                        time.sleep(TRANSACTION_WORK)
+                        cr.commit()
+                        with lock:
+                            numbers.extend(batch)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _n in range(WORKERS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        self.assertFalse(errors, errors[:1])
+        return numbers, elapsed
+
+    def _record(self, name, elapsed):
+        total = WORKERS * RECEIPTS_PER_WORKER
+        BenchmarkMixin.report.append({
+            'name': name,
+            'workers': WORKERS,
+            'receipts': total,
+            'time_ms': round(elapsed * 1000, 2),
+            'receipts_per_second': round(total / elapsed, 1),
+        })
+
+    def test_gapless_block_reservation(self):
+        # One locked update per receipt; ``_next`` would fail at once on a held lock (NOWAIT)
+        single, single_time = self._run_workers(
+            'no_gap', lambda sequence: [sequence._reserve_block(1)[0] for _n in range(BATCH_SIZE)])
+        block, block_time = self._run_workers(
+            'no_gap', lambda sequence: sequence._reserve_block(BATCH_SIZE))
+        self._record('sequence.no_gap.next_per_receipt', single_time)
+        self._record('sequence.no_gap.reserve_block', block_time)
+
+        all_numbers = sorted(int(number.split('/')[-1]) for number in single + block)
+        self.assertEqual(all_numbers, list(range(1, len(all_numbers) + 1)), "No-gap numbering has holes")
+        self.assertLess(block_time, single_time)
+
+    def test_standard_pooled_reservation(self):
+        single, single_time = self._run_workers(
+            'standard', lambda sequence: [sequence._next() for _n in range(BATCH_SIZE)])
+        pooled, pooled_time = self._run_workers(
+            'standard', lambda sequence: sequence._take_from_pool(BATCH_SIZE))
+        self._record('sequence.standard.next_per_receipt', single_time)
+        self._record('sequence.standard.pooled', pooled_time)
+        self.assertEqual(len(set(single + pooled)), len(single) + len(pooled), "Duplicate receipt numbers")
@@ -0,0 +1,103 @@
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import PropertyBenchmarkCase
+
+
+@tagged('post_install', '-at_install', '-standard', 'property_benchmark')
+class TestTenantExit(PropertyBenchmarkCase):
+    """Settlement of a tenant moving out"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.agreement = cls.env['property.agreement'].search([('state', '=', 'active'), ('rent_amount', '>', 0)],
+                                                             limit=1)
+        # A month without generated history, exited on the 15th
+        cls.exit_date = fields.Date.today().replace(day=1) + relativedelta(months=6, day=15)
+        cls.expected_share = cls.agreement.rent_amount * 15 / (cls.exit_date + relativedelta(day=31)).day
+
+    def _figures(self):
+        return self.env['property.tenant.exit']._get_settlement_figures(
+            [(self.agreement.id, self.exit_date)])[self.agreement.id]
+
+    def _create_exit_month_due(self, amount_paid=0.0):
+        return self.env['property.due.tracker'].create({
+            'tenant_id': self.agreement.tenant_id.id,
+            'room_id': self.agreement.room_id.id,
+            'agreement_id': self.agreement.id,
+            'due_date': self.exit_date.replace(day=1),
+            'amount_due': self.agreement.rent_amount,
+            'amount_paid': amount_paid,
+            'due_type': 'rent',
+        })
+
+    def test_mid_month_exit_unbilled(self):
+        figures = self._figures()
+        self.assertAlmostEqual(figures['prorated_rent'], self.expected_share, places=2)
+
+    def test_mid_month_exit_full_month_due(self):
+        before = self._figures()
+        self._create_exit_month_due()
+        figures = self._figures()
+        self.assertAlmostEqual(figures['dues_outstanding'], before['dues_outstanding'], places=2,
+                               msg="The full month due of the exit month must not be charged")
+        self.assertAlmostEqual(figures['prorated_rent'], self.expected_share, places=2)
+
+    def test_mid_month_exit_paid_ahead(self):
+        self._create_exit_month_due(amount_paid=self.agreement.rent_amount)
+        figures = self._figures()
+        self.assertAlmostEqual(figures['prorated_rent'], self.expected_share - self.agreement.rent_amount, places=2,
+                               msg="The days paid after the exit date are credited to the tenant")
+
+    def _create_deposit(self, amount, deposit_date):
+        return self.env['property.deposit'].create({
+            'tenant_id': self.agreement.tenant_id.id,
+            'agreement_id': self.agreement.id,
+            'deposit_amount': amount,
+            'deposit_date': deposit_date,
+        })
+
+    def _create_exit(self, exit_date, pending_dues):
+        return self.env['property.tenant.exit'].create({
+            'tenant_id': self.agreement.tenant_id.id,
+            'agreement_id': self.agreement.id,
+            'exit_date': exit_date,
+            'exit_reason': 'end_of_term',
+            'pending_dues': pending_dues,
+        })
+
+    def test_exit_settles_dues_from_deposit(self):
+        today = fields.Date.today()
+        self.env['property.due.tracker'].create({
+            'tenant_id': self.agreement.tenant_id.id,
+            'room_id': self.agreement.room_id.id,
+            'agreement_id': self.agreement.id,
+            'due_date': today - relativedelta(days=10),
+            'amount_due': 100.0,
+            'due_type': 'utility',
+        })
+        exit_record = self._create_exit(today, 1.0)
+        invoices, dues = exit_record._get_settled_documents()
+        pending = sum(invoices.mapped('amount_residual')) + sum(dues.mapped('outstanding_amount'))
+        exit_record.pending_dues = pending
+        self._create_deposit(pending + 500.0, today - relativedelta(years=5))
+
+        exit_record.action_complete_exit()
+
+        self.assertTrue(all(invoice.state == 'paid' for invoice in invoices),
+                        "Invoices paid from the deposit must not stay open")
+        self.assertTrue(all(due.status == 'paid' for due in dues), "Dues paid from the deposit must not stay open")
+        self.assertEqual(set(invoices.payment_ids.filtered(lambda p: p.reference == exit_record.name)
+                             .mapped('payment_method')), {'deposit'} if invoices else set())
+
+    def test_back_dated_exit(self):
+        today = fields.Date.today()
+        self._create_deposit(500.0, today)
+        exit_record = self._create_exit(today - relativedelta(days=10), 100.0)
+        with self.assertRaises(UserError):
+            exit_record.action_complete_exit()
+        self.assertNotEqual(exit_record.status, 'completed')
@@ -0,0 +1,22 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestTenantLookupKeys(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tenant = cls.env['property.tenant'].create({
+            'name': 'Key Tenant',
+            'mobile': '+971 50 765 4321',
+            'id_passport': 'KEY-0001',
+        })
+
+    def test_edit_keeping_the_keys(self):
+        self.tenant.write({'mobile': '00971507654321', 'id_passport': 'key 0001'})
+        self.assertEqual(self.tenant.mobile_key, '507654321')
+
+    def test_edit_to_new_keys(self):
+        self.tenant.write({'mobile': '+971 50 765 0000', 'id_passport': 'KEY-0003'})
+        self.assertEqual((self.tenant.mobile_key, self.tenant.id_key), ('507650000', 'KEY0003'))
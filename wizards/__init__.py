@@ -1 +1,6 @@
-# Placeholder for wizards
+from . import bank_statement_import
+from . import agreement_renewal
+from . import tenant_exit_bulk
+from . import deposit_liability
+from . import landlord_payout
+from . import payroll_run
@@ -0,0 +1,210 @@
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, Command, _
+from odoo.exceptions import UserError
+
+from ..models.property_bulk import bulk_mode, post_batch_summary
+
+
+class PropertyAgreementRenewal(models.TransientModel):
+    _name = 'property.agreement.renewal'
+    _description = 'Bulk Agreement Renewal'
+
+    # Selection
+    property_id = fields.Many2one('property.property', 'Property')
+    end_date_from = fields.Date('Expiring From', default=fields.Date.today)
+    end_date_to = fields.Date('Expiring To', default=lambda self: fields.Date.today() + relativedelta(months=3))
+
+    # Renewal Terms
+    duration_months = fields.Integer('Renewal Term (Months)', default=12, required=True)
+    adjustment_type = fields.Selection([
+        ('none', 'Keep Current Rent'),
+        ('percent', 'Increase by Percentage'),
+        ('fixed', 'Increase by Fixed Amount'),
+        ('room', 'Current Room Rent'),
+    ], string='Rent Adjustment', default='none', required=True)
+    adjustment_value = fields.Float('Adjustment')
+    max_increase_percent = fields.Float('Maximum Increase (%)',
+                                        help="Caps the increase of each rent, e.g. the rental index limit; 0 means no cap")
+    activate = fields.Boolean('Activate Renewals', default=True)
+
+    line_ids = fields.One2many('property.agreement.renewal.line', 'wizard_id', 'Agreements')
+    conflict_count = fields.Integer('Room Conflicts', compute='_compute_conflict_count')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft')
+    renewal_ids = fields.Many2many('property.agreement', string='Renewals', readonly=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') == 'property.agreement' and self.env.context.get('active_ids'):
+            agreements = self.env['property.agreement'].browse(self.env.context['active_ids'])
+            res['line_ids'] = [Command.create(vals) for vals in self._prepare_line_vals(
+                agreements, res.get('duration_months') or 12)]
+        return res
+
+    @api.depends('line_ids.conflict')
+    def _compute_conflict_count(self):
+        for wizard in self:
+            wizard.conflict_count = len(wizard.line_ids.filtered('conflict'))
+
+    def _get_agreement_domain(self):
+        domain = [
+            ('state', '=', 'active'),
+            ('renewal_ids', '=', False),
+        ]
+        if self.property_id:
+            domain.append(('property_id', '=', self.property_id.id))
+        if self.end_date_from:
+            domain.append(('end_date', '>=', self.end_date_from))
+        if self.end_date_to:
+            domain.append(('end_date', '<=', self.end_date_to))
+        return domain
+
+    @api.model
+    def _prepare_line_vals(self, agreements, duration_months):
+        """Line values of the agreements that can be renewed, with their room conflicts found in one query"""
+        agreements = agreements.filtered(lambda a: a.state == 'active' and not a.renewal_ids)
+        periods = {
+            agreement.id: (agreement.end_date + timedelta(days=1),
+                           agreement.end_date + relativedelta(months=duration_months))
+            for agreement in agreements
+        }
+        conflicts = self.env['property.agreement']._find_room_overlaps([
+            (agreement.id, agreement.room_id.id, *periods[agreement.id], agreement.id)
+            for agreement in agreements
+        ])
+        return [{
+            'agreement_id': agreement.id,
+            'current_rent': agreement.rent_amount,
+            'conflict': agreement.id in conflicts,
+        } for agreement in agreements]
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_load(self):
+        """Fill the wizard with the active agreements expiring in the selected window"""
+        self.ensure_one()
+        agreements = self.env['property.agreement'].search(self._get_agreement_domain(), order='end_date, id')
+        self.line_ids = [Command.clear()] + [
+            Command.create(vals) for vals in self._prepare_line_vals(agreements, self.duration_months)]
+        return self._reopen()
+
+    def _prepare_renewal_vals(self, line):
+        agreement = line.agreement_id
+        return {
+            'renewal_of_id': agreement.id,
+            'tenant_id': agreement.tenant_id.id,
+            'room_id': agreement.room_id.id,
+            'start_date': line.new_start_date,
+            'end_date': line.new_end_date,
+            'rent_amount': line.new_rent,
+            'deposit_amount': agreement.deposit_amount,
+            'extra_charges': agreement.extra_charges,
+            'payment_method': agreement.payment_method,
+            'payment_frequency': agreement.payment_frequency,
+            'payment_day': agreement.payment_day,
+            'payment_terms': agreement.payment_terms,
+            'auto_generate_invoices': agreement.auto_generate_invoices,
+            'auto_post_invoices': agreement.auto_post_invoices,
+            'invoice_day': agreement.invoice_day,
+            'advance_invoice_days': agreement.advance_invoice_days,
+            'agreement_type': agreement.agreement_type,
+            'notice_period_days': agreement.notice_period_days,
+            'terms_and_conditions': agreement.terms_and_conditions,
+            'special_conditions': agreement.special_conditions,
+            'electricity_included': agreement.electricity_included,
+            'water_included': agreement.water_included,
+            'gas_included': agreement.gas_included,
+            'internet_included': agreement.internet_included,
+            'parking_included': agreement.parking_included,
+            'currency_id': agreement.currency_id.id,
+        }
+
+    def action_renew(self):
+        """Create every renewal without a room conflict in one batch, then activate them together"""
+        self.ensure_one()
+        if self.state != 'draft':
+            raise UserError(_('These agreements are already renewed.'))
+        lines = self.line_ids.filtered(lambda l: not l.agreement_id.renewal_ids)
+        conflicts = self.env['property.agreement']._find_room_overlaps([
+            (line.id, line.agreement_id.room_id.id, line.new_start_date, line.new_end_date, line.agreement_id.id)
+            for line in lines
+        ])
+        conflicting = lines.filtered(lambda l: l.id in conflicts)
+        conflicting.write({'conflict': True})
+        lines -= conflicting
+        if not lines:
+            raise UserError(_('There is no agreement to renew without a room conflict.'))
+
+        renewals = bulk_mode(self.env['property.agreement']).create([self._prepare_renewal_vals(line) for line in lines])
+        if self.activate:
+            renewals.action_activate()
+        post_batch_summary(renewals, _('Agreements renewed'), 'rent_amount')
+        self.write({'state': 'done', 'renewal_ids': [Command.set(renewals.ids)]})
+        return self._reopen()
+
+    def action_view_renewals(self):
+        return {
+            'name': _('Renewed Agreements'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'property.agreement',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.renewal_ids.ids)],
+        }
+
+
+class PropertyAgreementRenewalLine(models.TransientModel):
+    _name = 'property.agreement.renewal.line'
+    _description = 'Bulk Agreement Renewal Line'
+    _order = 'new_start_date, id'
+
+    wizard_id = fields.Many2one('property.agreement.renewal', 'Wizard', required=True, ondelete='cascade')
+    agreement_id = fields.Many2one('property.agreement', 'Agreement', required=True, readonly=True)
+    tenant_id = fields.Many2one(related='agreement_id.tenant_id')
+    room_id = fields.Many2one(related='agreement_id.room_id')
+    end_date = fields.Date(related='agreement_id.end_date', string='Current End')
+
+    current_rent = fields.Monetary('Current Rent', currency_field='currency_id', readonly=True)
+    new_rent = fields.Monetary('New Rent', currency_field='currency_id',
+                               compute='_compute_new_rent', store=True, readonly=False)
+    new_start_date = fields.Date('New Start', compute='_compute_new_period', store=True)
+    new_end_date = fields.Date('New End', compute='_compute_new_period', store=True, readonly=False)
+    conflict = fields.Boolean('Room Conflict', readonly=True,
+                              help="Another draft or active agreement overlaps the renewal period of this room")
+
+    currency_id = fields.Many2one(related='agreement_id.currency_id')
+
+    @api.depends('agreement_id', 'wizard_id.duration_months')
+    def _compute_new_period(self):
+        for line in self:
+            end_date = line.agreement_id.end_date
+            line.new_start_date = end_date and end_date + timedelta(days=1)
+            line.new_end_date = end_date and end_date + relativedelta(months=line.wizard_id.duration_months)
+
+    @api.depends('current_rent', 'wizard_id.adjustment_type', 'wizard_id.adjustment_value',
+                 'wizard_id.max_increase_percent')
+    def _compute_new_rent(self):
+        for line in self:
+            wizard = line.wizard_id
+            rent = line.current_rent
+            if wizard.adjustment_type == 'percent':
+                rent *= 1 + wizard.adjustment_value / 100
+            elif wizard.adjustment_type == 'fixed':
+                rent += wizard.adjustment_value
+            elif wizard.adjustment_type == 'room':
+                rent = line.agreement_id.room_id.rent_amount or rent
+            if wizard.max_increase_percent:
+                rent = min(rent, line.current_rent * (1 + wizard.max_increase_percent / 100))
+            line.new_rent = line.currency_id.round(rent) if line.currency_id else rent
@@ -0,0 +1,256 @@
+import csv
+import hashlib
+import io
+import re
+from collections import Counter
+from datetime import datetime
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+from ..models.property_bulk import bulk_mode
+
+
+CSV_COLUMNS = {
+    'date': ('date', 'value date', 'transaction date', 'posting date'),
+    'amount': ('amount', 'credit', 'credit amount'),
+    'reference': ('reference', 'description', 'narrative', 'details'),
+    'transaction_id': ('transaction id', 'transaction_id', 'bank reference', 'ref'),
+    'account_number': ('account', 'account number', 'iban'),
+}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%m/%d/%Y')
+MT940_LINE_61 = re.compile(
+    r'^(?P<date>\d{6})(?P<entry>\d{4})?(?P<sign>R?[CD])[A-Z]?(?P<amount>[\d,]+)'
+    r'(?P<type>[A-Z0-9]{4})(?P<customer_ref>[^/]*)(?://(?P<bank_ref>.*))?$'
+)
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise UserError(_('Unrecognised date "%s" in bank statement.', value))
+
+
+def _parse_amount(value):
+    value = (value or '').strip().replace(' ', '')
+    if ',' in value and '.' in value:
+        value = value.replace(',', '')
+    else:
+        value = value.replace(',', '.')
+    return float(value or 0.0)
+
+
+def _fallback_transaction_id(date, amount, reference, occurrence=1):
+    """Stable id for statement lines without a bank reference, so re-imports dedupe.
+
+    ``occurrence`` tells identical lines of one statement apart, e.g. two cash
+    deposits of the same amount on the same day; the first keeps the plain hash.
+    """
+    key = f'{date}|{amount:.2f}|{reference}'
+    if occurrence > 1:
+        key += f'|{occurrence}'
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return f'STMT-{digest[:20]}'
+
+
+def number_repeated_lines(lines):
+    """Number the statement lines without a bank reference among the identical lines before them"""
+    seen = Counter()
+    for line in lines:
+        if not line['transaction_id']:
+            key = (line['date'], f"{line['amount']:.2f}", line['reference'])
+            seen[key] += 1
+            line['occurrence'] = seen[key]
+        yield line
+
+
+def iter_csv_lines(lines):
+    """Yield statement line dicts from an iterable of CSV text lines"""
+    reader = csv.reader(lines)
+    header = [column.strip().lower() for column in next(reader, [])]
+    positions = {}
+    for key, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in header:
+                positions[key] = header.index(alias)
+                break
+    if 'date' not in positions or 'amount' not in positions:
+        raise UserError(_('The CSV statement needs at least a date and an amount column.'))
+
+    for row in reader:
+        if not row or not any(row):
+            continue
+        values = {key: row[pos] if pos < len(row) else '' for key, pos in positions.items()}
+        amount = _parse_amount(values['amount'])
+        if amount <= 0:
+            continue
+        yield {
+            'date': _parse_date(values['date']),
+            'amount': amount,
+            'reference': (values.get('reference') or '').strip(),
+            'transaction_id': (values.get('transaction_id') or '').strip(),
+            'account_number': (values.get('account_number') or '').strip(),
+        }
+
+
+def iter_mt940_lines(lines):
+    """Yield credit statement line dicts from an iterable of MT940 text lines"""
+    account_number = ''
+    current = None
+    for raw_line in lines:
+        line = raw_line.rstrip('\r\n')
+        if line.startswith(':25:'):
+            account_number = line[4:].strip()
+        elif line.startswith(':61:'):
+            if current:
+                yield current
+            current = None
+            match = MT940_LINE_61.match(line[4:])
+            if match and match.group('sign') == 'C':
+                current = {
+                    'date': datetime.strptime(match.group('date'), '%y%m%d').date(),
+                    'amount': _parse_amount(match.group('amount')),
+                    'reference': match.group('customer_ref').strip(),
+                    'transaction_id': (match.group('bank_ref') or '').strip(),
+                    'account_number': account_number,
+                }
+        elif line.startswith(':86:') and current:
+            current['reference'] = (current['reference'] + ' ' + line[4:].strip()).strip()
+        elif current and line and not line.startswith(':') and not line.startswith('-'):
+            # Continuation line of a multi-line :86: field
+            current['reference'] = (current['reference'] + ' ' + line.strip()).strip()
+        elif line.startswith(':62') or line.startswith('-'):
+            if current:
+                yield current
+            current = None
+    if current:
+        yield current
+
+
+class PropertyBankStatementImport(models.TransientModel):
+    _name = 'property.bank.statement.import'
+    _description = 'Bank Statement Import'
+
+    # Rows inserted per INSERT and handed to the matcher at once
+    BATCH_SIZE = 1000
+
+    statement_file = fields.Binary('Statement File', required=True)
+    statement_filename = fields.Char('Filename')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('mt940', 'MT940'),
+    ], string='Format', required=True, default='csv')
+    bank_name = fields.Char('Bank Name')
+    auto_match = fields.Boolean('Match After Import', default=True)
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft')
+    imported_count = fields.Integer('Imported', readonly=True)
+    duplicate_count = fields.Integer('Skipped Duplicates', readonly=True)
+    matched_count = fields.Integer('Matched', readonly=True)
+
+    @api.onchange('statement_filename')
+    def _onchange_statement_filename(self):
+        if self.statement_filename:
+            name = self.statement_filename.lower()
+            if name.endswith(('.sta', '.mt940', '.940')):
+                self.file_format = 'mt940'
+            elif name.endswith('.csv'):
+                self.file_format = 'csv'
+
+    def _open_statement_stream(self):
+        """Binary stream of the uploaded file, read from the filestore when possible"""
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'statement_file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(attachment.raw or b'')
+
+    def _iter_statement_lines(self, stream):
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+        if self.file_format == 'mt940':
+            return number_repeated_lines(iter_mt940_lines(text))
+        return number_repeated_lines(iter_csv_lines(text))
+
+    def _iter_batches(self, statement_lines):
+        batch = []
+        for line in statement_lines:
+            batch.append(line)
+            if len(batch) >= self.BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _prepare_transfer_vals(self, line):
+        transaction_id = line['transaction_id'] or _fallback_transaction_id(
+            line['date'], line['amount'], line['reference'], line.get('occurrence', 1))
+        return {
+            'name': line['reference'] or transaction_id,
+            'date': line['date'],
+            'amount': line['amount'],
+            'transaction_id': transaction_id,
+            'account_number': line['account_number'],
+            'bank_name': self.bank_name,
+        }
+
+    def _import_batch(self, batch):
+        """Insert the new lines of one batch, returning (created transfers, duplicates)"""
+        vals_by_id = {}
+        for line in batch:
+            vals = self._prepare_transfer_vals(line)
+            vals_by_id.setdefault(vals['transaction_id'], vals)
+
+        self.env.cr.execute(
+            "SELECT transaction_id FROM property_bank_transfer WHERE transaction_id = ANY(%s)",
+            [list(vals_by_id)],
+        )
+        for (transaction_id,) in self.env.cr.fetchall():
+            vals_by_id.pop(transaction_id, None)
+
+        transfers = bulk_mode(self.env['property.bank.transfer']).create(list(vals_by_id.values()))
+        return transfers, len(batch) - len(transfers)
+
+    def action_import(self):
+        self.ensure_one()
+        imported = duplicates = matched = 0
+        with self._open_statement_stream() as stream:
+            for batch in self._iter_batches(self._iter_statement_lines(stream)):
+                transfers, skipped = self._import_batch(batch)
+                imported += len(transfers)
+                duplicates += skipped
+                if self.auto_match and transfers:
+                    matched += transfers._auto_match()['matched']
+
+        self.write({
+            'state': 'done',
+            'imported_count': imported,
+            'duplicate_count': duplicates,
+            'matched_count': matched,
+        })
+        return {
+            'name': _('Import Bank Statement'),
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_view_transfers(self):
+        return {
+            'name': _('Bank Transfers'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'property.bank.transfer',
+            'view_mode': 'list,form',
+            'domain': [('create_date', '>=', self.create_date)],
+        }
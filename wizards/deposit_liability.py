@@ -0,0 +1,64 @@
+from odoo import models, fields, api, Command, _
+
+
+class PropertyDepositLiability(models.TransientModel):
+    _name = 'property.deposit.liability'
+    _description = 'Deposit Liability Report'
+
+    date = fields.Date('As of', required=True, default=fields.Date.today)
+    property_ids = fields.Many2many('property.property', string='Properties',
+                                    help="Leave empty to report every property")
+    line_ids = fields.One2many('property.deposit.liability.line', 'report_id', 'Properties', readonly=True)
+    total_held = fields.Monetary('Total Held', compute='_compute_total_held', currency_field='currency_id')
+
+    currency_id = fields.Many2one('res.currency', default=lambda self: self.env.company.currency_id)
+
+    @api.depends('line_ids.held')
+    def _compute_total_held(self):
+        for report in self:
+            report.total_held = sum(report.line_ids.mapped('held'))
+
+    def action_compute(self):
+        """Fill the report with the liability of each property on the selected date"""
+        self.ensure_one()
+        liability = self.env['property.deposit.move']._get_liability(self.date, self.property_ids.ids)
+        self.line_ids = [Command.clear()] + [
+            Command.create({'property_id': property_id, **amounts})
+            for property_id, amounts in liability.items()
+        ]
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_view_ledger(self):
+        self.ensure_one()
+        domain = [('date', '<=', self.date)]
+        if self.property_ids:
+            domain.append(('property_id', 'in', self.property_ids.ids))
+        return {
+            'name': _('Deposit Ledger'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'property.deposit.move',
+            'view_mode': 'list',
+            'domain': domain,
+            'context': {'search_default_group_property': 1},
+        }
+
+
+class PropertyDepositLiabilityLine(models.TransientModel):
+    _name = 'property.deposit.liability.line'
+    _description = 'Deposit Liability Report Line'
+    _order = 'held desc'
+
+    report_id = fields.Many2one('property.deposit.liability', 'Report', required=True, ondelete='cascade')
+    property_id = fields.Many2one('property.property', 'Property', readonly=True)
+    received = fields.Monetary('Received', currency_field='currency_id', readonly=True)
+    deducted = fields.Monetary('Deducted', currency_field='currency_id', readonly=True)
+    refunded = fields.Monetary('Refunded', currency_field='currency_id', readonly=True)
+    held = fields.Monetary('Held', currency_field='currency_id', readonly=True)
+
+    currency_id = fields.Many2one(related='report_id.currency_id')
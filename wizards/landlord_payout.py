@@ -0,0 +1,142 @@
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, Command, _
+from odoo.exceptions import UserError
+
+from ..models.property_bulk import bulk_mode
+
+
+def _previous_month_start():
+    return fields.Date.today().replace(day=1) - relativedelta(months=1)
+
+
+class PropertyLandlordPayout(models.TransientModel):
+    _name = 'property.landlord.payout'
+    _description = 'Landlord Payout Run'
+
+    # Period
+    period_from = fields.Date('Period From', required=True, default=_previous_month_start)
+    period_to = fields.Date('Period To', required=True,
+                            default=lambda self: fields.Date.today().replace(day=1) - relativedelta(days=1))
+    property_ids = fields.Many2many('property.property', string='Properties',
+                                    help="Leave empty to pay out every property with a landlord")
+
+    # Payment
+    payment_date = fields.Date('Payment Date', required=True, default=fields.Date.today)
+    payment_method = fields.Selection(
+        selection=lambda self: self.env['property.landlord.payment']._fields['payment_method'].selection,
+        string='Payment Method', required=True, default='bank_transfer')
+    send_statements = fields.Boolean('Generate Statements', default=True,
+                                     help="Render one statement PDF per landlord in the background")
+
+    line_ids = fields.One2many('property.landlord.payout.line', 'payout_id', 'Payouts')
+    total_amount = fields.Monetary('Total Payout', compute='_compute_total_amount', currency_field='currency_id')
+    has_negative_lines = fields.Boolean(compute='_compute_total_amount')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft')
+    payment_ids = fields.Many2many('property.landlord.payment', string='Payments', readonly=True)
+
+    currency_id = fields.Many2one('res.currency', default=lambda self: self.env.company.currency_id)
+
+    @api.depends('line_ids.amount')
+    def _compute_total_amount(self):
+        for payout in self:
+            payout.total_amount = sum(amount for amount in payout.line_ids.mapped('amount') if amount > 0)
+            payout.has_negative_lines = any(amount <= 0 for amount in payout.line_ids.mapped('amount'))
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_preview(self):
+        """Fill the run with the share of every landlord over the period"""
+        self.ensure_one()
+        if self.period_from > self.period_to:
+            raise UserError(_('The period must start before it ends.'))
+        payouts = self.env['property.landlord.payment']._compute_payouts(
+            self.period_from, self.period_to, self.property_ids.ids)
+        if not payouts:
+            raise UserError(_('There is nothing left to pay out for this period.'))
+        self.line_ids = [Command.clear()] + [Command.create(vals) for vals in payouts]
+        return self._reopen()
+
+    def _prepare_payment_vals(self, line):
+        return {
+            'name': f"PAYOUT/{line.property_id.code}/{self.period_from:%Y%m%d}-{self.period_to:%Y%m%d}",
+            'landlord_id': line.landlord_id.id,
+            'property_id': line.property_id.id,
+            'period_from': self.period_from,
+            'period_to': self.period_to,
+            'payment_date': self.payment_date,
+            'payment_method': self.payment_method,
+            'collections_amount': line.collections_amount,
+            'expenses_amount': line.expenses_amount,
+            'management_fee': line.management_fee,
+            'amount': line.amount,
+            'statement_state': 'pending' if self.send_statements else 'none',
+        }
+
+    def _lock_properties(self, properties):
+        """Lock the properties paid out, so two runs over the same period pay them once"""
+        self.env.cr.execute("SELECT id FROM property_property WHERE id = ANY(%s) ORDER BY id FOR UPDATE",
+                            [properties.ids])
+
+    def action_generate(self):
+        """Create the payments of every previewed line in one batch.
+
+        Lines whose expenses exceed the income are not paid: a negative
+        payment would read as money owed by the landlord, left to settle by hand.
+        """
+        self.ensure_one()
+        if self.state != 'draft':
+            raise UserError(_('These payouts are already generated.'))
+        if not self.line_ids:
+            raise UserError(_('Preview the payouts before generating them.'))
+
+        lines = self.line_ids.filtered(lambda line: line.amount > 0)
+        if not lines:
+            raise UserError(_('No property has a positive share to pay out for this period.'))
+        self._lock_properties(lines.property_id)
+        payable = {vals['property_id'] for vals in self.env['property.landlord.payment']._compute_payouts(
+            self.period_from, self.period_to, lines.property_id.ids)}
+        paid = lines.property_id.filtered(lambda prop: prop.id not in payable)
+        if paid:
+            raise UserError(_('%(properties)s were paid out over this period in the meantime, preview the payouts again.',
+                              properties=', '.join(paid.mapped('name'))))
+
+        payments = bulk_mode(self.env['property.landlord.payment']).create([self._prepare_payment_vals(line) for line in lines])
+        if self.send_statements:
+            self.env.ref('property_management_lite.ir_cron_property_landlord_statements')._trigger()
+        self.write({'state': 'done', 'payment_ids': [Command.set(payments.ids)]})
+        return self._reopen()
+
+    def action_view_payments(self):
+        return {
+            'name': _('Landlord Payouts'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'property.landlord.payment',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.payment_ids.ids)],
+        }
+
+
+class PropertyLandlordPayoutLine(models.TransientModel):
+    _name = 'property.landlord.payout.line'
+    _description = 'Landlord Payout Run Line'
+
+    payout_id = fields.Many2one('property.landlord.payout', 'Payout Run', required=True, ondelete='cascade')
+    property_id = fields.Many2one('property.property', 'Property', readonly=True)
+    landlord_id = fields.Many2one('res.partner', 'Landlord', readonly=True)
+    collections_amount = fields.Monetary('Collections', currency_field='currency_id', readonly=True)
+    expenses_amount = fields.Monetary('Approved Expenses', currency_field='currency_id', readonly=True)
+    management_fee = fields.Monetary('Management Fee', currency_field='currency_id', readonly=True)
+    amount = fields.Monetary('Payout', currency_field='currency_id', readonly=True)
+
+    currency_id = fields.Many2one(related='payout_id.currency_id')
@@ -0,0 +1,146 @@
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, Command, _
+from odoo.exceptions import UserError
+
+from ..models.property_bulk import bulk_mode
+
+
+class PropertyPayrollRun(models.TransientModel):
+    _name = 'property.payroll.run'
+    _description = 'Collector Payroll Run'
+
+    # Period
+    period_from = fields.Date('Period From', required=True,
+                              default=lambda self: fields.Date.today().replace(day=1) - relativedelta(months=1))
+    period_to = fields.Date('Period To', required=True,
+                            default=lambda self: fields.Date.today().replace(day=1) - relativedelta(days=1))
+    user_ids = fields.Many2many('res.users', string='Collectors',
+                                help="Leave empty to pay every collector with collections in the period")
+
+    line_ids = fields.One2many('property.payroll.run.line', 'run_id', 'Salaries')
+    total_amount = fields.Monetary('Total Payroll', compute='_compute_total_amount', currency_field='currency_id')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft')
+    salary_ids = fields.Many2many('property.staff.salary', string='Salaries', readonly=True)
+
+    currency_id = fields.Many2one('res.currency', default=lambda self: self.env.company.currency_id)
+
+    @api.depends('line_ids.total_amount')
+    def _compute_total_amount(self):
+        for run in self:
+            run.total_amount = sum(run.line_ids.mapped('total_amount'))
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _get_last_basic_salaries(self, user_ids):
+        """Basic salary of each collector's latest salary, in one query"""
+        self.env['property.staff.salary'].flush_model(['employee_id', 'basic_salary', 'period_to'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (employee_id) employee_id, basic_salary
+              FROM property_staff_salary
+             WHERE employee_id = ANY(%s)
+          ORDER BY employee_id, period_to DESC, id DESC
+        """, [list(user_ids)])
+        return dict(self.env.cr.fetchall())
+
+    def _get_paid_users(self, user_ids):
+        """Collectors who already have a salary over any part of this period"""
+        return set(self.env['property.staff.salary'].search([
+            ('employee_id', 'in', list(user_ids)),
+            ('period_from', '<=', self.period_to),
+            ('period_to', '>=', self.period_from),
+        ]).employee_id.ids)
+
+    def action_preview(self):
+        """Compute the commission of every collector over the period"""
+        self.ensure_one()
+        if self.period_from > self.period_to:
+            raise UserError(_('The period must start before it ends.'))
+        Salary = self.env['property.staff.salary']
+        results = Salary._compute_commissions(self.period_from, self.period_to, self.user_ids.ids)
+        for user_id in self._get_paid_users(results):
+            del results[user_id]
+        if not results:
+            raise UserError(_('There is no collector left to pay for this period.'))
+        basic_salaries = self._get_last_basic_salaries(results)
+        self.line_ids = [Command.clear()] + [Command.create({
+            'employee_id': user_id,
+            'basic_salary': basic_salaries.get(user_id, 0.0),
+            'collected_amount': result['collected_amount'],
+            'collection_count': result['collection_count'],
+            'commission': result['commission'],
+            'commission_lines': result['lines'],
+        }) for user_id, result in results.items()]
+        return self._reopen()
+
+    def _prepare_salary_vals(self, line):
+        return {
+            'name': f"SAL/{line.employee_id.login}/{self.period_from:%Y%m%d}-{self.period_to:%Y%m%d}",
+            'employee_id': line.employee_id.id,
+            'period_from': self.period_from,
+            'period_to': self.period_to,
+            'basic_salary': line.basic_salary,
+            'commission': line.commission,
+            'bonus': line.bonus,
+            'collected_amount': line.collected_amount,
+            'collection_count': line.collection_count,
+            'commission_line_ids': [Command.create(vals) for vals in line.commission_lines or []],
+            'commission_computed_at': fields.Datetime.now(),
+        }
+
+    def action_generate(self):
+        """Create the salaries of every previewed collector in one batch"""
+        self.ensure_one()
+        if self.state != 'draft':
+            raise UserError(_('This payroll is already generated.'))
+        if not self.line_ids:
+            raise UserError(_('Preview the payroll before generating it.'))
+        paid = self.env['res.users'].browse(list(self._get_paid_users(self.line_ids.employee_id.ids)))
+        if paid:
+            raise UserError(_('%(collectors)s already have a salary over this period, preview the payroll again.',
+                              collectors=', '.join(paid.mapped('name'))))
+
+        salaries = bulk_mode(self.env['property.staff.salary']).create([self._prepare_salary_vals(line) for line in self.line_ids])
+        self.write({'state': 'done', 'salary_ids': [Command.set(salaries.ids)]})
+        return self._reopen()
+
+    def action_view_salaries(self):
+        return {
+            'name': _('Payroll'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'property.staff.salary',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.salary_ids.ids)],
+        }
+
+
+class PropertyPayrollRunLine(models.TransientModel):
+    _name = 'property.payroll.run.line'
+    _description = 'Collector Payroll Run Line'
+
+    run_id = fields.Many2one('property.payroll.run', 'Payroll Run', required=True, ondelete='cascade')
+    employee_id = fields.Many2one('res.users', 'Collector', required=True, readonly=True)
+    collected_amount = fields.Monetary('Collected', currency_field='currency_id', readonly=True)
+    collection_count = fields.Integer('Collections', readonly=True)
+    basic_salary = fields.Monetary('Basic Salary', currency_field='currency_id')
+    commission = fields.Monetary('Commission', currency_field='currency_id', readonly=True)
+    bonus = fields.Monetary('Bonus', currency_field='currency_id')
+    total_amount = fields.Monetary('Total', compute='_compute_total_amount', currency_field='currency_id')
+    commission_lines = fields.Json('Commission Breakdown', readonly=True)
+
+    currency_id = fields.Many2one(related='run_id.currency_id')
+
+    @api.depends('basic_salary', 'commission', 'bonus')
+    def _compute_total_amount(self):
+        for line in self:
+            line.total_amount = line.basic_salary + line.commission + line.bonus
@@ -0,0 +1,148 @@
+from odoo import models, fields, api, Command, _
+from odoo.exceptions import UserError
+
+from ..models.property_bulk import bulk_mode, post_batch_summary
+
+
+class PropertyTenantExitBulk(models.TransientModel):
+    _name = 'property.tenant.exit.bulk'
+    _description = 'Bulk Tenant Move-Out'
+
+    # Selection
+    property_id = fields.Many2one('property.property', 'Property', required=True)
+    flat_id = fields.Many2one('property.flat', 'Flat', domain="[('property_id', '=', property_id)]")
+
+    # Exit Details
+    exit_date = fields.Date('Exit Date', required=True, default=fields.Date.today)
+    exit_reason = fields.Selection(
+        selection=lambda self: self.env['property.tenant.exit']._fields['exit_reason'].selection,
+        string='Exit Reason', required=True, default='early_termination')
+    exit_type = fields.Selection(
+        selection=lambda self: self.env['property.tenant.exit']._fields['exit_type'].selection,
+        string='Exit Type', default='normal')
+    complete_exits = fields.Boolean('Complete Exits', default=True,
+                                    help="Terminate the agreements and free the rooms right away")
+
+    line_ids = fields.One2many('property.tenant.exit.bulk.line', 'wizard_id', 'Tenants')
+    total_pending = fields.Monetary('Total Dues', compute='_compute_totals', currency_field='currency_id')
+    total_refund = fields.Monetary('Total Refunds', compute='_compute_totals', currency_field='currency_id')
+    total_settlement = fields.Monetary('Total Settlement', compute='_compute_totals', currency_field='currency_id')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft')
+    exit_ids = fields.Many2many('property.tenant.exit', string='Exits', readonly=True)
+
+    currency_id = fields.Many2one('res.currency', default=lambda self: self.env.company.currency_id)
+
+    @api.depends('line_ids.pending_dues', 'line_ids.deposit_refund', 'line_ids.final_settlement')
+    def _compute_totals(self):
+        for wizard in self:
+            wizard.total_pending = sum(wizard.line_ids.mapped('pending_dues'))
+            wizard.total_refund = sum(wizard.line_ids.mapped('deposit_refund'))
+            wizard.total_settlement = sum(wizard.line_ids.mapped('final_settlement'))
+
+    def _get_agreement_domain(self):
+        domain = [
+            ('state', '=', 'active'),
+            ('property_id', '=', self.property_id.id),
+        ]
+        if self.flat_id:
+            domain.append(('room_id.flat_id', '=', self.flat_id.id))
+        return domain
+
+    def _prepare_line_vals(self, agreements):
+        """Preview lines of the agreements, their settlement read with one grouped query per source"""
+        Exit = self.env['property.tenant.exit']
+        figures = Exit._get_settlement_figures([(agreement.id, self.exit_date) for agreement in agreements])
+        return [{
+            'agreement_id': agreement.id,
+            **Exit._prepare_settlement_vals(figures[agreement.id]),
+        } for agreement in agreements]
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_preview(self):
+        """Fill the wizard with the settlement of every active agreement of the property or flat"""
+        self.ensure_one()
+        agreements = self.env['property.agreement'].search(self._get_agreement_domain(), order='room_id, id')
+        if not agreements:
+            raise UserError(_('There is no active agreement to end here.'))
+        self.line_ids = [Command.clear()] + [Command.create(vals) for vals in self._prepare_line_vals(agreements)]
+        return self._reopen()
+
+    def _prepare_exit_vals(self, line):
+        return {
+            'tenant_id': line.tenant_id.id,
+            'agreement_id': line.agreement_id.id,
+            'exit_date': self.exit_date,
+            'exit_reason': self.exit_reason,
+            'exit_type': self.exit_type,
+            'status': 'in_progress',
+            'invoice_outstanding': line.invoice_outstanding,
+            'dues_outstanding': line.dues_outstanding,
+            'prorated_rent': line.prorated_rent,
+            'deposit_held': line.deposit_held,
+            'pending_dues': line.pending_dues,
+            'deposit_refund': line.deposit_refund,
+            'damages_deduction': line.damages_deduction,
+        }
+
+    def action_confirm(self):
+        """Create the exits of the previewed lines in one batch, then complete them together"""
+        self.ensure_one()
+        if self.state != 'draft':
+            raise UserError(_('These tenants have already moved out.'))
+        lines = self.line_ids.filtered(lambda l: l.agreement_id.state == 'active')
+        if not lines:
+            raise UserError(_('Preview the move-out before confirming it.'))
+
+        exits = bulk_mode(self.env['property.tenant.exit']).create([self._prepare_exit_vals(line) for line in lines])
+        if self.complete_exits:
+            exits.action_complete_exit()
+            post_batch_summary(exits.agreement_id, _('Tenants moved out'))
+        self.write({'state': 'done', 'exit_ids': [Command.set(exits.ids)]})
+        return self._reopen()
+
+    def action_view_exits(self):
+        return {
+            'name': _('Move-Outs'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'property.tenant.exit',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.exit_ids.ids)],
+        }
+
+
+class PropertyTenantExitBulkLine(models.TransientModel):
+    _name = 'property.tenant.exit.bulk.line'
+    _description = 'Bulk Tenant Move-Out Line'
+
+    wizard_id = fields.Many2one('property.tenant.exit.bulk', 'Wizard', required=True, ondelete='cascade')
+    agreement_id = fields.Many2one('property.agreement', 'Agreement', required=True, readonly=True)
+    tenant_id = fields.Many2one(related='agreement_id.tenant_id')
+    room_id = fields.Many2one(related='agreement_id.room_id')
+
+    invoice_outstanding = fields.Monetary('Unpaid Invoices', currency_field='currency_id', readonly=True)
+    dues_outstanding = fields.Monetary('Open Dues', currency_field='currency_id', readonly=True)
+    prorated_rent = fields.Monetary('Prorated Rent', currency_field='currency_id', readonly=True)
+    deposit_held = fields.Monetary('Deposit Held', currency_field='currency_id', readonly=True)
+    pending_dues = fields.Monetary('Pending Dues', currency_field='currency_id')
+    deposit_refund = fields.Monetary('Deposit Refund', currency_field='currency_id')
+    damages_deduction = fields.Monetary('Damages Deduction', currency_field='currency_id')
+    final_settlement = fields.Monetary('Final Settlement', compute='_compute_final_settlement',
+                                       currency_field='currency_id')
+
+    currency_id = fields.Many2one(related='agreement_id.currency_id')
+
+    @api.depends('deposit_refund', 'pending_dues', 'damages_deduction')
+    def _compute_final_settlement(self):
+        for line in self:
+            line.final_settlement = line.deposit_refund - line.pending_dues - line.damages_deduction